@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Asenkron AI analiz aşaması
+Haberleri sınırlı eşzamanlılıkla, zaman aşımı ve geri çekilmeli yeniden deneme
+ile analiz eder. Sonuçlar news_hash ile önbelleklenir; kalıcı önbellek olarak
+news_archive.analysis kullanılır, böylece yeniden başlatmada aynı haber için
+ikinci bir çağrı yapılmaz. base_url ile yerel bir stub sunucuya yönlendirilebilir.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Callable, Dict, Iterable, List, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "Sen uzman bir teknoloji analistisin. Haberi Türkçe yorumla: 1. Analiz 2. Neden Önemli? 3. Gelecek Öngörüsü."
+
+# Geçici hatalar: yeniden denemeye değer
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class NewsAnalyzer:
+    def __init__(self, api_key: str, model: str, base_url: str = "https://openrouter.ai/api/v1",
+                 concurrency: int = 4, timeout: float = 60.0, retries: int = 3, backoff: float = 2.0,
+                 cache_size: int = 10000,
+                 persistent_lookup: Optional[Callable[[List[str]], Dict[str, str]]] = None):
+        self.model = model
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.concurrency = max(1, concurrency)
+        # Yeniden denemeyi kendimiz yönetiyoruz
+        self.client = AsyncOpenAI(base_url=base_url, api_key=api_key, timeout=timeout, max_retries=0)
+        self.cache: Dict[str, str] = {}
+        self.cache_size = cache_size
+        self.persistent_lookup = persistent_lookup
+        self.stats = {'calls': 0, 'cache_hits': 0, 'failures': 0}
+
+    def _remember(self, news_hash: str, analysis: str):
+        if len(self.cache) >= self.cache_size:
+            # En eski kaydı at (dict ekleme sırasını korur)
+            del self.cache[next(iter(self.cache))]
+        self.cache[news_hash] = analysis
+
+    async def _call(self, title: str, summary: str, source: str) -> Optional[str]:
+        user_content = f"Kaynak: {source}\nBaşlık: {title}\nÖzet: {summary}"
+        for attempt in range(self.retries + 1):
+            try:
+                self.stats['calls'] += 1
+                completion = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": user_content},
+                        ]
+                    ),
+                    timeout=self.timeout,
+                )
+                return completion.choices[0].message.content
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.retries:
+                    logger.error(f"AI hatası ({self.retries + 1} deneme): {e or e.__class__.__name__}")
+                    return None
+                delay = self.backoff * (2 ** attempt) + random.uniform(0, 1)
+                logger.warning(f"AI geçici hata, {delay:.1f} sn sonra tekrar: {e or e.__class__.__name__}")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"AI hatası: {e}")
+                return None
+        return None
+
+    async def analyze(self, news_hash: str, title: str, summary: str, source: str) -> Optional[str]:
+        """Tek haber analizi (önce önbellek)"""
+        cached = self.cache.get(news_hash)
+        if cached:
+            self.stats['cache_hits'] += 1
+            return cached
+        analysis = await self._call(title, summary, source)
+        if analysis:
+            self._remember(news_hash, analysis)
+        else:
+            self.stats['failures'] += 1
+        return analysis
+
+    async def analyze_many(self, items: Iterable[Dict]):
+        """Haberleri eşzamanlı analiz et; sonuç item['analysis'] alanına yazılır"""
+        items = [item for item in items if not item.get('analysis')]
+        if not items:
+            return
+        # Kalıcı önbellek: bellekte olmayanları tek sorguda arşivden al
+        if self.persistent_lookup:
+            missing = [item['news_hash'] for item in items if item['news_hash'] not in self.cache]
+            if missing:
+                try:
+                    for news_hash, analysis in self.persistent_lookup(missing).items():
+                        self._remember(news_hash, analysis)
+                except Exception as e:
+                    logger.error(f"AI önbellek okuma hatası: {e}")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(item: Dict):
+            async with semaphore:
+                summary = item.get('clean_text') or item['summary']
+                analysis = await self.analyze(item['news_hash'], item['title'], summary, item['source'])
+                if analysis:
+                    item['analysis'] = analysis
+
+        await asyncio.gather(*(run(item) for item in items))
+
+    async def aclose(self):
+        await self.client.close()
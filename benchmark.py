@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+"""
+Uçtan uca performans ölçümü
+Yerel bir HTTP sunucusu N adet sentetik RSS/Atom feed'i (ayarlanabilir boyut ve
+değişim oranıyla) ve OpenAI uyumlu bir AI stub'ı sunar. Sahte bir Telegram
+bot'u ile tam check_feeds_job döngüleri çalıştırılır; verim, aşama bazında
+gecikme ve en yüksek bellek (RSS) raporlanır. Sonuçlar bir baseline dosyasına
+kaydedilip sonraki çalıştırmalarla karşılaştırılabilir.
+
+Kullanım:
+    python benchmark.py --feeds 200 --items 30 --cycles 5
+    python benchmark.py --feeds 200 --save-baseline      # baseline'ı güncelle
+    python benchmark.py --feeds 200 --ai --ai-latency 0.2
+    python benchmark.py --feeds 200 --workers 3 --kill-worker   # çok süreçli (worker + koordinatör)
+    python benchmark.py --feeds 500 --parse-bench --parse-workers 4   # thread vs süreç havuzu ayrıştırma
+"""
+
+import argparse
+import asyncio
+import functools
+import http.server
+import inspect
+import json
+import logging
+import os
+import random
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILES = ('filters.json', 'categories.json', 'topics.json')
+BENCH_CHAT_ID = -1001
+
+WORDS = (
+    "yapay zeka model veri bulut güvenlik yazılım donanım işlemci çip robot uzay roket "
+    "uydu batarya enerji güneş rüzgar elektrikli araç otonom sürüş ağ protokol şifreleme "
+    "açık kaynak geliştirici platform uygulama mobil tarayıcı sunucu veritabanı ölçek "
+    "yatırım girişim borsa enflasyon faiz piyasa ihracat üretim fabrika tedarik zinciri "
+    "araştırma deney laboratuvar genom hücre aşı iklim okyanus buzul teleskop galaksi "
+    "kuantum bilgisayar algoritma optimizasyon tarama dil çeviri görüntü ses video oyun"
+).split()
+
+
+# --- Sentetik feed sunucusu ---
+
+class FeedWorld:
+    """Feed içeriklerinin durumu: her döngüde değişen feedler yeni haber yayınlar"""
+
+    def __init__(self, feeds: int, items: int, new_items: int, change_rate: float,
+                 atom_ratio: float, summary_words: int, seed: int = 42):
+        self.feeds = feeds
+        self.items = items
+        self.new_items = new_items
+        self.change_rate = change_rate
+        self.summary_words = summary_words
+        self.rng = random.Random(seed)
+        self.generation = [0] * feeds
+        self.atom = [self.rng.random() < atom_ratio for _ in range(feeds)]
+        self.started = time.time()
+        # Feed başına istek sayısı (çok süreçli modda worker'ların yoklamasını izlemek için)
+        self.requests = [0] * feeds
+        self._lock = threading.Lock()
+
+    def hit(self, feed: int):
+        with self._lock:
+            self.requests[feed] += 1
+
+    def polled_since(self, mark: List[int], times: int = 1) -> bool:
+        """Her feed mark'tan sonra en az times kez yoklandı mı"""
+        with self._lock:
+            return all(now - before >= times for now, before in zip(self.requests, mark))
+
+    def advance(self) -> int:
+        """Sonraki döngü: feedlerin change_rate kadarı yeni haber yayınlar"""
+        changed = 0
+        for i in range(self.feeds):
+            if self.rng.random() < self.change_rate:
+                self.generation[i] += 1
+                changed += 1
+        return changed
+
+    def _text(self, feed: int, item: int, words: int) -> str:
+        rng = random.Random(feed * 1000003 + item)
+        return " ".join(rng.choice(WORDS) for _ in range(words))
+
+    def render(self, feed: int):
+        """(gövde, içerik tipi, etag)"""
+        top = self.generation[feed] * self.new_items + self.items
+        now = time.time()
+        entries = []
+        for item in range(top - 1, top - self.items - 1, -1):
+            title = f"{self._text(feed, item, 8)} #{feed}-{item}"
+            summary = f"<p>{self._text(feed, -item - 1, self.summary_words)}</p><p><b>Detay</b> için tıklayın.</p>"
+            link = f"https://site{feed % 50}.example.com/haber/{feed}/{item}?utm_source=rss"
+            published = now - (top - item) * 60
+            entries.append((title, summary, link, f"urn:bench:{feed}:{item}", published))
+
+        if self.atom[feed]:
+            body = "".join(
+                f"<entry><title>{title}</title><link href='{link}'/><id>{guid}</id>"
+                f"<updated>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(published))}</updated>"
+                f"<summary type='html'>{_escape(summary)}</summary></entry>"
+                for title, summary, link, guid, published in entries
+            )
+            doc = (
+                "<?xml version='1.0' encoding='utf-8'?>"
+                f"<feed xmlns='http://www.w3.org/2005/Atom'><title>Bench Atom {feed}</title>{body}</feed>"
+            )
+            content_type = 'application/atom+xml'
+        else:
+            body = "".join(
+                f"<item><title>{title}</title><link>{link}</link><guid>{guid}</guid>"
+                f"<pubDate>{formatdate(published)}</pubDate><description>{_escape(summary)}</description></item>"
+                for title, summary, link, guid, published in entries
+            )
+            doc = (
+                "<?xml version='1.0' encoding='utf-8'?><rss version='2.0'><channel>"
+                f"<title>Bench RSS {feed}</title><ttl>5</ttl>{body}</channel></rss>"
+            )
+            content_type = 'application/rss+xml'
+        return doc.encode('utf-8'), content_type, f'"{feed}-{self.generation[feed]}"'
+
+
+def _escape(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def start_server(world: FeedWorld, ai_latency: float):
+    """Feed ve AI stub sunucusunu arka planda başlat; portu döndür"""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            try:
+                feed = int(self.path.rsplit('/', 1)[-1].split('.')[0])
+                body, content_type, etag = world.render(feed)
+            except (ValueError, IndexError):
+                self.send_error(404)
+                return
+            world.hit(feed)
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            # OpenAI uyumlu /chat/completions stub'ı
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if ai_latency:
+                time.sleep(ai_latency)
+            body = json.dumps({
+                'id': 'bench', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': request.get('model', 'bench'),
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': 'Analiz: benchmark yanıtı.'},
+                }],
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- Aşama zamanlayıcıları ---
+
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, elapsed: float):
+        self.samples.setdefault(stage, []).append(elapsed)
+
+    def wrap(self, stage: str, func):
+        """Senkron / asenkron fonksiyonu veya üreteci süre ölçen sarmalayıcıyla değiştir"""
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def timed_async(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.record(stage, time.perf_counter() - started)
+            return timed_async
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            result = func(*args, **kwargs)
+            if inspect.isgenerator(result):
+                # Üreteç: tüketim süresini ölç
+                result = iter(list(result))
+            self.record(stage, time.perf_counter() - started)
+            return result
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for stage, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            report[stage] = {
+                'calls': len(samples),
+                'total_s': round(sum(samples), 4),
+                'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+                'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+            }
+        return report
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS bayt döndürür
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+# --- Çalıştırma ---
+
+async def run_cycles(bot_module, timer: StageTimer, args) -> Dict:
+    sent = []
+
+    class FakeBot:
+        async def send_message(self, **kwargs):
+            started = time.perf_counter()
+            if args.send_latency:
+                await asyncio.sleep(args.send_latency)
+            sent.append(kwargs.get('chat_id'))
+            timer.record('telegram_send', time.perf_counter() - started)
+
+    class Context:
+        bot = FakeBot()
+
+    bot_logic = bot_module.bot_logic
+    bot_logic.load_config()
+    # CHAT_ID dışındaki sohbetler aynı çekim/analiz hattından beslenir
+    for i in range(1, args.chats):
+        bot_logic.update_subscriber(str(BENCH_CHAT_ID - i))
+    bot_logic.scheduler.sync(bot_logic.feed_urls())
+    cycles = []
+    for cycle in range(args.cycles):
+        if cycle:
+            args.world.advance()
+        for state in bot_logic.scheduler.state.values():
+            state['next_due'] = 0
+        before = len(sent)
+        started = time.perf_counter()
+        await bot_module.check_feeds_job(Context())
+        if bot_logic.sender:
+            await bot_logic.sender.join()
+        elapsed = time.perf_counter() - started
+        timer.record('cycle', elapsed)
+        delivered = len(sent) - before
+        cycles.append({'cycle': cycle, 'seconds': round(elapsed, 4), 'sent': delivered})
+        print(f"  döngü {cycle}: {elapsed:.3f} sn, {delivered} mesaj")
+    return {'cycles': cycles, 'sent': len(sent), 'fetch': dict(bot_logic.fetcher.stats)}
+
+
+def start_workers(args, workdir: str) -> List[subprocess.Popen]:
+    """BOT_ROLE=worker süreçlerini başlat; loglar çalışma dizinine yazılır"""
+    workers = []
+    for i in range(args.workers):
+        env = dict(
+            os.environ, BOT_ROLE='worker', WORKER_ID=f"bench-w{i}", LEASE_TTL=str(args.lease_ttl),
+            POLL_TICK='0.2', POLL_BASE_INTERVAL='0.5', POLL_MIN_INTERVAL='0.5', POLL_MAX_INTERVAL='1',
+        )
+        env.pop('METRICS_PORT', None)
+        log = open(os.path.join(workdir, f"worker_{i}.log"), 'w')
+        workers.append(subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, 'rss_telegram_bot.py')],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+    return workers
+
+
+def stop_workers(workers: List[subprocess.Popen]):
+    for proc in workers:
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGTERM)
+    for proc in workers:
+        try:
+            proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+async def run_sharded_cycles(bot_module, timer: StageTimer, args, workers: List[subprocess.Popen]) -> Dict:
+    """Worker'lar feedleri kendi aralarında paylaşıp kuyruğa yazar; bu süreç koordinatördür.
+    Bir döngü: dünya ilerler, her feed yeni içerik sonrası iki kez yoklanana kadar beklenir
+    (ilk yoklamanın haberleri kuyruğa yazılmış olur), sonra kuyruk boşalana kadar gönderilir."""
+    sent = []
+
+    class FakeBot:
+        async def send_message(self, **kwargs):
+            sent.append(kwargs.get('chat_id'))
+
+    class Context:
+        bot = FakeBot()
+
+    bot_logic = bot_module.bot_logic
+    storage = bot_logic.storage
+    bot_logic.load_config()
+    for i in range(1, args.chats):
+        bot_logic.update_subscriber(str(BENCH_CHAT_ID - i))
+    cycles = []
+    for cycle in range(args.cycles):
+        if cycle:
+            args.world.advance()
+        if args.kill_worker and cycle == 1 and len(workers) > 1:
+            # Kirasını bırakmadan ölen worker: feedleri LEASE_TTL sonra diğerlerine geçmeli
+            workers[0].kill()
+            print(f"  worker bench-w0 öldürüldü (SIGKILL), devralma ≤ {args.lease_ttl:g} sn")
+        mark = list(args.world.requests)
+        before = len(sent)
+        started = time.perf_counter()
+        deadline = time.monotonic() + args.lease_ttl * 3 + 30
+        while not args.world.polled_since(mark, 2):
+            if time.monotonic() > deadline:
+                print("  UYARI: tüm feedler zamanında yoklanmadı")
+                break
+            await asyncio.sleep(0.05)
+        polled = time.perf_counter() - started
+        while True:
+            await bot_module.check_feeds_job(Context())
+            if bot_logic.sender:
+                await bot_logic.sender.join()
+            if not storage.ingest_depth():
+                break
+        elapsed = time.perf_counter() - started
+        timer.record('cycle', elapsed)
+        owners = dict(storage.query(
+            "SELECT owner, COUNT(*) FROM leases WHERE name LIKE 'feed:%' GROUP BY owner ORDER BY owner"
+        ))
+        delivered = len(sent) - before
+        cycles.append({
+            'cycle': cycle, 'seconds': round(elapsed, 4), 'polled_seconds': round(polled, 4),
+            'sent': delivered, 'leases': owners,
+        })
+        print(f"  döngü {cycle}: {elapsed:.3f} sn (yoklama {polled:.3f} sn), {delivered} mesaj, kiralar {owners}")
+    return {'cycles': cycles, 'sent': len(sent), 'fetch': {}}
+
+
+async def run_parse_bench(world: FeedWorld, args) -> Dict:
+    """Sadece ayrıştırma aşaması: aynı ham baytlar önce thread'de (süreç içi), sonra
+    parse_workers süreçlik havuzda FeedFetcher.parse ile ayrıştırılır"""
+    from feed_fetcher import FeedFetcher
+
+    documents = []
+    for feed in range(world.feeds):
+        body, content_type, _ = world.render(feed)
+        documents.append((body, {'content-type': content_type}))
+    pool_size = args.parse_workers or os.cpu_count() or 1
+    print(f"Ayrıştırma: {len(documents)} feed, toplam {sum(len(body) for body, _ in documents) / 1024:.0f} KB, "
+          f"{args.cycles} tur, {os.cpu_count()} CPU")
+    modes = []
+    for workers in (0, pool_size):
+        fetcher = FeedFetcher(parse_workers=workers, parse_pool_min=0)
+        try:
+            # Havuz süreçlerinin başlatılması ölçüme girmesin
+            await asyncio.gather(*(fetcher.parse(body, headers) for body, headers in documents[:workers * 2]))
+            entries = kept = 0
+            started = time.perf_counter()
+            for _ in range(args.cycles):
+                parsed = await asyncio.gather(*(fetcher.parse(body, headers) for body, headers in documents))
+                entries += sum(item['total'] for item in parsed)
+                kept += sum(len(item['entries']) for item in parsed)
+            elapsed = time.perf_counter() - started
+        finally:
+            await fetcher.aclose()
+        modes.append({
+            'mode': f"pool({workers})" if workers else 'in-process',
+            'seconds': round(elapsed, 4),
+            'feeds_per_second': round(len(documents) * args.cycles / elapsed, 2),
+            'entries_per_second': round(entries / elapsed, 2),
+            'kept_entries': kept // args.cycles,
+        })
+    speedup = modes[0]['seconds'] / modes[1]['seconds'] if modes[1]['seconds'] else 0
+    print(f"{'mod':14}{'sn':>10}{'feed/sn':>12}{'haber/sn':>12}{'tutulan':>10}")
+    for mode in modes:
+        print(f"{mode['mode']:14}{mode['seconds']:>10}{mode['feeds_per_second']:>12}"
+              f"{mode['entries_per_second']:>12}{mode['kept_entries']:>10}")
+    print(f"Hızlanma: {speedup:.2f}x")
+    return {'parse': modes, 'speedup': round(speedup, 2)}
+
+
+def instrument(bot_module, timer: StageTimer):
+    """Ölçülecek aşamaları sarmala"""
+    bot_logic = bot_module.bot_logic
+    bot_logic.fetcher.fetch_one = timer.wrap('fetch_parse', bot_logic.fetcher.fetch_one)
+    bot_logic.iter_feed_entries = timer.wrap('entries', bot_logic.iter_feed_entries)
+    bot_logic.is_news_sent = timer.wrap('dedup', bot_logic.is_news_sent)
+    bot_logic.route_news = timer.wrap('route', bot_logic.route_news)
+    bot_logic.collapse_near_duplicates = timer.wrap('neardup', bot_logic.collapse_near_duplicates)
+    bot_logic.categorize_news = timer.wrap('categorize', bot_logic.categorize_news)
+    bot_logic.analyze_news = timer.wrap('ai', bot_logic.analyze_news)
+    bot_logic.on_news_delivered = timer.wrap('deliver_bookkeeping', bot_logic.on_news_delivered)
+    bot_logic.storage.flush = timer.wrap('sqlite_flush', bot_logic.storage.flush)
+    bot_logic.export_daily_news = timer.wrap('excel_export', bot_logic.export_daily_news)
+    bot_module.process_news_batch = timer.wrap('process_batch', bot_module.process_news_batch)
+
+
+def scenario_key(args) -> str:
+    key = (
+        f"feeds={args.feeds},items={args.items},new={args.new_items},change={args.change_rate},"
+        f"atom={args.atom_ratio},words={args.summary_words},cycles={args.cycles},ai={int(args.ai)}"
+    )
+    # Tek sohbetli, tek süreçli senaryoların anahtarı (ve kayıtlı baseline'ları) değişmesin
+    if args.chats != 1:
+        key += f",chats={args.chats}"
+    if args.workers:
+        key += f",workers={args.workers}"
+    if args.parse_workers:
+        key += f",parse_workers={args.parse_workers}"
+    return key
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Baseline'a göre gerilemeleri listele"""
+    regressions = []
+    checks = (
+        ('items_per_second', result['items_per_second'], baseline.get('items_per_second'), False),
+        ('total_seconds', result['total_seconds'], baseline.get('total_seconds'), True),
+        ('peak_rss_mb', result['peak_rss_mb'], baseline.get('peak_rss_mb'), True),
+    )
+    for name, current, previous, higher_is_worse in checks:
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        marker = "GERİLEME" if worse else "ok"
+        print(f"  {name:18} {previous:>12} -> {current:<12} ({change:+.1%}) {marker}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="RSS Telegram Bot uçtan uca benchmark")
+    parser.add_argument('--feeds', type=int, default=100, help="sentetik feed sayısı")
+    parser.add_argument('--items', type=int, default=30, help="feed başına haber")
+    parser.add_argument('--new-items', type=int, default=3, help="değişen feed başına döngüde yeni haber")
+    parser.add_argument('--change-rate', type=float, default=0.2, help="döngüde değişen feed oranı")
+    parser.add_argument('--atom-ratio', type=float, default=0.3, help="Atom formatındaki feed oranı")
+    parser.add_argument('--summary-words', type=int, default=60, help="özet uzunluğu (kelime)")
+    parser.add_argument('--cycles', type=int, default=3, help="çalıştırılacak döngü sayısı")
+    parser.add_argument('--ai', action='store_true', help="AI aşamasını stub sunucuyla çalıştır")
+    parser.add_argument('--ai-latency', type=float, default=0.05, help="AI stub yanıt gecikmesi (sn)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="feedleri paylaşan worker süreci sayısı (0: tek süreç)")
+    parser.add_argument('--lease-ttl', type=float, default=5, help="worker modunda kira süresi (sn)")
+    parser.add_argument('--kill-worker', action='store_true',
+                        help="2. döngüde bir worker'ı öldürüp yeniden dağılımı göster")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="feedparser süreç havuzu boyutu (PARSE_WORKERS; 0: süreç içi)")
+    parser.add_argument('--parse-bench', action='store_true',
+                        help="sadece ayrıştırmayı ölç: süreç içi ve --parse-workers havuzu karşılaştırması")
+    parser.add_argument('--chats', type=int, default=1, help="abone sohbet sayısı (hepsi tüm feedleri izler)")
+    parser.add_argument('--send-latency', type=float, default=0.0, help="sahte Telegram gönderim gecikmesi (sn)")
+    parser.add_argument('--baseline', default=os.path.join(REPO_DIR, 'benchmark_baseline.json'))
+    parser.add_argument('--save-baseline', action='store_true', help="sonucu baseline olarak kaydet")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="gerileme eşiği (oran)")
+    parser.add_argument('--output', help="sonuç JSON'unu bu dosyaya da yaz")
+    parser.add_argument('--verbose', action='store_true', help="bot loglarını göster")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    args.world = FeedWorld(args.feeds, args.items, args.new_items, args.change_rate,
+                           args.atom_ratio, args.summary_words)
+    if args.parse_bench:
+        sys.path.insert(0, REPO_DIR)
+        result = asyncio.run(run_parse_bench(args.world, args))
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        return 0
+    server = start_server(args.world, args.ai_latency)
+    port = server.server_address[1]
+
+    # Bot modülü import anında çalışma dizinine dosya açar: geçici dizinde çalış
+    workdir = tempfile.mkdtemp(prefix='rss_bench_')
+    for name in CONFIG_FILES:
+        if os.path.exists(os.path.join(REPO_DIR, name)):
+            shutil.copy(os.path.join(REPO_DIR, name), workdir)
+    with open(os.path.join(workdir, 'feeds.json'), 'w', encoding='utf-8') as f:
+        json.dump([f"http://127.0.0.1:{port}/feed/{i}.xml" for i in range(args.feeds)], f)
+    os.chdir(workdir)
+
+    os.environ.setdefault('TELEGRAM_GLOBAL_RATE', '100000')
+    os.environ.setdefault('TELEGRAM_CHAT_RATE', '100000')
+    os.environ.setdefault('TELEGRAM_GROUP_PER_MINUTE', '6000000')
+    os.environ.setdefault('EXCEL_FLUSH_INTERVAL', '0')
+    os.environ['CHAT_ID'] = str(BENCH_CHAT_ID)
+    if args.parse_workers:
+        os.environ['PARSE_WORKERS'] = str(args.parse_workers)
+        os.environ.setdefault('PARSE_POOL_MIN_BYTES', '0')
+    if args.workers:
+        os.environ['BOT_ROLE'] = 'coordinator'
+        os.environ['LEASE_TTL'] = str(args.lease_ttl)
+    if args.ai:
+        os.environ['OPENROUTER_API_KEY'] = 'benchmark'
+        os.environ['OPENROUTER_BASE_URL'] = f"http://127.0.0.1:{port}/v1"
+    else:
+        os.environ.pop('OPENROUTER_API_KEY', None)
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    sys.path.insert(0, REPO_DIR)
+    import rss_telegram_bot
+
+    timer = StageTimer()
+    instrument(rss_telegram_bot, timer)
+    print(f"Senaryo: {scenario_key(args)}")
+    print(f"Çalışma dizini: {workdir}")
+
+    # Veritabanı şeması koordinatör import edilirken kuruldu; worker'lar ondan sonra başlar
+    workers = start_workers(args, workdir) if args.workers else []
+
+    async def run():
+        try:
+            if workers:
+                return await run_sharded_cycles(rss_telegram_bot, timer, args, workers)
+            return await run_cycles(rss_telegram_bot, timer, args)
+        finally:
+            await rss_telegram_bot.shutdown(None)
+
+    started = time.perf_counter()
+    try:
+        outcome = asyncio.run(run())
+    finally:
+        stop_workers(workers)
+    total = time.perf_counter() - started
+    server.shutdown()
+
+    result = {
+        'scenario': scenario_key(args),
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'total_seconds': round(total, 4),
+        'items_sent': outcome['sent'],
+        'items_per_second': round(outcome['sent'] / total, 2) if total else 0,
+        'feeds_per_second': round(args.feeds * args.cycles / total, 2) if total else 0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'fetch': outcome['fetch'],
+        'cycles': outcome['cycles'],
+        'stages': timer.summary(),
+    }
+
+    print(f"\nToplam: {result['total_seconds']} sn, {result['items_sent']} mesaj, "
+          f"{result['items_per_second']} haber/sn, {result['feeds_per_second']} feed/sn, "
+          f"en yüksek RSS {result['peak_rss_mb']} MB")
+    print(f"{'aşama':22}{'çağrı':>8}{'toplam sn':>12}{'ort ms':>10}{'p95 ms':>10}")
+    for stage, stats in result['stages'].items():
+        print(f"{stage:22}{stats['calls']:>8}{stats['total_s']:>12}{stats['mean_ms']:>10}{stats['p95_ms']:>10}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    regressions = []
+    previous = baselines.get(result['scenario'])
+    if previous:
+        print(f"\nBaseline karşılaştırması ({previous.get('recorded_at')}):")
+        regressions = compare(result, previous, args.tolerance)
+    elif not args.save_baseline:
+        print("\nBu senaryo için baseline yok (--save-baseline ile kaydedin)")
+
+    if args.save_baseline:
+        baselines[result['scenario']] = result
+        tmp_path = f"{args.baseline}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, args.baseline)
+        print(f"Baseline kaydedildi: {args.baseline}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if regressions and not args.save_baseline else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
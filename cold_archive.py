@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Aylık soğuk arşiv
+Saklama süresini dolduran news_archive satırları silinmeden önce aylık ayrı
+SQLite dosyalarına (news_archive_YYYY-MM.db) taşınabilir. Özet, düz metin ve
+AI analizi zlib ile sıkıştırılmış tek bir blob olarak saklanır; arama için
+içeriksiz (contentless) bir FTS5 indeksi tutulur, böylece dosyalar küçük kalır
+ama /ara --arsiv ile aranabilir.
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+from text_utils import turkish_fold
+
+logger = logging.getLogger(__name__)
+
+_MONTH_RE = re.compile(r'news_archive_(\d{4}-\d{2})\.db$')
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS news (
+        id INTEGER PRIMARY KEY,
+        news_hash TEXT UNIQUE NOT NULL,
+        source TEXT,
+        category TEXT,
+        title TEXT,
+        link TEXT,
+        published_date TIMESTAMP,
+        created_at TIMESTAMP,
+        feed_url TEXT,
+        payload BLOB
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+        title, body, content='', tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+)
+SQL_INSERT = '''
+    INSERT OR IGNORE INTO news
+    (id, news_hash, source, category, title, link, published_date, created_at, feed_url, payload)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_INSERT_FTS = "INSERT INTO news_fts (rowid, title, body) VALUES (?, ?, ?)"
+
+
+def pack_payload(summary: str, clean_text: str, analysis: str) -> bytes:
+    data = {'summary': summary, 'clean_text': clean_text, 'analysis': analysis}
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'), 9)
+
+
+class ColdArchive:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, month: str) -> str:
+        return os.path.join(self.directory, f"news_archive_{month}.db")
+
+    def months(self) -> List[str]:
+        """Mevcut aylık arşivler (yeniden eskiye)"""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, 'news_archive_*.db')):
+            match = _MONTH_RE.search(path)
+            if match:
+                found.append(match.group(1))
+        return sorted(found, reverse=True)
+
+    def _connect(self, month: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path_for(month))
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def store(self, rows: Iterable[Dict]) -> int:
+        """Satırları oluşturulma aylarına göre ilgili dosyalara yaz (tekrar yazım zararsız)"""
+        by_month: Dict[str, List[Dict]] = {}
+        for row in rows:
+            month = (row['created_at'] or '')[:7] or 'unknown'
+            by_month.setdefault(month, []).append(row)
+        stored = 0
+        for month, items in by_month.items():
+            conn = self._connect(month)
+            try:
+                with conn:
+                    fresh = []
+                    for row in items:
+                        cursor = conn.execute(SQL_INSERT, (
+                            row['id'], row['news_hash'], row['source'], row['category'], row['title'],
+                            row['link'], row['published_date'], row['created_at'], row['feed_url'],
+                            pack_payload(row['summary'], row['clean_text'], row['analysis']),
+                        ))
+                        if cursor.rowcount:
+                            fresh.append(row)
+                    # Sadece yeni eklenen satırlar indekslenir (aynı parti ikinci kez taşınabilir)
+                    conn.executemany(SQL_INSERT_FTS, [
+                        (row['id'], turkish_fold(row['title'] or ''), turkish_fold(row['search_text'] or ''))
+                        for row in fresh
+                    ])
+                    stored += len(fresh)
+            finally:
+                conn.close()
+        return stored
+
+    def search(self, match: str, limit: int = 5) -> List[Tuple]:
+        """FTS5 MATCH ifadesiyle aylık arşivlerde (yeniden eskiye) ara"""
+        results: List[Tuple] = []
+        for month in self.months():
+            if len(results) >= limit:
+                break
+            try:
+                conn = sqlite3.connect(f"file:{self.path_for(month)}?mode=ro", uri=True)
+            except sqlite3.Error as e:
+                logger.error(f"Arşiv açılamadı ({month}): {e}")
+                continue
+            try:
+                results.extend(conn.execute(
+                    "SELECT n.title, n.link FROM news_fts JOIN news n ON n.id = news_fts.rowid "
+                    "WHERE news_fts MATCH ? ORDER BY bm25(news_fts, 10.0, 1.0), n.published_date DESC LIMIT ?",
+                    (match, limit - len(results))
+                ).fetchall())
+            except sqlite3.Error as e:
+                logger.error(f"Arşiv arama hatası ({month}): {e}")
+            finally:
+                conn.close()
+        return results
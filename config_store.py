@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Yapılandırma dosyaları
+JSON yapılandırma dosyaları (feeds.json, filters.json, categories.json,
+topics.json) her tikte yeniden okunmaz: dosyanın imzası (mtime, boyut, inode)
+değiştiğinde okunur, türetilmiş yapı (derlenmiş filtre, sınıflandırıcı ...)
+önce tamamen kurulur ve ancak başarılı olursa tek adımda devreye alınır.
+Bozuk ya da yarım okunan bir dosya mevcut yapılandırmayı bozmaz.
+
+Yazmalar atomiktir: içerik aynı dizinde geçici bir dosyaya yazılır, diske
+indirilir ve os.replace ile yerine konur. Oku-değiştir-yaz işlemleri
+(ör. /abone, OPML içe aktarma) bir kilit dosyasıyla sıraya sokulur.
+"""
+
+import errno
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: kilit yok, rename yine atomik
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+Signature = Tuple[int, int, int]
+
+
+@contextmanager
+def config_lock(path: str):
+    """path için süreçler arası özel kilit (path.lock üzerinde flock)"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs):
+    """JSON'u geçici dosyaya yazıp os.replace ile yerine koy"""
+    dump_kwargs.setdefault('indent', 4)
+    dump_kwargs.setdefault('ensure_ascii', False)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            os.chmod(tmp_path, 0o644)
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if e.errno not in (errno.EBUSY, errno.EXDEV, errno.EPERM):
+                raise
+            # Hedef tek dosyalık bir bind mount (docker-compose): rename edilemez,
+            # aynı inode'a yaz. Okuyucu yarım dosyayı reddedip sonraki değişikliği bekler.
+            with open(tmp_path, 'rb') as src, open(path, 'r+b') as dst:
+                dst.write(src.read())
+                dst.truncate()
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.unlink(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def update_json(path: str, mutate: Callable[[Any], Any], default: Any = None) -> Any:
+    """Kilit altında oku-değiştir-yaz; mutate None döndürürse dosyaya dokunulmaz"""
+    with config_lock(path):
+        data = default
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        updated = mutate(data)
+        if updated is None:
+            return data
+        atomic_write_json(path, updated)
+        return updated
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # inode: rename ile değiştirilen dosya aynı mtime'a sahip olsa bile yakalanır
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ConfigStore:
+    def __init__(self):
+        # path -> {'build', 'apply', 'signature'}
+        self._files: Dict[str, Dict] = {}
+
+    def watch(self, path: str, apply: Callable[[Any], None], build: Optional[Callable[[Any], Any]] = None):
+        """Dosyayı izlemeye al: değişince build(json) kurulur, sonra apply(sonuç) çağrılır"""
+        self._files[path] = {'build': build, 'apply': apply, 'signature': None}
+
+    def invalidate(self, path: Optional[str] = None):
+        """Bir sonraki refresh'te (imza aynı olsa bile) yeniden oku"""
+        for name, entry in self._files.items():
+            if path is None or name == path:
+                entry['signature'] = None
+
+    def refresh(self) -> List[str]:
+        """Değişen dosyaları yeniden yükle; yüklenenlerin listesini döndür"""
+        changed = []
+        for path, entry in self._files.items():
+            signature = file_signature(path)
+            if signature is None or signature == entry['signature']:
+                # Dosya yoksa mevcut yapılandırma korunur
+                continue
+            entry['signature'] = signature
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                derived = entry['build'](data) if entry['build'] else data
+            except Exception as e:
+                # Yarım yazılmış ya da bozuk dosya: eski yapılandırmayla devam,
+                # dosya tekrar değişince yeniden denenir
+                logger.error(f"{path} okuma hatası (önceki yapılandırma korunuyor): {e}")
+                continue
+            entry['apply'](derived)
+            changed.append(path)
+        return changed
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Bellek içi tekilleştirme indeksi
+sent_news tablosundaki news_hash değerlerini 16 baytlık özetler olarak tutar.
+Kapasite sınırlıdır; sınır aşılırsa en eski kayıtlar düşer ve indeks
+"eksik" moda geçer: bu durumda ıskalamalar SQLite'a sorulur.
+"""
+
+import hashlib
+from typing import Iterable
+
+
+def _digest(news_hash: str) -> bytes:
+    """MD5 hex değerini 16 bayta indir (hex değilse özetini al)"""
+    try:
+        key = bytes.fromhex(news_hash)
+        if len(key) == 16:
+            return key
+    except ValueError:
+        pass
+    return hashlib.md5(news_hash.encode()).digest()
+
+
+class DedupIndex:
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max(1, max_entries)
+        # dict ekleme sırasını korur: ilk anahtar en eski kayıt
+        self._keys = {}
+        # True ise indeks sent_news'in tamamını içerir, ıskalama kesin "görülmedi" demektir
+        self.complete = True
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, news_hash: str) -> bool:
+        return _digest(news_hash) in self._keys
+
+    def add(self, news_hash: str):
+        key = _digest(news_hash)
+        if key in self._keys:
+            return
+        self._keys[key] = None
+        if len(self._keys) > self.max_entries:
+            del self._keys[next(iter(self._keys))]
+            self.complete = False
+
+    def load(self, hashes: Iterable[str], complete: bool):
+        """Eskiden yeniye sıralı hash listesini yükle"""
+        for news_hash in hashes:
+            self.add(news_hash)
+        self.complete = self.complete and complete
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Özet (digest) teslim modu
+Haberler (sohbet, topic, kategori) bazında bir zaman penceresi boyunca biriktirilir,
+sonra Telegram'ın 4096 karakter sınırına sığacak en az sayıda mesaja
+paketlenir. Her haber bütün bir HTML bloğudur; bloklar asla ortadan bölünmez.
+"""
+
+import html
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+GroupKey = Tuple[Union[int, str], Optional[int], str]
+
+
+def news_keys(news: Dict) -> List[str]:
+    """Haberin ve birleştirilmiş yakın kopyalarının kimlik hash'leri (news_hash, url_hash)"""
+    return [
+        key for item in [news] + list(news.get('alternates') or [])
+        for key in (item['news_hash'], item.get('url_hash')) if key
+    ]
+
+
+def format_digest_item(news: Dict, summary_chars: int = 160, max_chars: int = 1000) -> str:
+    """Tek haberin özet bloğu (HTML güvenli)"""
+    title = news.get('title', '')
+    summary = news.get('clean_summary') or ''
+    if len(summary) > summary_chars:
+        summary = summary[:summary_chars].rstrip() + "…"
+    # Tek blok bile sınırı aşmasın: kaçışlamadan önce ham metni kırp
+    if len(title) > max_chars // 2:
+        title = title[:max_chars // 2].rstrip() + "…"
+    block = (
+        f"🔹 <a href='{html.escape(news.get('link', ''), quote=True)}'>{html.escape(title)}</a>"
+        f" — <i>{html.escape(news.get('source', ''))}</i>"
+    )
+    alternates = news.get('alternates') or []
+    if alternates:
+        block += f" (+{len(alternates)} kaynak)"
+    if summary:
+        block += f"\n{html.escape(summary)}"
+    return block
+
+
+def pack_blocks(header: str, blocks: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[Tuple[str, List[int]]]:
+    """Blokları sınırı aşmadan en az mesaja paketle; (metin, blok indeksleri) listesi döndür"""
+    messages = []
+    current, indexes = header, []
+    for i, block in enumerate(blocks):
+        candidate = f"{current}\n\n{block}"
+        if indexes and len(candidate) > limit:
+            messages.append((current, indexes))
+            current, indexes = f"{header}\n\n{block}", [i]
+        else:
+            current = candidate
+            indexes.append(i)
+    if indexes:
+        messages.append((current, indexes))
+    return messages
+
+
+class DigestBuffer:
+    def __init__(self, window: float = 600):
+        self.window = window
+        # (sohbet, topic, kategori) -> {'started': zaman, 'category': ..., 'items': [...]}
+        # Kategoriler aynı topic'e düşse bile (ör. topics.json'da null) ayrı özet olur
+        self.groups: Dict[GroupKey, Dict] = {}
+        # anahtar -> biriken kopya sayısı (aynı haber birden çok sohbetin özetinde olabilir)
+        self._keys: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, news_hash: str) -> bool:
+        return news_hash in self._keys
+
+    def add(self, chat_id: Union[int, str], topic_id: Optional[int], category: str, news: Dict):
+        key = (chat_id, topic_id, category)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {'started': time.monotonic(), 'category': category, 'items': []}
+        group['items'].append(news)
+        for news_key in news_keys(news):
+            self._keys[news_key] = self._keys.get(news_key, 0) + 1
+
+    def pop_due(self, force: bool = False) -> List[Tuple[GroupKey, Dict]]:
+        """Penceresi dolmuş grupları çıkar ve döndür"""
+        now = time.monotonic()
+        due = [key for key, group in self.groups.items() if force or now - group['started'] >= self.window]
+        result = []
+        for key in due:
+            group = self.groups.pop(key)
+            for news in group['items']:
+                for news_key in news_keys(news):
+                    count = self._keys.get(news_key, 0) - 1
+                    if count > 0:
+                        self._keys[news_key] = count
+                    else:
+                        self._keys.pop(news_key, None)
+            result.append((key, group))
+        return result
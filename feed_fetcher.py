@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Asenkron RSS feed indirici
+Feedleri sınırlı eşzamanlılıkla (global ve host başına) indirir,
+ayrıştırmayı (feedparser) event loop dışında bir thread'de ya da isteğe
+bağlı bir süreç havuzunda yapar. ETag / Last-Modified doğrulayıcıları ile
+koşullu GET gönderir; 304 yanıtında feed hiç ayrıştırılmaz. Yanıttaki yeni
+doğrulayıcılar sonuca konur ama hemen kullanılmaz: çağıran, feed ayrıştırılıp
+haberleri teslim edilince commit_validators ile kaydeder. Aksi halde teslim
+edilemeyen haberler bir sonraki yoklamada 304 arkasında kaybolurdu.
+
+Ayrıştırma sonucu feedparser nesnesi değil, parse_feed'in döndürdüğü küçük
+bir kayıttır: feed başlığı, zamanlama ipucu ve tarih filtresinden geçmiş
+haberler (başlık, link, guid, özet, yayın tarihi). Havuz kullanıldığında
+süreçler arasında sadece ham baytlar ve bu kayıt taşınır.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
+import feedparser
+import httpx
+
+from feed_scheduler import feed_hint_seconds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; RSSTelegramBot/1.0; +https://github.com/haliskoc/n8nalternativersstelegram-)"
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """forkserver (yoksa spawn) ile süreç havuzu. Bot süreci httpx, thread havuzu ve SQLite
+    bağlantısı taşıyor; çok thread'li bir süreci fork'lamak çocukları miras kalan kilitlerde
+    kilitleyebilir."""
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+
+def parse_feed(content: bytes, headers: Dict[str, str], max_age_hours: float = 24) -> Dict:
+    """Feedi ayrıştır; son max_age_hours saatin haberlerini (title, link, guid, summary, published)
+    demetleri olarak döndür. Süreç havuzunda çalışabilmesi için modül seviyesindedir."""
+    feed = feedparser.parse(content, response_headers=headers)
+    info = feed.feed
+    parsed = {
+        'title': info.get('title'),
+        'hint': feed_hint_seconds(info),
+        'error': None,
+        'total': len(feed.entries),
+        'stale': 0,
+        'newest': None,
+        'entries': [],
+    }
+    if feed.bozo:
+        # İstisna nesnesi her zaman pickle edilemez: sadece mesajı taşı
+        parsed['error'] = f"bozo: {feed.get('bozo_exception') or 'bozuk feed'}"
+        return parsed
+    now = datetime.now()
+    cutoff = now - timedelta(hours=max_age_hours)
+    entries = parsed['entries']
+    for entry in feed.entries:
+        try:
+            if hasattr(entry, 'published_parsed'):
+                published = datetime(*entry.published_parsed[:6])
+                if parsed['newest'] is None or published > parsed['newest']:
+                    parsed['newest'] = published
+            else:
+                published = now
+            if published < cutoff:
+                parsed['stale'] += 1
+                continue
+        except Exception:
+            published = now
+        entries.append((
+            entry.get('title', 'No Title'),
+            entry.get('link', ''),
+            entry.get('id'),
+            entry.get('summary', entry.get('description', '')),
+            published,
+        ))
+    return parsed
+
+
+class FeedFetcher:
+    def __init__(self, concurrency: int = 50, per_host: int = 4, timeout: float = 20.0,
+                 user_agent: str = DEFAULT_USER_AGENT, parse_workers: int = 0,
+                 parse_pool_min: int = 16384, max_age_hours: float = 24):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.max_age_hours = max_age_hours
+        # parse_workers > 0: parse_pool_min bayttan büyük feedler süreç havuzunda ayrıştırılır
+        self.parse_workers = max(0, parse_workers)
+        self.parse_pool_min = parse_pool_min
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # url -> {'etag': ..., 'last_modified': ...}
+        self.validators: Dict[str, Dict[str, Optional[str]]] = {}
+        self.dirty_validators = set()
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Paylaşılan HTTP istemcisini (bağlantı havuzu) oluştur"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.concurrency,
+                                    max_keepalive_connections=self.concurrency),
+                headers={"User-Agent": self.user_agent},
+            )
+        return self._client
+
+    async def aclose(self):
+        """HTTP istemcisini ve ayrıştırma havuzunu kapat"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False)
+            self._parse_pool = None
+
+    async def parse(self, content: bytes, headers: Dict[str, str]) -> Dict:
+        """Küçük feedler thread'de, büyükler (havuz açıksa) ayrı süreçte ayrıştırılır"""
+        if self.parse_workers and len(content) >= self.parse_pool_min:
+            if self._parse_pool is None:
+                self._parse_pool = process_pool(self.parse_workers)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._parse_pool, parse_feed, content, headers, self.max_age_hours
+                )
+            except BrokenProcessPool:
+                # Havuz süreci öldü: havuz sonraki feedde yeniden kurulur, bu feed thread'de ayrıştırılır
+                logger.error("Ayrıştırma havuzu çöktü, yeniden kurulacak")
+                self._parse_pool.shutdown(wait=False)
+                self._parse_pool = None
+        return await asyncio.to_thread(parse_feed, content, headers, self.max_age_hours)
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc.lower()
+        sem = self._host_limits.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._host_limits[host] = sem
+        return sem
+
+    async def iter_results(self, urls: List[str]) -> AsyncIterator[Dict]:
+        """Feedleri eşzamanlı indir; her sonucu tamamlandığı anda üret"""
+        client = self._get_client()
+        global_sem = asyncio.Semaphore(self.concurrency)
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+        async def run(url: str) -> Dict:
+            # Önce host sınırı: aynı hosta sıra bekleyen görevler global slotları tutup
+            # diğer hostları aç bırakmasın
+            async with self._host_semaphore(url):
+                async with global_sem:
+                    return await self.fetch_one(client, url)
+
+        tasks = [asyncio.ensure_future(run(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Tüketici erken bırakırsa kalan indirmeleri iptal et
+            for task in tasks:
+                task.cancel()
+
+    async def fetch_one(self, client: httpx.AsyncClient, url: str) -> Dict:
+        """Tek bir feedi indir ve ayrıştır; hata durumunda 'error' alanı dolu döner"""
+        result = {'url': url, 'status': None, 'feed': None, 'error': None, 'not_modified': False,
+                  'validators': None, 'bytes': 0, 'elapsed': 0.0, 'parse_elapsed': 0.0}
+        started = time.monotonic()
+        try:
+            response = await asyncio.wait_for(
+                client.get(url, headers=self._conditional_headers(url)), timeout=self.timeout
+            )
+            result['status'] = response.status_code
+            if response.status_code == 304:
+                # Değişiklik yok: ayrıştırmaya gerek yok
+                result['not_modified'] = True
+                self.stats['hits'] += 1
+                result['elapsed'] = time.monotonic() - started
+                return result
+            response.raise_for_status()
+            self.stats['misses'] += 1
+            result['validators'] = {
+                'etag': response.headers.get('etag'),
+                'last_modified': response.headers.get('last-modified'),
+            }
+            content = response.content
+            result['bytes'] = len(content)
+            headers = {
+                'content-location': str(response.url),
+                'content-type': response.headers.get('content-type', ''),
+            }
+            # feedparser CPU-yoğun, event loop'u bloklamasın
+            parse_started = time.monotonic()
+            result['feed'] = await self.parse(content, headers)
+            result['parse_elapsed'] = time.monotonic() - parse_started
+        except asyncio.TimeoutError:
+            result['error'] = f"zaman aşımı ({self.timeout:.0f} sn)"
+        except Exception as e:
+            result['error'] = str(e) or e.__class__.__name__
+        if result['error']:
+            self.stats['errors'] += 1
+        result['elapsed'] = time.monotonic() - started
+        return result
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """Kayıtlı doğrulayıcılardan If-None-Match / If-Modified-Since başlıklarını üret"""
+        headers = {}
+        cached = self.validators.get(url)
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def commit_validators(self, url: str, entry: Dict[str, Optional[str]]):
+        """Yanıttan alınan ETag / Last-Modified değerlerini sonraki isteklerde kullanılmak üzere sakla"""
+        if not entry['etag'] and not entry['last_modified']:
+            if self.validators.pop(url, None) is not None:
+                self.dirty_validators.add(url)
+            return
+        if self.validators.get(url) != entry:
+            self.validators[url] = entry
+            self.dirty_validators.add(url)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Feed sağlık takibi (circuit breaker)
+Her feed için art arda hata sayısı, son başarı zamanı ve ortalama gecikme
+tutulur. failure_threshold kadar art arda hatadan sonra devre açılır: feed
+üstel artan bir süre (base_backoff * 2^n, en fazla max_backoff) boyunca hiç
+yoklanmaz, süre dolunca tek bir deneme yapılır. disable_after kadar art arda
+hatadan sonra feed otomatik olarak devre dışı kalır ve elle etkinleştirilene
+kadar bağlantı ya da zaman aşımı harcamaz.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+# Ortalama gecikme için üstel hareketli ortalama katsayısı
+LATENCY_ALPHA = 0.3
+
+
+def _new_state() -> Dict:
+    return {
+        'consecutive_failures': 0,
+        'total_failures': 0,
+        'total_successes': 0,
+        'last_success': None,
+        'last_failure': None,
+        'last_error': None,
+        'avg_latency': None,
+        'retry_at': 0.0,
+        'disabled': False,
+    }
+
+
+class FeedHealth:
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 600,
+                 max_backoff: float = 86400, disable_after: int = 12):
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.disable_after = disable_after
+        self.state: Dict[str, Dict] = {}
+        self.dirty = set()
+
+    def load(self, rows: Dict[str, Dict]):
+        """Kayıtlı durumları yükle"""
+        for url, saved in rows.items():
+            st = _new_state()
+            st.update(saved)
+            self.state[url] = st
+
+    def get(self, url: str) -> Dict:
+        st = self.state.get(url)
+        if st is None:
+            st = self.state[url] = _new_state()
+        return st
+
+    def is_available(self, url: str, now: Optional[float] = None) -> bool:
+        """Feed bu döngüde yoklanabilir mi (devre kapalı ya da deneme zamanı gelmiş)"""
+        st = self.state.get(url)
+        if st is None:
+            return True
+        if st['disabled']:
+            return False
+        return st['retry_at'] <= (time.time() if now is None else now)
+
+    def filter_available(self, urls: List[str], now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        return [url for url in urls if self.is_available(url, now)]
+
+    def _observe_latency(self, st: Dict, latency: Optional[float]):
+        if latency is None:
+            return
+        if st['avg_latency'] is None:
+            st['avg_latency'] = latency
+        else:
+            st['avg_latency'] += LATENCY_ALPHA * (latency - st['avg_latency'])
+
+    def record_success(self, url: str, latency: Optional[float] = None, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        st = self.get(url)
+        st['consecutive_failures'] = 0
+        st['total_successes'] += 1
+        st['last_success'] = now
+        st['last_error'] = None
+        st['retry_at'] = 0.0
+        self._observe_latency(st, latency)
+        self.dirty.add(url)
+
+    def record_failure(self, url: str, error: str, latency: Optional[float] = None,
+                       now: Optional[float] = None) -> Dict:
+        """Hatayı işle; devre açıldıysa bir sonraki deneme zamanını belirle"""
+        now = time.time() if now is None else now
+        st = self.get(url)
+        st['consecutive_failures'] += 1
+        st['total_failures'] += 1
+        st['last_failure'] = now
+        st['last_error'] = (error or '')[:300]
+        self._observe_latency(st, latency)
+        failures = st['consecutive_failures']
+        if self.disable_after and failures >= self.disable_after:
+            st['disabled'] = True
+        elif failures >= self.failure_threshold:
+            exponent = failures - self.failure_threshold
+            st['retry_at'] = now + min(self.max_backoff, self.base_backoff * 2 ** exponent)
+        self.dirty.add(url)
+        return st
+
+    def enable(self, url: str) -> bool:
+        """Feed'i elle yeniden etkinleştir ve devreyi kapat"""
+        st = self.state.get(url)
+        if st is None:
+            return False
+        st['disabled'] = False
+        st['consecutive_failures'] = 0
+        st['retry_at'] = 0.0
+        self.dirty.add(url)
+        return True
+
+    def unhealthy(self, now: Optional[float] = None) -> List[Dict]:
+        """Devre dışı ya da devresi açık feedler (önce devre dışı olanlar)"""
+        now = time.time() if now is None else now
+        rows = [
+            dict(st, url=url) for url, st in self.state.items()
+            if st['disabled'] or st['retry_at'] > now
+        ]
+        rows.sort(key=lambda row: (not row['disabled'], -row['consecutive_failures']))
+        return rows
+
+    def pop_dirty(self) -> Dict[str, Dict]:
+        changes = {url: self.state[url] for url in self.dirty if url in self.state}
+        self.dirty.clear()
+        return changes
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Uyarlanabilir feed zamanlayıcı
+Her feed için ayrı bir yoklama aralığı tutar: yayın sıklığını arşivden öğrenir,
+<ttl> / sy:updatePeriod ipuçlarına uyar, sessiz feedlerde geri çekilir,
+yoğun feedleri daha sık yoklar ve yoklamaları aralığa yayar.
+"""
+
+import random
+import time
+import zlib
+from datetime import datetime
+from statistics import median
+from typing import Dict, List, Optional
+
+# sy:updatePeriod değerlerinin saniye karşılıkları
+UPDATE_PERIODS = {
+    'hourly': 3600,
+    'daily': 86400,
+    'weekly': 7 * 86400,
+    'monthly': 30 * 86400,
+    'yearly': 365 * 86400,
+}
+
+
+def feed_hint_seconds(feed_info: Dict) -> Optional[float]:
+    """Feed başlığındaki <ttl> veya sy:updatePeriod ipucunu saniyeye çevir"""
+    hints = []
+    try:
+        ttl = feed_info.get('ttl')
+        if ttl:
+            hints.append(float(ttl) * 60)
+    except (TypeError, ValueError):
+        pass
+    period = str(feed_info.get('sy_updateperiod') or '').strip().lower()
+    if period in UPDATE_PERIODS:
+        try:
+            frequency = max(1, int(feed_info.get('sy_updatefrequency') or 1))
+        except (TypeError, ValueError):
+            frequency = 1
+        hints.append(UPDATE_PERIODS[period] / frequency)
+    return max(hints) if hints else None
+
+
+def learn_cadence(published_dates: List[datetime]) -> Optional[float]:
+    """Yayın tarihleri arasındaki medyan aralığı (saniye) hesapla"""
+    dates = sorted(d for d in published_dates if d)
+    if len(dates) < 3:
+        return None
+    gaps = [(b - a).total_seconds() for a, b in zip(dates, dates[1:])]
+    gaps = [g for g in gaps if g > 0]
+    if not gaps:
+        return None
+    return median(gaps)
+
+
+class FeedScheduler:
+    def __init__(self, base_interval: float = 300, min_interval: float = 120,
+                 max_interval: float = 21600, backoff: float = 1.5, speedup: float = 0.5):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.speedup = speedup
+        # url -> {'interval', 'next_due', 'cadence', 'hint', 'newest'}
+        self.state: Dict[str, Dict] = {}
+
+    def sync(self, urls: List[str], now: Optional[float] = None):
+        """Feed listesini eşitle; yeni feedleri taban aralığa yayarak ekle"""
+        now = time.time() if now is None else now
+        wanted = set(urls)
+        for url in list(self.state):
+            if url not in wanted:
+                del self.state[url]
+        for url in urls:
+            if url not in self.state:
+                # URL'ye bağlı sabit bir ofset: yoklamalar aynı anda yığılmasın
+                offset = (zlib.crc32(url.encode()) % 1000) / 1000 * self.base_interval
+                self.state[url] = {
+                    'interval': self.base_interval,
+                    'next_due': now + offset,
+                    'cadence': None,
+                    'hint': None,
+                    'newest': None,
+                }
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Zamanı gelmiş feedleri döndür"""
+        now = time.time() if now is None else now
+        return [url for url, st in self.state.items() if st['next_due'] <= now]
+
+    def set_cadence(self, url: str, cadence: Optional[float]):
+        if url in self.state:
+            self.state[url]['cadence'] = cadence
+
+    def record(self, url: str, newest: Optional[datetime] = None, hint: Optional[float] = None,
+               now: Optional[float] = None) -> int:
+        """Yoklama sonucunu işle ve bir sonraki zamanı hesapla; yeni haber var mı döndür"""
+        now = time.time() if now is None else now
+        st = self.state.get(url)
+        if st is None:
+            return 0
+        if hint:
+            st['hint'] = hint
+
+        first_seen = st['newest'] is None and newest is not None
+        has_new = newest is not None and (st['newest'] is None or newest > st['newest'])
+        if has_new:
+            st['newest'] = newest
+        if first_seen:
+            # İlk yoklama: karşılaştıracak bir şey yok, aralığı koru
+            interval = st['interval']
+        elif has_new:
+            interval = st['interval'] * self.speedup
+        else:
+            interval = st['interval'] * self.backoff
+
+        # Öğrenilen yayın sıklığının dörtte biri ile kendisi arasında tut
+        cadence = st['cadence']
+        if cadence:
+            interval = min(max(interval, cadence / 4), cadence)
+        # Feed'in kendi önbellek ipucundan daha sık yoklama
+        if st['hint']:
+            interval = max(interval, st['hint'])
+
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        st['interval'] = interval
+        st['next_due'] = now + interval * random.uniform(0.9, 1.1)
+        return int(has_new)
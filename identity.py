@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Haber kimliği
+Bir haberin kimliği başlığa değil, kalıcı tanımlayıcılara dayanır:
+önce feed girdisinin id/guid değeri, yoksa kanonik URL. URL'ler şema, host
+büyük/küçük harfi, izleme parametreleri, sondaki eğik çizgi ve AMP
+varyantlarından arındırılır; böylece başlığı düzenlenen ya da utm_*
+parametresi değişen haber "yeni" sayılmaz. Kanonik URL hash'i (url_hash) sadece
+guid'i olmayan girdilerin kimliğidir: bazı feedlerde her haber aynı sayfaya
+bağlanır, guid'i farklı haberler URL yüzünden tekrar sayılmamalı.
+"""
+
+import hashlib
+import re
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Kimliği değiştirmeyen izleme / oturum parametreleri
+# ('sid' ve 'ref' bazı CMS'lerde haber numarasıdır, atılmaz)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref_src', 'ref_url', 'cmpid', 'ocid', 'spm',
+    'sessionid', 'phpsessid', 'jsessionid', 'amp', 'outputtype',
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'mtm_', 'at_', 'hsa_')
+_SESSION_PATH_RE = re.compile(r';(jsessionid|phpsessid|sid)=[^/?#]*', re.IGNORECASE)
+_AMP_SUFFIX_RE = re.compile(r'(/amp/?|\.amp|/amp\.html)$', re.IGNORECASE)
+
+
+def canonical_url(url: str) -> str:
+    """URL'yi kimlik için normalize et"""
+    if not url:
+        return ''
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'amp.', 'm.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = _SESSION_PATH_RE.sub('', parts.path)
+    if path.startswith('/amp/'):
+        path = path[4:]
+    path = _AMP_SUFFIX_RE.sub('', path)
+    path = re.sub(r'/{2,}', '/', path).rstrip('/') or '/'
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    # http/https aynı haber sayılır; parça (#...) kimliğe dahil değil
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def _md5(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def url_hash(link: str) -> Optional[str]:
+    """Kanonik URL'nin hash'i (link yoksa None)"""
+    canonical = canonical_url(link)
+    return _md5(f"url:{canonical}") if canonical else None
+
+
+def news_identity(guid: Optional[str], link: str, feed_url: str = '', title: str = '') -> Tuple[str, Optional[str]]:
+    """(news_hash, url_hash) döndür.
+    news_hash: guid varsa ona, yoksa kanonik URL'ye, o da yoksa başlığa dayanır.
+    url_hash sadece guid'i olmayan girdilerde dolu (guid varsa None)."""
+    guid = (guid or '').strip()
+    if guid:
+        if guid.startswith(('http://', 'https://')):
+            return _md5(f"url:{canonical_url(guid)}"), None
+        # URL olmayan guid'ler (ör. "12345") sadece kendi feed'i içinde benzersizdir
+        host = (urlsplit(feed_url).hostname or '').lower() if feed_url else ''
+        return _md5(f"guid:{host}:{guid}"), None
+    link_hash = url_hash(link)
+    if link_hash:
+        return link_hash, link_hash
+    return _md5(f"title:{feed_url}:{title}"), None
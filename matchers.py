@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Derlenmiş anahtar kelime eşleştiriciler
+filters.json ve categories.json kuralları bir kez tek bir birleşik regex'e
+derlenir; eşleşmede hangi kuralın tuttuğu da raporlanır. Düz kelimeler
+Türkçe'ye duyarlı katlanmış metin üzerinde, regex kuralları ise orijinal
+metin üzerinde (IGNORECASE) aranır.
+
+Kural biçimleri:
+    "kelime"                                   -> düz alt dize
+    {"pattern": "kelime", "word": true}        -> kelime sınırlı
+    {"pattern": "yapay\\s+zek[aâ]", "regex": true} -> regex
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from text_utils import turkish_fold
+
+Rule = Union[str, Dict]
+
+# categories.json yoksa kullanılan varsayılan kurallar
+DEFAULT_CATEGORIES = {
+    "default": "General",
+    "classify_content": False,
+    "categories": {
+        "Technology": ["tech", "wired", "code", "web", "chip", "donanım"],
+        "Science": ["science", "nasa", "space", "bilim"],
+        "Economics": ["market", "economy", "finans", "borsa"],
+    },
+}
+
+
+def _word(pattern: str) -> str:
+    return rf'(?<!\w){pattern}(?!\w)'
+
+
+class KeywordMatcher:
+    def __init__(self, rules: List[Rule], word_boundaries: bool = False):
+        self.rules = list(rules or [])
+        self.labels: Dict[str, str] = {}
+        plain, regex = [], []
+        for i, rule in enumerate(self.rules):
+            if isinstance(rule, dict):
+                pattern = str(rule.get('pattern', ''))
+                is_regex = bool(rule.get('regex', False))
+                word = bool(rule.get('word', word_boundaries))
+            else:
+                pattern, is_regex, word = str(rule), False, word_boundaries
+            if not pattern:
+                continue
+            group = f'r{i}'
+            self.labels[group] = pattern
+            if is_regex:
+                body = pattern
+                target = regex
+            else:
+                body = re.escape(turkish_fold(pattern))
+                target = plain
+            target.append((len(pattern), f'(?P<{group}>{_word(body) if word else body})'))
+
+        # Uzun kurallar önce: "yapay zeka" varken "yapay" ile erken eşleşmesin
+        self._plain = self._compile(plain, 0)
+        self._regex = self._compile(regex, re.IGNORECASE)
+
+    @staticmethod
+    def _compile(parts: List[Tuple[int, str]], flags: int) -> Optional[re.Pattern]:
+        if not parts:
+            return None
+        parts.sort(key=lambda p: p[0], reverse=True)
+        return re.compile('|'.join(p[1] for p in parts), flags)
+
+    def __bool__(self) -> bool:
+        return bool(self.labels)
+
+    def search(self, text: str, folded: Optional[str] = None) -> Optional[str]:
+        """İlk eşleşen kuralı döndür (yoksa None)"""
+        if self._plain is not None:
+            match = self._plain.search(turkish_fold(text) if folded is None else folded)
+            if match:
+                return self.labels[match.lastgroup]
+        if self._regex is not None:
+            match = self._regex.search(text)
+            if match:
+                return self.labels[match.lastgroup]
+        return None
+
+    def iter_groups(self, text: str, folded: Optional[str] = None):
+        """Tüm (örtüşmeyen) eşleşmelerin grup adlarını ('r<kural sırası>') üret"""
+        if self._plain is not None:
+            for match in self._plain.finditer(turkish_fold(text) if folded is None else folded):
+                yield match.lastgroup
+        if self._regex is not None:
+            for match in self._regex.finditer(text):
+                yield match.lastgroup
+
+
+class FilterSet:
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or {}
+        word_boundaries = bool(config.get('word_boundaries', False))
+        self.blacklist = KeywordMatcher(config.get('blacklist', []), word_boundaries)
+        self.whitelist = KeywordMatcher(config.get('whitelist', []), word_boundaries)
+
+    def check(self, title: str, summary: str) -> Tuple[bool, Optional[str]]:
+        """(geçti mi, eşleşen kural) döndür"""
+        if not self.blacklist and not self.whitelist:
+            return True, None
+        text = title + " " + summary
+        folded = turkish_fold(text)
+
+        # Blacklist kontrolü (Varsa ve eşleşirse REDDET)
+        rule = self.blacklist.search(text, folded)
+        if rule is not None:
+            return False, f"blacklist: {rule}"
+
+        # Whitelist kontrolü (Varsa ve eşleşmezse REDDET)
+        if self.whitelist:
+            rule = self.whitelist.search(text, folded)
+            if rule is None:
+                return False, None
+            return True, f"whitelist: {rule}"
+        return True, None
+
+
+class CategoryClassifier:
+    def __init__(self, config: Optional[Dict] = None, cache_size: int = 4096):
+        config = DEFAULT_CATEGORIES if config is None else config
+        self.default = config.get('default', 'General')
+        self.classify_content = bool(config.get('classify_content', False))
+        categories = config.get('categories', {})
+        # Sıra önceliktir: bir kaynak birden çok kategoriye uyarsa ilk tanımlı olan kazanır
+        self.priority = {name: i for i, name in enumerate(categories)}
+        rules, rule_category = [], []
+        for name, keywords in categories.items():
+            for keyword in keywords or []:
+                rules.append(keyword)
+                rule_category.append(name)
+        self.matcher = KeywordMatcher(rules, bool(config.get('word_boundaries', False)))
+        # Regex grup adı -> kategori
+        self._group_category = {group: rule_category[int(group[1:])] for group in self.matcher.labels}
+        self.cache_size = cache_size
+        self._source_cache: Dict[str, str] = {}
+
+    def _hits(self, text: str) -> Dict[str, int]:
+        """Metindeki tüm eşleşmeleri kategori bazında say"""
+        hits: Dict[str, int] = {}
+        for group in self.matcher.iter_groups(text):
+            category = self._group_category[group]
+            hits[category] = hits.get(category, 0) + 1
+        return hits
+
+    def from_source(self, source: str) -> str:
+        """Kaynak adına göre kategori (kaynak başına önbellekli)"""
+        category = self._source_cache.get(source)
+        if category is None:
+            hits = self._hits(source)
+            category = min(hits, key=self.priority.get) if hits else self.default
+            if len(self._source_cache) >= self.cache_size:
+                self._source_cache.clear()
+            self._source_cache[source] = category
+        return category
+
+    def classify(self, source: str, title: str = '', summary: str = '') -> str:
+        """Önce kaynağa bak; kaynak belirsizse ve açıksa başlık/özet kelimelerini say"""
+        category = self.from_source(source)
+        if category != self.default or not self.classify_content:
+            return category
+        hits = self._hits(f"{title} {summary}")
+        if not hits:
+            return category
+        return max(hits, key=lambda c: (hits[c], -self.priority[c]))
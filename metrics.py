@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Süreç içi metrikler
+Sayaçlar, göstergeler ve süre özetleri (count/sum/max) bellekte tutulur.
+stage() bağlam yöneticisi bir aşamanın süresini ölçer. Devre dışı
+bırakıldığında tüm çağrılar hiçbir şey yapmaz (tek bir bool kontrolü).
+İsteğe bağlı olarak Prometheus metin formatında bir HTTP uç noktası sunulur.
+"""
+
+import http.server
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+
+_NULL_STAGE = nullcontext()
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled: bool = True, prefix: str = 'rssbot'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[SeriesKey, float] = {}
+        self._gauges: Dict[SeriesKey, float] = {}
+        # (count, sum, max)
+        self._timers: Dict[SeriesKey, list] = {}
+        self._server: Optional[http.server.ThreadingHTTPServer] = None
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def stage(self, name: str):
+        """Aşama süresini stage_seconds{stage=name} altında ölç"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - started, stage=name)
+
+    def snapshot(self) -> Dict:
+        """/stats için kopya: {'counters': ..., 'gauges': ..., 'timers': ...}"""
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timers': {key: tuple(value) for key, value in self._timers.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        """Prometheus metin formatı (0.0.4)"""
+        data = self.snapshot()
+        lines = []
+        typed = set()
+
+        def header(name: str, kind: str):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(data['counters'].items()):
+            metric = f"{self.prefix}_{name}"
+            header(metric, 'counter')
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+        for (name, labels), value in sorted(data['gauges'].items()):
+            metric = f"{self.prefix}_{name}"
+            header(metric, 'gauge')
+            lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+        timers = sorted(data['timers'].items())
+        for (name, labels), (count, total, _) in timers:
+            metric = f"{self.prefix}_{name}"
+            header(metric, 'summary')
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+        # En büyük değerler ayrı gauge aileleri: bir ailenin satırları kesintisiz gelmeli
+        for (name, labels), (_, _, peak) in timers:
+            metric = f"{self.prefix}_{name}_max"
+            header(metric, 'gauge')
+            lines.append(f"{metric}{_format_labels(labels)} {peak:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int, host: str = '127.0.0.1'):
+        """/metrics uç noktasını arka plan thread'inde başlat"""
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        logger.info(f"Metrik uç noktası: http://{host}:{port}/metrics")
+
+    def stop_http_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
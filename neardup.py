@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Yakın-kopya haber tespiti (SimHash)
+Başlık ve özetin katlanmış kelimelerinden 64 bitlik SimHash üretilir.
+Parmak izleri 8 adet 8 bitlik banda bölünerek indekslenir: Hamming uzaklığı
+bant sayısından küçük olan iki parmak izi güvercin yuvası ilkesiyle en az bir
+bantta aynıdır, böylece sadece aynı bandı paylaşan adaylar karşılaştırılır.
+İndeks kayan bir zaman penceresi boyunca bellekte tutulur.
+"""
+
+import hashlib
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from text_utils import strip_tags, turkish_fold
+
+_TOKEN_RE = re.compile(r'\w+')
+MASK64 = (1 << 64) - 1
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'big')
+
+
+def simhash(title: str, summary: str = '', summary_chars: int = 300) -> int:
+    """Başlık (çift ağırlık) ve özetin başından 64 bitlik SimHash"""
+    weights: Dict[str, int] = {}
+    for token in _TOKEN_RE.findall(turkish_fold(title)):
+        weights[token] = weights.get(token, 0) + 2
+    for token in _TOKEN_RE.findall(turkish_fold(strip_tags(summary)[:summary_chars])):
+        weights[token] = weights.get(token, 0) + 1
+    vector = [0] * 64
+    for token, weight in weights.items():
+        h = _token_hash(token)
+        for bit in range(64):
+            vector[bit] += weight if h >> bit & 1 else -weight
+    value = 0
+    for bit in range(64):
+        if vector[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+def to_signed(value: int) -> int:
+    """SQLite INTEGER (işaretli 64 bit) için dönüştür"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & MASK64
+
+
+class NearDupIndex:
+    def __init__(self, window_hours: float = 48, max_distance: int = 4, bands: int = 8):
+        self.window = window_hours * 3600
+        # Bant sayısı eşikten büyük olmalı, aksi halde bazı yakın kopyalar kaçar
+        self.max_distance = min(max_distance, bands - 1)
+        self.bands = bands
+        self.band_bits = 64 // bands
+        self._band_mask = (1 << self.band_bits) - 1
+        self._tables: List[Dict[int, List[Dict]]] = [{} for _ in range(bands)]
+        self._entries: deque = deque()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_values(self, value: int):
+        for i in range(self.bands):
+            yield i, (value >> (i * self.band_bits)) & self._band_mask
+
+    def add(self, value: int, info: Dict, added_at: Optional[float] = None):
+        """Parmak izini ve ilgili haber bilgisini indekse ekle"""
+        entry = {'simhash': value, 'added_at': time.time() if added_at is None else added_at, 'info': info}
+        self._entries.append(entry)
+        for i, band in self._band_values(value):
+            self._tables[i].setdefault(band, []).append(entry)
+
+    def find(self, value: int) -> Optional[Dict]:
+        """Eşik içindeki en yakın kaydın bilgisini döndür"""
+        self.expire()
+        best: Optional[Tuple[int, Dict]] = None
+        for i, band in self._band_values(value):
+            for entry in self._tables[i].get(band, ()):
+                distance = bin(entry['simhash'] ^ value).count('1')
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry['info'])
+        return best[1] if best else None
+
+    def expire(self, now: Optional[float] = None):
+        """Pencere dışına çıkan kayıtları at"""
+        cutoff = (time.time() if now is None else now) - self.window
+        while self._entries and self._entries[0]['added_at'] < cutoff:
+            entry = self._entries.popleft()
+            for i, band in self._band_values(entry['simhash']):
+                bucket = self._tables[i].get(band)
+                if bucket is not None:
+                    bucket.remove(entry)
+                    if not bucket:
+                        del self._tables[i][band]
@@ -5,6 +5,8 @@ import sys
 import xml.etree.ElementTree as ET
 from datetime import datetime
 
+from config_store import atomic_write_json, config_lock
+
 FEEDS_FILE = 'feeds.json'
 
 def load_feeds():
@@ -19,8 +21,8 @@ def load_feeds():
 
 def save_feeds(feeds):
     try:
-        with open(FEEDS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(feeds, f, indent=4, ensure_ascii=False)
+        # Temp file + rename: the bot never reads a half-written file
+        atomic_write_json(FEEDS_FILE, feeds)
         return True
     except Exception as e:
         print(f"Error saving feeds.json: {e}")
@@ -47,24 +49,26 @@ def import_opml(file_path):
             print("No RSS feeds found in OPML file.")
             return
 
-        current_feeds = load_feeds()
-        initial_count = len(current_feeds)
-        
-        # Add only unique feeds
-        added_count = 0
-        for feed in new_feeds:
-            if feed not in current_feeds:
-                current_feeds.append(feed)
-                added_count += 1
-        
-        if added_count > 0:
-            if save_feeds(current_feeds):
-                print(f"Successfully imported {added_count} new feeds.")
-                print(f"Total feeds: {len(current_feeds)}")
+        # Read-modify-write under the lock so a concurrent /abone is not lost
+        with config_lock(FEEDS_FILE):
+            current_feeds = load_feeds()
+            initial_count = len(current_feeds)
+            
+            # Add only unique feeds
+            added_count = 0
+            for feed in new_feeds:
+                if feed not in current_feeds:
+                    current_feeds.append(feed)
+                    added_count += 1
+            
+            if added_count > 0:
+                if save_feeds(current_feeds):
+                    print(f"Successfully imported {added_count} new feeds.")
+                    print(f"Total feeds: {len(current_feeds)}")
+                else:
+                    print("Failed to save feeds.")
             else:
-                print("Failed to save feeds.")
-        else:
-            print("No new feeds to import (all already exist).")
+                print("No new feeds to import (all already exist).")
             
     except ET.ParseError:
         print("Error: Invalid OPML/XML file format.")
@@ -4,24 +4,36 @@ WIRED RSS Feed Telegram Bot
 Oracle Cloud Free Tier için optimize edilmiş RSS haber botu
 """
 
-import feedparser
-import sqlite3
+import asyncio
 import logging
 import os
-import json
-import asyncio
-import hashlib
+import signal
+import sys
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
-import re
-import openpyxl
+from typing import AsyncIterator, Iterable, Iterator, List, Dict, Optional, Tuple
+import html
 from openpyxl import Workbook
-from openai import OpenAI
+from feed_fetcher import FeedFetcher, process_pool
+from feed_scheduler import FeedScheduler, learn_cadence
+from storage import NewsStorage, fts_match
+from cold_archive import ColdArchive
+from matchers import CategoryClassifier, FilterSet
+from ai_analyzer import NewsAnalyzer
+from telegram_sender import SendQueue
+from digest import DigestBuffer, format_digest_item, news_keys, pack_blocks
+from neardup import NearDupIndex, simhash, to_signed, to_unsigned
+from identity import news_identity, url_hash as canonical_url_hash
+from metrics import Metrics
+from feed_health import FeedHealth
+from text_utils import html_to_text_many
+from config_store import ConfigStore, update_json
+from subscribers import SubscriberRegistry
+from sharding import COORDINATOR_LEASE, INGEST_MAX_AGE, ShardMember, pack_ingest, unpack_ingest
 
 # Telegram Library
 from telegram import Update, constants
-from telegram.ext import Application, CommandHandler, ContextTypes, JobQueue
+from telegram.ext import Application, CommandHandler, ContextTypes
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -33,24 +45,143 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# httpx her isteği INFO seviyesinde logluyor, log dosyasını şişirmesin
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+def parse_feed_list(data) -> List[str]:
+    """feeds.json: URL listesi"""
+    if not isinstance(data, list):
+        raise ValueError("feeds.json bir URL listesi olmalı")
+    return [url for url in data if isinstance(url, str) and url]
+
+
+def parse_topics(data) -> Dict:
+    """topics.json: kategori -> topic id"""
+    if not isinstance(data, dict):
+        raise ValueError("topics.json bir nesne olmalı")
+    return data
+
+
+BOT_ROLES = ('all', 'worker', 'coordinator')
+
 
 class RSSNewsBot:
     def __init__(self):
+        # all: tek süreç; worker: sadece kendi feed payını çekip kuyruğa yazar;
+        # coordinator: kuyruğu tüketir, analiz eder ve Telegram'a gönderir
+        self.role = os.getenv('BOT_ROLE', 'all').lower()
+        if self.role not in BOT_ROLES:
+            raise ValueError(f"Geçersiz BOT_ROLE: {self.role} ({', '.join(BOT_ROLES)})")
+        self.shard = None
+        self.coordinator_active = None
+        # Koordinatör: sahiplenilen kuyruk kayıtları (news_hash -> haber), sonuçlanınca silinir
+        self.claimed: Dict[str, Dict] = {}
         self.db_path = "news_bot.db"
+        self.storage = None
         self.daily_news_path = "daily_news.xlsx"
+        self.daily_news_day = None
+        self.daily_news_dirty = False
+        self.daily_news_exported_at = None
+        self.daily_news_flush_interval = float(os.getenv('EXCEL_FLUSH_INTERVAL', '600'))
         self.rss_urls = []
         self.filters = {"whitelist": [], "blacklist": []}
+        self.filter_set = FilterSet(self.filters)
+        self.classifier = CategoryClassifier()
         self.topics = {}
         
+        # Sohbetler: CHAT_ID varsayılan abonedir, diğerleri subscribers tablosundan gelir
+        self.default_chat_id = os.getenv('CHAT_ID')
+        # Yönetim komutlarını kullanabilecek sohbetler: CHAT_ID ve ALLOWED_CHATS ("*": hepsi)
+        self.allowed_chats = {c.strip() for c in os.getenv('ALLOWED_CHATS', '').split(',') if c.strip()}
+        self.subscribers = SubscriberRegistry()
+        
+        # Yapılandırma dosyaları sadece değiştiklerinde okunur ve derlenir
+        self.config = ConfigStore()
+        self.config.watch('feeds.json', self.apply_feeds, build=parse_feed_list)
+        self.config.watch('filters.json', self.apply_filters, build=lambda data: (data, FilterSet(data)))
+        self.config.watch('categories.json', self.apply_categories, build=CategoryClassifier)
+        self.config.watch('topics.json', self.apply_topics, build=parse_topics)
+        
+        # Feed indirici (eşzamanlı, host başına sınırlı)
+        self.fetcher = FeedFetcher(
+            concurrency=int(os.getenv('FETCH_CONCURRENCY', '50')),
+            per_host=int(os.getenv('FETCH_PER_HOST', '4')),
+            timeout=float(os.getenv('FETCH_TIMEOUT', '20')),
+            # feedparser + tarih filtresi ayrı süreçlerde (0: event loop yanındaki thread'de)
+            parse_workers=int(os.getenv('PARSE_WORKERS', '0')),
+            parse_pool_min=int(os.getenv('PARSE_POOL_MIN_BYTES', '16384')),
+        )
+        
+        # Yeni ETag / Last-Modified: feedin bu çekimde yönlendirilen haberleri teslim edilene kadar
+        # kullanılmaz (url -> (doğrulayıcılar, haberler)); teslim edilmeyen haber 304 ile kaybolmasın
+        self.pending_validators: Dict[str, Tuple[Dict, List[Dict]]] = {}
+        
+        # Feed başına uyarlanabilir yoklama zamanlayıcısı
+        self.scheduler = FeedScheduler(
+            base_interval=float(os.getenv('POLL_BASE_INTERVAL', '300')),
+            min_interval=float(os.getenv('POLL_MIN_INTERVAL', '120')),
+            max_interval=float(os.getenv('POLL_MAX_INTERVAL', '21600')),
+        )
+        self.cadence_refreshed_at = None
+        
+        # Feed sağlığı: sürekli hata veren feedler geri çekilir, sonunda devre dışı kalır
+        self.health = FeedHealth(
+            failure_threshold=int(os.getenv('FEED_FAILURE_THRESHOLD', '3')),
+            base_backoff=float(os.getenv('FEED_BACKOFF_BASE', '600')),
+            max_backoff=float(os.getenv('FEED_BACKOFF_MAX', '86400')),
+            disable_after=int(os.getenv('FEED_DISABLE_AFTER', '12')),
+        )
+        
+        # Farklı kaynaklardaki aynı haberi yakalamak için SimHash indeksi
+        self.neardup = None
+        if os.getenv('NEARDUP', '1').lower() not in ('0', 'false', 'no'):
+            self.neardup = NearDupIndex(
+                window_hours=float(os.getenv('NEARDUP_WINDOW_HOURS', '48')),
+                max_distance=int(os.getenv('NEARDUP_DISTANCE', '4')),
+            )
+        
+        # HTML -> düz metin: haber başına bir kez, ingest sırasında. Filtre, FTS ve arşiv tam metni
+        # kullanır; kısaltma sadece mesaj biçimlendirmesinde yapılır (0 = sınırsız)
+        self.clean_text_chars = int(os.getenv('CLEAN_TEXT_CHARS', '0')) or None
+        self.clean_pool_min = int(os.getenv('CLEAN_POOL_MIN', '200'))
+        clean_workers = int(os.getenv('CLEAN_WORKERS', '0'))
+        self.clean_pool = process_pool(clean_workers) if clean_workers > 0 else None
+        
+        # Aşama süreleri ve sayaçlar (/stats ve isteğe bağlı Prometheus uç noktası)
+        self.metrics = Metrics(enabled=os.getenv('METRICS', '1').lower() in ('1', 'true', 'yes'))
+        
+        # Saklama: süresi dolan satırlar her tikte küçük partiler halinde silinir (0 = sınırsız)
+        self.sent_retention_days = float(os.getenv('SENT_RETENTION_DAYS', '90'))
+        self.archive_retention_days = float(os.getenv('ARCHIVE_RETENTION_DAYS', '365'))
+        self.prune_batch_size = int(os.getenv('PRUNE_BATCH_SIZE', '500'))
+        self.prune_max_batches = int(os.getenv('PRUNE_MAX_BATCHES', '4'))
+        self.prune_interval = float(os.getenv('PRUNE_INTERVAL', '3600'))
+        self.prune_next = 0.0
+        cold_dir = os.getenv('ARCHIVE_COLD_DIR')
+        self.cold_archive = ColdArchive(cold_dir) if cold_dir else None
+        
+        # Telegram gönderim kuyruğu (ilk kullanımda bot nesnesiyle kurulur)
+        self.sender = None
+        
+        # Özet modu: haberler topic bazında biriktirilip tek mesajda gönderilir
+        self.digest = None
+        if os.getenv('DIGEST_MODE', '0').lower() in ('1', 'true', 'yes'):
+            self.digest = DigestBuffer(window=float(os.getenv('DIGEST_WINDOW', '600')))
+        
         # AI Setup
         self.openrouter_api_key = os.getenv('OPENROUTER_API_KEY')
         self.openrouter_model = os.getenv('OPENROUTER_MODEL', "google/gemini-2.0-flash-lite-preview-02-05:free")
-        self.ai_client = None
+        self.analyzer = None
         if self.openrouter_api_key:
             try:
-                self.ai_client = OpenAI(
-                    base_url="https://openrouter.ai/api/v1",
+                self.analyzer = NewsAnalyzer(
                     api_key=self.openrouter_api_key,
+                    model=self.openrouter_model,
+                    base_url=os.getenv('OPENROUTER_BASE_URL', "https://openrouter.ai/api/v1"),
+                    concurrency=int(os.getenv('AI_CONCURRENCY', '4')),
+                    timeout=float(os.getenv('AI_TIMEOUT', '60')),
+                    retries=int(os.getenv('AI_RETRIES', '3')),
+                    persistent_lookup=lambda hashes: self.storage.get_analyses(hashes),
                 )
                 logger.info(f"AI Client başlatıldı. Model: {self.openrouter_model}")
             except Exception as e:
@@ -58,106 +189,360 @@ class RSSNewsBot:
 
         self.load_config()
         self.init_database()
-        self.init_daily_news_storage()
+        self.init_shard()
+        self.load_subscribers()
+        self.load_feed_cache()
+        self.load_feed_health()
+        if self.role != 'worker':
+            # Yakın-kopya birleştirme ve Excel koordinatörde (ya da tek süreçte) yapılır
+            self.load_neardup_index()
+            self.init_daily_news_storage()
 
-    def load_config(self):
-        """Konfigürasyon dosyalarını yükle"""
-        # Feeds
-        if os.path.exists('feeds.json'):
-            try:
-                with open('feeds.json', 'r', encoding='utf-8') as f:
-                    self.rss_urls = json.load(f)
-            except Exception as e:
-                logger.error(f"feeds.json okuma hatası: {e}")
-        
-        # Filters
-        if os.path.exists('filters.json'):
-            try:
-                with open('filters.json', 'r', encoding='utf-8') as f:
-                    self.filters = json.load(f)
-            except Exception as e:
-                logger.error(f"filters.json okuma hatası: {e}")
+    def load_config(self) -> List[str]:
+        """Değişen konfigürasyon dosyalarını yeniden yükle (değişmeyenler için sadece stat)"""
+        changed = self.config.refresh()
+        if changed:
+            logger.info(f"Yapılandırma yüklendi: {', '.join(changed)}")
+        return changed
 
-        # Topics
-        if os.path.exists('topics.json'):
-            try:
-                with open('topics.json', 'r', encoding='utf-8') as f:
-                    self.topics = json.load(f)
-            except Exception as e:
-                logger.error(f"topics.json okuma hatası: {e}")
+    def apply_feeds(self, urls: List[str]):
+        self.rss_urls = urls
+        self.subscribers.set_default_feeds(urls)
+
+    def apply_filters(self, compiled: Tuple[Dict, FilterSet]):
+        self.filters, self.filter_set = compiled
+        self.subscribers.default_filter_set = self.filter_set
+
+    def apply_categories(self, classifier: CategoryClassifier):
+        self.classifier = classifier
+
+    def apply_topics(self, topics: Dict):
+        self.topics = topics
         
     def init_database(self):
-        """SQLite veritabanını başlat ve tabloları oluştur"""
+        """SQLite depolama katmanını başlat (kalıcı bağlantı, WAL)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Gönderilen haberlerin takibi için (Deduplication)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sent_news (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    news_hash TEXT UNIQUE NOT NULL,
-                    title TEXT NOT NULL,
-                    link TEXT NOT NULL,
-                    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tüm haberlerin detaylı arşivi için (Full History)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS news_archive (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    news_hash TEXT UNIQUE NOT NULL,
-                    source TEXT,
-                    category TEXT,
-                    title TEXT,
-                    summary TEXT,
-                    link TEXT,
-                    published_date TIMESTAMP,
-                    analysis TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            self.storage = NewsStorage(
+                self.db_path,
+                dedup_max_entries=int(os.getenv('DEDUP_MAX_ENTRIES', '100000')),
+            )
             logger.info("Veritabanı başarıyla başlatıldı (sent_news ve news_archive tabloları)")
         except Exception as e:
             logger.error(f"Veritabanı başlatma hatası: {e}")
     
+    def init_shard(self):
+        """Worker / koordinatör modunda ortak veritabanındaki kiralara katıl"""
+        if self.role == 'all' or self.storage is None:
+            return
+        self.shard = ShardMember(
+            self.storage,
+            worker_id=os.getenv('WORKER_ID') or None,
+            lease_ttl=float(os.getenv('LEASE_TTL', '90')),
+        )
+        if self.role == 'worker':
+            # sent_news'e koordinatör yazar: bellek içi indeks eksik sayılır, ıskalamalar SQLite'a sorulur
+            self.storage.sent_index.complete = False
+        else:
+            # Aynı WORKER_ID ile yeniden başlatma: önceki çalışmanın sahiplendikleri tekrar alınabilir
+            try:
+                self.storage.release_ingest(self.shard.worker_id)
+            except Exception as e:
+                logger.error(f"Kuyruk sahiplikleri bırakılamadı: {e}")
+        logger.info(f"Rol: {self.role}, kimlik: {self.shard.worker_id}")
+
+    def convert_auto_vacuum(self, force: bool = False) -> bool:
+        """Eski veritabanını auto_vacuum=INCREMENTAL'a dönüştür. Tam VACUUM olduğundan olay döngüsü
+        başlamadan çağrılır; sadece tek süreç ya da kirayı tutan koordinatör yapar (force: --vacuum)"""
+        if self.storage is None:
+            return False
+        if not force:
+            if self.role == 'worker':
+                return False
+            if self.role == 'coordinator' and not self.hold_coordinator():
+                logger.info("auto_vacuum dönüşümü kirayı tutan koordinatöre bırakıldı")
+                return False
+        return self.storage.ensure_incremental_vacuum()
+
+    def hold_coordinator(self) -> bool:
+        """Koordinatör kirasını al/uzat; aynı anda tek koordinatör kuyruğu tüketir"""
+        try:
+            active = self.shard.hold(COORDINATOR_LEASE)
+        except Exception as e:
+            logger.error(f"Koordinatör kirası hatası: {e}")
+            active = False
+        if active != self.coordinator_active:
+            if active:
+                logger.info("Koordinatör kirası alındı: kuyruk bu süreçte tüketilecek")
+                if self.coordinator_active is False:
+                    # Beklerken sent_news / chat_sent'e önceki koordinatör yazdı
+                    self.reload_sent_indexes()
+            else:
+                logger.warning("Koordinatör kirası başka bir süreçte: beklemede")
+            self.coordinator_active = active
+        return active
+
+    def still_coordinator(self) -> bool:
+        """Aşamalar arasında koordinatör kirasını uzat; diğer rollerde her zaman True"""
+        return self.role != 'coordinator' or self.hold_coordinator()
+
+    def reload_sent_indexes(self):
+        try:
+            self.storage.load_sent_index()
+            self.storage.load_chat_sent_index()
+        except Exception as e:
+            logger.error(f"Tekilleştirme indeksi yenilenemedi: {e}")
+
+    async def resign_coordinator(self):
+        """Kira kaybedildi: gönderimi durdur, özetleri bırak. Sahiplenilen kayıtlar
+        silinmediği için kirayı alan koordinatör onları yeniden işler."""
+        if self.sender is not None:
+            await self.sender.stop()
+            self.sender = None
+        if self.digest is not None:
+            self.digest = DigestBuffer(window=self.digest.window)
+        self.claimed.clear()
+
+    def settle_ingest(self):
+        """Koordinatör: sonuçlanan kuyruk kayıtlarını sil, teslim edilemeyenleri tekrar denemeye bırak"""
+        done, retry = [], []
+        for news_hash, news in list(self.claimed.items()):
+            if self.is_news_pending(news_hash):
+                continue
+            if news.get('settled') or self.is_news_sent(news_hash):
+                done.append(news_hash)
+            else:
+                retry.append(news_hash)
+            del self.claimed[news_hash]
+        try:
+            self.storage.ack_ingest(done)
+            self.storage.release_ingest(self.shard.worker_id, retry)
+            expired = self.storage.expire_ingest(time.time() - INGEST_MAX_AGE)
+        except Exception as e:
+            logger.error(f"Kuyruk kayıtları güncellenemedi: {e}")
+            return
+        if retry or expired:
+            logger.info(f"Kuyruk: {len(retry)} haber tekrar denenecek, {expired} eski kayıt atıldı")
+
+    def load_subscribers(self):
+        """Aboneleri (sohbet bazında feed / filtre / topic ayarları) yükle"""
+        try:
+            self.subscribers.load(self.storage.load_subscribers(), default_chat=self.default_chat_id)
+            logger.info(f"{len(self.subscribers)} sohbet abone, {len(self.subscribers.feeds())} feed izleniyor")
+        except Exception as e:
+            logger.error(f"Abone yükleme hatası: {e}")
+
+    def update_subscriber(self, chat_id, **changes):
+        """Sohbetin ayarlarını değiştir (feeds / filters / topics; None = varsayılan) ve yeniden yükle"""
+        chat_id = str(chat_id)
+        current = self.subscribers.get(chat_id)
+        settings = {'feeds': None, 'filters': None, 'topics': None}
+        if current is not None:
+            settings.update(feeds=current.feeds, filters=current.filters, topics=current.topics)
+        settings.update(changes)
+        self.storage.save_subscriber(chat_id, **settings)
+        self.load_subscribers()
+        return self.subscribers.get(chat_id)
+
+    def remove_subscriber(self, chat_id) -> bool:
+        removed = self.storage.delete_subscriber(str(chat_id))
+        self.load_subscribers()
+        return removed
+
+    def load_neardup_index(self):
+        """Pencere içindeki arşiv parmak izlerini yakın-kopya indeksine yükle"""
+        if self.neardup is None:
+            return
+        try:
+            hours = self.neardup.window / 3600
+            for value, news_hash, source, link, title, created in self.storage.recent_simhashes(hours):
+                self.neardup.add(to_unsigned(value), {
+                    'news_hash': news_hash, 'source': source, 'link': link, 'title': title,
+                }, added_at=created)
+            logger.info(f"Yakın-kopya indeksi yüklendi: {len(self.neardup)} kayıt")
+        except Exception as e:
+            logger.error(f"Yakın-kopya indeksi yükleme hatası: {e}")
+
+    def load_feed_cache(self):
+        """Kayıtlı ETag / Last-Modified değerlerini indiriciye yükle"""
+        try:
+            self.fetcher.validators.update(self.storage.load_feed_cache())
+        except Exception as e:
+            logger.error(f"Feed önbelleği yükleme hatası: {e}")
+
+    def hold_validators(self, result: Dict, news_items: List[Dict]):
+        """Ayrıştırılan feedin yeni doğrulayıcılarını haberleri teslim edilene kadar beklet"""
+        if not result.get('parsed') or result['validators'] is None:
+            return
+        url = result['url']
+        previous = self.pending_validators.get(url)
+        if previous is not None:
+            # Önceki çekimden hâlâ teslim bekleyen haberler de beklenir
+            news_items = [news for news in previous[1] if not self.is_news_sent(news['news_hash'])] + news_items
+        self.pending_validators[url] = (result['validators'], news_items)
+
+    def commit_validators(self):
+        """Haberlerinin hepsi gönderilmiş (ya da gönderilmiş sayılmış) feedlerin doğrulayıcılarını devreye al"""
+        for url, (validators, news_items) in list(self.pending_validators.items()):
+            if any(not self.is_news_sent(news['news_hash']) for news in news_items):
+                continue
+            self.fetcher.commit_validators(url, validators)
+            del self.pending_validators[url]
+
+    def save_feed_cache(self):
+        """Bu döngüde değişen doğrulayıcıları tek seferde kaydet"""
+        dirty = self.fetcher.dirty_validators
+        if not dirty:
+            return
+        try:
+            self.storage.save_feed_cache({url: self.fetcher.validators.get(url) for url in dirty})
+            dirty.clear()
+        except Exception as e:
+            logger.error(f"Feed önbelleği kaydetme hatası: {e}")
+
+    def load_feed_health(self):
+        """Kayıtlı feed sağlık durumlarını yükle"""
+        try:
+            self.health.load(self.storage.load_feed_health())
+            disabled = sum(1 for st in self.health.state.values() if st['disabled'])
+            if disabled:
+                logger.warning(f"{disabled} feed devre dışı (/saglik ile listelenebilir)")
+        except Exception as e:
+            logger.error(f"Feed sağlık durumu yükleme hatası: {e}")
+
+    def save_feed_health(self):
+        """Bu döngüde değişen sağlık durumlarını tek seferde kaydet"""
+        changes = self.health.pop_dirty()
+        if not changes:
+            return
+        try:
+            self.storage.save_feed_health(changes)
+        except Exception as e:
+            logger.error(f"Feed sağlık durumu kaydetme hatası: {e}")
+
+    def record_feed_failure(self, url: str, error: str, latency: Optional[float] = None):
+        """Feed hatasını sağlık durumuna işle; devre açıldıysa ya da feed kapandıysa logla"""
+        st = self.health.record_failure(url, error, latency)
+        self.metrics.inc('feed_failures_total')
+        if st['disabled']:
+            logger.error(
+                f"Feed devre dışı bırakıldı ({st['consecutive_failures']} art arda hata): {url} - {error}"
+            )
+        elif st['retry_at']:
+            wait = st['retry_at'] - time.time()
+            logger.warning(
+                f"Feed hatası ({url}): {error} - {st['consecutive_failures']} art arda hata, "
+                f"{wait / 60:.0f} dk yoklanmayacak"
+            )
+        else:
+            logger.error(f"Feed hatası ({url}): {error}")
+
+    def retention_days(self, name: str, days: float) -> float:
+        # 24/48 saatlik dedup ve yakın-kopya pencerelerinin altına inilmez
+        if days > 0 and days < 2:
+            logger.warning(f"{name} en az 2 gün olabilir, 2 gün kullanılıyor")
+            return 2
+        return days
+
+    def maintain_storage(self, now: Optional[float] = None):
+        """Süresi dolan sent_news / news_archive satırlarını sınırlı sayıda küçük partiyle sil.
+        Birikim bitmediyse bir sonraki tikte devam edilir; döngüyü hiçbir zaman uzun süre tutmaz."""
+        now = time.time() if now is None else now
+        if now < self.prune_next:
+            return
+        jobs = []
+        sent_days = self.retention_days('SENT_RETENTION_DAYS', self.sent_retention_days)
+        archive_days = self.retention_days('ARCHIVE_RETENTION_DAYS', self.archive_retention_days)
+        if sent_days > 0:
+            jobs.append(('sent_news', lambda: self.storage.prune_sent(sent_days, self.prune_batch_size)))
+            jobs.append(('chat_sent', lambda: self.storage.prune_chat_sent(sent_days, self.prune_batch_size)))
+        if archive_days > 0:
+            jobs.append(('news_archive', lambda: self.storage.prune_archive(
+                archive_days, self.prune_batch_size, self.cold_archive
+            )))
+        backlog = False
+        pruned = 0
+        try:
+            with self.metrics.stage('prune'):
+                for table, prune in jobs:
+                    for _ in range(self.prune_max_batches):
+                        deleted = prune()
+                        pruned += deleted
+                        self.metrics.inc('pruned_rows_total', deleted, table=table)
+                        if deleted < self.prune_batch_size:
+                            break
+                    else:
+                        backlog = True
+                if pruned:
+                    self.storage.incremental_vacuum()
+        except Exception as e:
+            logger.error(f"Saklama temizliği hatası: {e}")
+        if pruned:
+            logger.info(f"Saklama temizliği: {pruned} eski satır silindi" + (" (devam edecek)" if backlog else ""))
+        self.prune_next = now if backlog else now + self.prune_interval
+
     def init_daily_news_storage(self):
-        """Günlük haber depolama Excel dosyasını başlat"""
+        """Günlük haber Excel dosyasını başlat (gün değiştiyse bir önceki günü kapat)"""
         try:
-            # Günlük dosya adı oluştur
             today = datetime.now().strftime('%Y-%m-%d')
+            if self.daily_news_day == today:
+                return
+            previous_day = self.daily_news_day
+            self.daily_news_day = today
             self.daily_news_path = f"daily_news_{today}.xlsx"
             
+            # Önceki günün dosyasını arşivden son haliyle yeniden üret
+            if previous_day:
+                self.export_daily_news(previous_day)
+            
             if not os.path.exists(self.daily_news_path):
-                wb = Workbook()
-                ws = wb.active
-                ws.title = f"Daily News {today}"
-                ws.append(['Date', 'Time', 'Source', 'Category', 'Title', 'Content', 'Link'])
-                wb.save(self.daily_news_path)
+                self.export_daily_news(today)
                 logger.info(f"Günlük haber depolama dosyası oluşturuldu: {self.daily_news_path}")
+            self.daily_news_dirty = False
         except Exception as e:
             logger.error(f"Günlük haber depolama başlatma hatası: {e}")
     
+    def export_daily_news(self, day: str):
+        """Günün Excel dosyasını news_archive'dan tek seferde (write-only) üret"""
+        path = f"daily_news_{day}.xlsx"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(f"Daily News {day}")
+        ws.append(['Date', 'Time', 'Source', 'Category', 'Title', 'Content', 'Link'])
+        count = 0
+        for row in self.storage.archive_rows_for_day(day):
+            ws.append(list(row))
+            count += 1
+        # Yarım yazılmış dosya kalmasın: geçici dosyaya yaz, sonra yer değiştir
+        tmp_path = f"{path}.tmp"
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+        self.daily_news_exported_at = datetime.now()
+        return count
+
+    def flush_daily_news(self, force: bool = False):
+        """Tamponlanmış Excel satırlarını aralıklı olarak dosyaya yansıt"""
+        try:
+            self.init_daily_news_storage()
+            if not self.daily_news_dirty:
+                return
+            elapsed = datetime.now() - (self.daily_news_exported_at or datetime.min)
+            if not force and elapsed < timedelta(seconds=self.daily_news_flush_interval):
+                return
+            with self.metrics.stage('excel_export'):
+                count = self.export_daily_news(self.daily_news_day)
+            self.daily_news_dirty = False
+            logger.info(f"Günlük Excel güncellendi: {self.daily_news_path} ({count} haber)")
+        except Exception as e:
+            logger.error(f"Excel kaydetme hatası: {e}")
+    
     def save_news_to_db(self, news_item: Dict, news_hash: str):
-        """Haberi detaylı olarak veritabanına kaydet"""
+        """Haberi detaylı olarak arşive ekle (döngü sonunda toplu yazılır)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            category = self.get_category_from_source(news_item.get('source', ''))
+            category = news_item.get('category') or self.get_category_from_source(news_item.get('source', ''))
             published_date = news_item.get('published')
             if isinstance(published_date, datetime):
                 published_date = published_date.strftime('%Y-%m-%d %H:%M:%S')
             
-            cursor.execute('''
-                INSERT OR IGNORE INTO news_archive 
-                (news_hash, source, category, title, summary, link, published_date, analysis)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            self.storage.add_archive((
                 news_hash,
                 news_item.get('source', 'Unknown'),
                 category,
@@ -165,180 +550,502 @@ class RSSNewsBot:
                 news_item.get('summary', ''),
                 news_item.get('link', ''),
                 published_date,
-                news_item.get('analysis', '')
+                news_item.get('analysis', ''),
+                news_item.get('feed_url'),
+                to_signed(news_item['simhash']) if news_item.get('simhash') is not None else None,
+                news_item.get('clean_text')
             ))
-            
-            conn.commit()
-            conn.close()
             logger.info(f"Haber veritabanına arşivlendi: {news_item.get('title', '')[:30]}...")
         except Exception as e:
             logger.error(f"Veritabanı arşivleme hatası: {e}")
 
     def save_news_to_excel(self, news_item: Dict):
-        """Haberi Excel dosyasına kaydet"""
-        try:
-            wb = openpyxl.load_workbook(self.daily_news_path)
-            ws = wb.active
-            
-            # Kategori belirleme
-            category = self.get_category_from_source(news_item.get('source', ''))
-            
-            # Bugünün tarihi
-            today = datetime.now().strftime('%Y-%m-%d')
-            current_time = datetime.now().strftime('%H:%M:%S')
-            
-            ws.append([
-                today,
-                current_time,
-                news_item.get('source', 'Unknown'),
-                category,
-                news_item.get('title', ''),
-                news_item.get('summary', ''),
-                news_item.get('link', '')
-            ])
-            
-            wb.save(self.daily_news_path)
-            logger.info(f"Haber Excel'e kaydedildi: {news_item.get('title', '')[:50]}...")
-            
-        except Exception as e:
-            logger.error(f"Excel kaydetme hatası: {e}")
+        """Haberi günlük Excel'e ekle (satırlar arşivden toplu yazılır)"""
+        self.daily_news_dirty = True
     
     def get_category_from_source(self, source: str) -> str:
-        """Kaynağa göre kategori belirle"""
-        # Basit bir mapping, geliştirilebilir
-        source_lower = source.lower()
-        if any(x in source_lower for x in ['tech', 'wired', 'code', 'web', 'chip', 'donanım']):
-            return 'Technology'
-        elif any(x in source_lower for x in ['science', 'nasa', 'space', 'bilim']):
-            return 'Science'
-        elif any(x in source_lower for x in ['market', 'economy', 'finans', 'borsa']):
-            return 'Economics'
-        return 'General'
-
-    def check_filters(self, title: str, summary: str) -> bool:
-        """Haberin filtrelerden geçip geçmediğini kontrol et"""
-        text = (title + " " + summary).lower()
-        
-        # Blacklist kontrolü (Varsa ve eşleşirse REDDET)
-        if self.filters.get('blacklist'):
-            for keyword in self.filters['blacklist']:
-                if keyword.lower() in text:
-                    logger.info(f"Haber filtrelendi (Blacklist: {keyword}): {title}")
-                    return False
-        
-        # Whitelist kontrolü (Varsa ve eşleşmezse REDDET)
-        if self.filters.get('whitelist'):
-            found = False
-            for keyword in self.filters['whitelist']:
-                if keyword.lower() in text:
-                    found = True
-                    break
-            if not found:
-                # logger.info(f"Haber filtrelendi (Whitelist dışı): {title}")
-                return False
-                
-        return True
+        """Kaynağa göre kategori belirle (categories.json)"""
+        return self.classifier.from_source(source)
+
+    def categorize_news(self, news_item: Dict) -> str:
+        """Kaynak, gerekirse başlık/düz metin kelimeleriyle kategori belirle"""
+        return self.classifier.classify(
+            news_item.get('source', ''), news_item.get('title', ''), news_item.get('clean_text') or ''
+        )
+
+    def route_news(self, news: Dict) -> List[str]:
+        """Haberi isteyen ve henüz almamış sohbetler"""
+        keys = [key for key in (news['news_hash'], news.get('url_hash')) if key]
+        targets, delivered, rule = self.subscribers.route(news, lambda chat_id: self.storage.is_chat_sent(chat_id, keys))
+        if not targets:
+            news['settled'] = True
+            if delivered:
+                # İsteyen tüm sohbetler almış (ör. birleştirilmiş kopya olarak): artık gönderilmiş sayılır
+                self.mark_news_sent(news['news_hash'], news['title'], news['link'], news.get('url_hash'))
+                self.metrics.inc('items_deduped_total')
+            else:
+                if rule:
+                    logger.info(f"Haber filtrelendi ({rule}): {news['title']}")
+                else:
+                    logger.info(f"Haber filtrelendi: {news['title']}")
+                self.metrics.inc('items_filtered_total')
+        return targets
     
-    def get_news_hash(self, title: str, link: str) -> str:
-        """Haber için benzersiz hash oluştur"""
-        content = f"{title}_{link}"
-        return hashlib.md5(content.encode()).hexdigest()
+    def get_news_identity(self, news: Dict) -> Tuple[str, Optional[str]]:
+        """Haber için (news_hash, url_hash): önce guid, yoksa kanonik URL"""
+        return news_identity(news.get('guid'), news['link'], news.get('feed_url', ''), news['title'])
     
-    def is_news_sent(self, news_hash: str) -> bool:
+    def is_news_sent(self, news_hash: str, url_hash: Optional[str] = None) -> bool:
         """Haberin daha önce gönderilip gönderilmediğini kontrol et"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM sent_news WHERE news_hash = ?", (news_hash,))
-            result = cursor.fetchone()
-            conn.close()
-            return result is not None
+            return self.storage.is_news_sent(news_hash, url_hash)
         except Exception as e:
             logger.error(f"Veritabanı kontrol hatası: {e}")
             return False
     
-    def mark_news_sent(self, news_hash: str, title: str, link: str):
-        """Haberi gönderildi olarak işaretle"""
+    def mark_news_sent(self, news_hash: str, title: str, link: str, url_hash: Optional[str] = None):
+        """Haberi gönderildi olarak işaretle (döngü sonunda toplu yazılır)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT OR IGNORE INTO sent_news (news_hash, title, link) VALUES (?, ?, ?)",
-                (news_hash, title, link)
-            )
-            conn.commit()
-            conn.close()
+            self.storage.add_sent(news_hash, title, link, url_hash)
             logger.info(f"Haber işaretlendi: {title[:50]}...")
         except Exception as e:
             logger.error(f"Haber işaretleme hatası: {e}")
+
+    def flush_storage(self):
+        """Tamponlanmış veritabanı yazmalarını tek transaction ile işle"""
+        try:
+            with self.metrics.stage('sqlite_flush'):
+                written = self.storage.flush()
+            if written:
+                logger.info(f"Veritabanına toplu yazıldı: {written} satır")
+        except Exception as e:
+            logger.error(f"Veritabanı toplu yazma hatası: {e}")
+            return
+        # Doğrulayıcılar ancak haberlerin gönderildi kaydı diske yazıldıktan sonra kaydedilir
+        self.commit_validators()
+        self.save_feed_cache()
     
-    def fetch_feeds(self) -> List[Dict]:
-        """RSS feedlerini çek"""
-        all_news = []
-        for url in self.rss_urls:
+    def refresh_feed_cadences(self):
+        """Son 14 günün arşivinden her feedin yayın sıklığını öğren (saatte bir)"""
+        now = datetime.now()
+        if self.cadence_refreshed_at and now - self.cadence_refreshed_at < timedelta(hours=1):
+            return
+        self.cadence_refreshed_at = now
+        try:
+            since = (now - timedelta(days=14)).strftime('%Y-%m-%d %H:%M:%S')
+            dates: Dict[str, List[datetime]] = {}
+            for feed_url, published in self.storage.feed_publish_dates(since):
+                try:
+                    dates.setdefault(feed_url, []).append(datetime.strptime(published, '%Y-%m-%d %H:%M:%S'))
+                except (TypeError, ValueError):
+                    continue
+            for url in self.scheduler.state:
+                self.scheduler.set_cadence(url, learn_cadence(dates.get(url, [])))
+        except Exception as e:
+            logger.error(f"Yayın sıklığı öğrenme hatası: {e}")
+
+    def feed_urls(self) -> List[str]:
+        """Çekilecek feedler: en az bir sohbetin izlediği feedlerin birleşimi"""
+        return self.subscribers.feeds()
+
+    def owned_feeds(self) -> List[str]:
+        """Worker: tutarlı hash halkasında bu sürece düşen ve kirası alınan feedler"""
+        # Abone ve sağlık durumları diğer süreçlerde değişebilir: her tikte tazele
+        self.load_subscribers()
+        try:
+            self.health.load(self.storage.load_feed_health())
+        except Exception as e:
+            logger.error(f"Feed sağlık durumu yükleme hatası: {e}")
+        previous = set(self.shard.owned)
+        try:
+            owned = self.shard.rebalance(self.feed_urls())
+        except Exception as e:
+            logger.error(f"Kira yenileme hatası: {e}")
+            return []
+        acquired = [url for url in owned if url not in previous]
+        released = previous.difference(owned)
+        if acquired or released:
+            logger.info(
+                f"Feed payı: {len(owned)} feed ({len(acquired)} alındı, {len(released)} bırakıldı), "
+                f"{len(self.shard.live)} canlı worker"
+            )
+        if acquired:
+            # Devralınan feedlerin en güncel doğrulayıcıları önceki sahibinden
+            cache = self.storage.load_feed_cache()
+            self.fetcher.validators.update({url: cache[url] for url in acquired if url in cache})
+        return owned
+
+    def due_feeds(self) -> List[str]:
+        """Zamanlayıcıya göre yoklanma zamanı gelmiş feedler"""
+        self.scheduler.sync(self.owned_feeds() if self.role == 'worker' else self.feed_urls())
+        self.refresh_feed_cadences()
+        # Devresi açık ya da devre dışı feedler bağlantı ve zaman aşımı harcamasın
+        return self.health.filter_available(self.scheduler.due())
+
+    async def iter_fetched(self, urls: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """Feed sonuçlarını tamamlandıkça üret; döngü sonunda sağlık durumlarını kaydet"""
+        metrics = self.metrics
+        async for result in self.fetcher.iter_results(self.feed_urls() if urls is None else urls):
+            if metrics.enabled:
+                outcome = 'error' if result['error'] else 'not_modified' if result['not_modified'] else 'ok'
+                metrics.inc('fetch_results_total', result=outcome)
+                metrics.inc('fetch_bytes_total', result['bytes'])
+                metrics.observe('fetch_seconds', result['elapsed'])
+                metrics.set('feed_fetch_seconds', result['elapsed'], feed=result['url'])
+                if result['feed'] is not None:
+                    metrics.observe('parse_seconds', result['parse_elapsed'])
+            yield result
+        self.save_feed_health()
+        stats = self.fetcher.stats
+        logger.info(
+            f"Feed döngüsü: {stats['hits']} önbellek isabeti (304), "
+            f"{stats['misses']} ıskalama, {stats['errors']} hata"
+        )
+
+    def iter_feed_entries(self, result: Dict) -> Iterator[Dict]:
+        """Tek feed sonucundan son 24 saatin haberlerini üret; zamanlayıcıyı güncelle"""
+        url = result['url']
+        if result['error']:
+            self.record_feed_failure(url, result['error'], result['elapsed'])
+            self.scheduler.record(url)
+            return
+        if result['not_modified']:
+            self.health.record_success(url, result['elapsed'])
+            self.scheduler.record(url)
+            return
+        newest = None
+        hint = None
+        try:
+            # Ayrıştırma ve tarih filtresi parse_feed'de (thread ya da süreç havuzu) yapıldı
+            parsed = result['feed']
+            hint = parsed['hint']
+            newest = parsed['newest']
+            if parsed['error']:
+                self.record_feed_failure(url, parsed['error'], result['elapsed'])
+                return
+            
+            site_name = parsed['title'] or url
+            category = self.get_category_from_source(site_name)
+            self.metrics.inc('entries_total', parsed['total'])
+            self.metrics.set('feed_entries', parsed['total'], feed=url)
+            self.metrics.inc('items_stale_total', parsed['stale'])
+            
+            for title, link, guid, summary, published in parsed['entries']:
+                yield {
+                    'title': title,
+                    'link': link,
+                    'guid': guid,
+                    'summary': summary,
+                    'published': published,
+                    'source': site_name,
+                    'category': category,
+                    'feed_url': url
+                }
+            result['parsed'] = True
+            self.health.record_success(url, result['elapsed'])
+        except Exception as e:
+            self.record_feed_failure(url, str(e) or e.__class__.__name__, result['elapsed'])
+        finally:
+            self.scheduler.record(url, newest=newest, hint=hint)
+
+    async def stream_news(self, urls: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """fetch → tarih filtresi → dedup → yönlendirme hattı; her feed tamamlanır tamamlanmaz
+        haberlerini yeniden eskiye üretir. Her haber bir kez işlenir; news['targets'] onu alacak sohbetlerdir.
+        Eski haberler ayrıştırma sırasında, görülmüş haberler hemen ardından atılır; feedparser nesnesi
+        parse_feed dışına çıkmaz; bellekte aynı anda sadece bir feedin haberleri bekler."""
+        seen = set()
+        # Yakın kopyalar feedler arasında da birleşir: döngü indeksi tüm akış boyunca yaşar
+        cycle_index = self.new_cycle_index()
+        async for result in self.iter_fetched(urls):
+            candidates = self.dedup_entries(self.iter_feed_entries(result), seen)
+            # Düz metin bir kez çıkarılır; filtre, yakın-kopya, mesaj ve arşiv bunu kullanır
+            await self.extract_texts(candidates)
+            survivors = self.route_candidates(candidates)
+            result['feed'] = None
+            self.hold_validators(result, survivors)
+            survivors.sort(key=lambda x: x['published'], reverse=True)
+            for news in self.collapse(survivors, cycle_index):
+                yield news
+
+    async def stream_ingested(self, limit: int = 1000) -> AsyncIterator[Dict]:
+        """Koordinatör: worker'ların kuyruğa bıraktığı haberleri dedup → yönlendirme hattından geçir.
+        Kuyruktaki kayıtlar zaten tarih filtresinden geçmiş ve düz metni çıkarılmıştır."""
+        payloads = self.storage.claim_ingest(self.shard.worker_id, limit)
+        self.metrics.inc('ingest_claimed_total', len(payloads))
+        claimed = [unpack_ingest(payload) for payload in payloads]
+        for news in claimed:
+            self.claimed[news['news_hash']] = news
+        candidates = self.dedup_entries(claimed, set())
+        await self.extract_texts(candidates)
+        survivors = self.route_candidates(candidates)
+        survivors.sort(key=lambda x: x['published'], reverse=True)
+        for news in self.collapse(survivors):
+            yield news
+
+    async def ingest_feeds(self, urls: List[str]) -> int:
+        """Worker: feedleri çek, ayrıştır, tekilleştir, düz metni çıkar ve koordinatörün kuyruğuna yaz"""
+        seen = set()
+        enqueued = 0
+        async for result in self.iter_fetched(urls):
+            candidates = self.dedup_entries(self.iter_feed_entries(result), seen)
+            await self.extract_texts(candidates)
+            result['feed'] = None
+            if candidates:
+                now = time.time()
+                try:
+                    enqueued += self.storage.enqueue_ingest([
+                        (news['news_hash'], news['feed_url'], pack_ingest(news), self.shard.worker_id, now)
+                        for news in candidates
+                    ])
+                except Exception as e:
+                    logger.error(f"Kuyruğa yazma hatası ({result['url']}): {e}")
+                    continue
+            # Kuyruğa yazılan haberler koordinatörün sorumluluğunda: doğrulayıcılar ilerleyebilir
+            if result.get('parsed') and result['validators'] is not None:
+                self.fetcher.commit_validators(result['url'], result['validators'])
+        self.metrics.inc('ingest_enqueued_total', enqueued)
+        return enqueued
+
+    def dedup_entries(self, entries: Iterable[Dict], seen: set) -> List[Dict]:
+        """Kimlik ata; bu döngüde görülmüş, kuyrukta bekleyen ya da gönderilmiş haberleri at"""
+        candidates = []
+        for news in entries:
+            if news.get('news_hash') is None:
+                news['news_hash'], news['url_hash'] = self.get_news_identity(news)
+            news_hash, url_hash = news['news_hash'], news.get('url_hash')
+            keys = (news_hash, url_hash) if url_hash else (news_hash,)
+            if any(key in seen or self.is_news_pending(key) for key in keys):
+                self.metrics.inc('items_deduped_total')
+                continue
+            if self.is_news_sent(news_hash, url_hash) or (
+                    url_hash is None and self.storage.is_legacy_sent(canonical_url_hash(news['link']))):
+                news['settled'] = True
+                self.metrics.inc('items_deduped_total')
+                continue
+            seen.update(keys)
+            candidates.append(news)
+        return candidates
+
+    def route_candidates(self, candidates: List[Dict]) -> List[Dict]:
+        """Sohbet bazında feed alt kümesi, filtre ve tekilleştirme; hedefi olmayanlar atılır"""
+        survivors = []
+        for news in candidates:
+            news['targets'] = self.route_news(news)
+            if news['targets']:
+                survivors.append(news)
+        return survivors
+
+    def new_cycle_index(self) -> Optional[NearDupIndex]:
+        """Bir döngüde görülen yakın kopyaların indeksi (yakın-kopya tespiti kapalıysa None)"""
+        if self.neardup is None:
+            return None
+        return NearDupIndex(max_distance=self.neardup.max_distance, bands=self.neardup.bands)
+
+    def collapse(self, news_items, cycle_index: Optional[NearDupIndex] = None) -> Iterable[Dict]:
+        if self.neardup is None:
+            return news_items
+        if cycle_index is None:
+            cycle_index = self.new_cycle_index()
+        return self.collapse_near_duplicates(news_items, cycle_index)
+
+    async def extract_texts(self, news_items: List[Dict]):
+        """news['clean_text'] alanını doldur; büyük partiler işçi havuzunda işlenir"""
+        pending = [news for news in news_items if news.get('clean_text') is None]
+        if not pending:
+            return
+        with self.metrics.stage('clean_text'):
+            summaries = [news['summary'] or '' for news in pending]
+            if self.clean_pool is not None and len(pending) >= self.clean_pool_min:
+                loop = asyncio.get_running_loop()
+                texts = await loop.run_in_executor(
+                    self.clean_pool, html_to_text_many, summaries, self.clean_text_chars
+                )
+            else:
+                texts = html_to_text_many(summaries, self.clean_text_chars)
+        for news, text in zip(pending, texts):
+            news['clean_text'] = text
+
+    def collapse_near_duplicates(self, news_items, cycle_index: NearDupIndex) -> Iterator[Dict]:
+        """Aynı haberin farklı kaynaklardaki kopyalarını tek teslimatta birleştir.
+        Daha önce gönderilmiş bir haberin kopyaları sessizce gönderildi sayılır.
+        Birincil haber kuyruğa alındıktan sonra gelen kopya sadece onu almayan sohbetlere gider."""
+        for news in news_items:
+            value = simhash(news['title'], news['clean_text'])
+            news['simhash'] = value
+            sent = self.neardup.find(value)
+            if sent is not None:
+                delivered = sent.get('chats')
+                if sent['news_hash'] == news['news_hash']:
+                    # Aynı haber (ör. bir sohbete teslim edilememişti): alan sohbetler yönlendirmede elendi
+                    remaining = news['targets']
+                elif delivered is None:
+                    # Arşivden yüklenen kayıt: hangi sohbetlere gittiği chat_sent'ten okunur
+                    remaining = [
+                        chat_id for chat_id in news['targets']
+                        if not self.storage.is_chat_sent(chat_id, [sent['news_hash']])
+                    ]
+                else:
+                    remaining = [chat_id for chat_id in news['targets'] if chat_id not in delivered]
+                if not remaining:
+                    logger.info(f"Yakın kopya atlandı ({sent['source']}): {news['title'][:50]}")
+                    self.mark_news_sent(news['news_hash'], news['title'], news['link'], news.get('url_hash'))
+                    self.metrics.inc('items_neardup_total', kind='already_sent')
+                    continue
+                news['targets'] = remaining
+            primary = cycle_index.find(value)
+            if primary is not None and 'pending_chats' in primary:
+                # Birincil zaten kuyrukta: mesajı değişmez, kopya kalan sohbetlere ayrı gider
+                remaining = [chat_id for chat_id in news['targets'] if chat_id not in primary['targets']]
+                self.metrics.inc('items_neardup_total', kind='merged')
+                if not remaining:
+                    if primary.get('delivered') and not primary['pending_chats']:
+                        self.mark_news_sent(news['news_hash'], news['title'], news['link'], news.get('url_hash'))
+                    else:
+                        primary['alternates'].append(news)
+                    continue
+                news['targets'] = remaining
+                news['alternates'] = []
+                yield news
+                continue
+            if primary is not None:
+                primary['alternates'].append(news)
+                # Kopyayı isteyen sohbetler birleştirilmiş teslimatı alır
+                for chat_id in news['targets']:
+                    if chat_id not in primary['targets']:
+                        primary['targets'].append(chat_id)
+                self.metrics.inc('items_neardup_total', kind='merged')
+                continue
+            news['alternates'] = []
+            cycle_index.add(value, news)
+            yield news
+
+    def get_sender(self, bot) -> SendQueue:
+        """Gönderim kuyruğunu (gerekirse) oluştur"""
+        if self.sender is None:
+            self.sender = SendQueue(
+                bot,
+                global_rate=float(os.getenv('TELEGRAM_GLOBAL_RATE', '30')),
+                chat_rate=float(os.getenv('TELEGRAM_CHAT_RATE', '1')),
+                group_per_minute=float(os.getenv('TELEGRAM_GROUP_PER_MINUTE', '20')),
+                on_drained=self.flush_storage,
+                metrics=self.metrics,
+            )
+        return self.sender
+
+    def is_news_pending(self, news_hash: str) -> bool:
+        """Haber gönderim kuyruğunda ya da özet tamponunda bekliyor mu"""
+        if self.digest is not None and news_hash in self.digest:
+            return True
+        return self.sender is not None and self.sender.is_pending(news_hash)
+
+    def update_gauges(self):
+        """Kuyruk ve indeks boyutlarını metriklere yansıt"""
+        metrics = self.metrics
+        if not metrics.enabled:
+            return
+        metrics.set('send_queue_depth', self.sender.depth() if self.sender else 0)
+        metrics.set('digest_pending', len(self.digest) if self.digest is not None else 0)
+        metrics.set('dedup_index_size', len(self.storage.sent_index))
+        metrics.set('neardup_index_size', len(self.neardup) if self.neardup is not None else 0)
+        metrics.set('feeds_total', len(self.feed_urls()))
+        metrics.set('subscribers', len(self.subscribers))
+        if self.shard is not None:
+            metrics.set('owned_feeds', len(self.shard.owned))
+            metrics.set('live_workers', len(self.shard.live))
             try:
-                feed = feedparser.parse(url)
-                if feed.bozo: continue
-                
-                site_name = feed.feed.get('title', url)
-                category = self.get_category_from_source(site_name)
-                
-                for entry in feed.entries:
-                    # Tarih kontrolü (Son 24 saat)
-                    try:
-                        if hasattr(entry, 'published_parsed'):
-                            pub_date = datetime(*entry.published_parsed[:6])
-                        else:
-                            pub_date = datetime.now()
-                            
-                        if datetime.now() - pub_date > timedelta(hours=24):
-                            continue
-                    except:
-                        pub_date = datetime.now()
-
-                    all_news.append({
-                        'title': entry.get('title', 'No Title'),
-                        'link': entry.get('link', ''),
-                        'summary': entry.get('summary', entry.get('description', '')),
-                        'published': pub_date,
-                        'source': site_name,
-                        'category': category
-                    })
+                metrics.set('ingest_queue_depth', self.storage.ingest_depth())
             except Exception as e:
-                logger.error(f"Feed hatası ({url}): {e}")
-        
-        all_news.sort(key=lambda x: x['published'], reverse=True)
-        return all_news
+                logger.error(f"Kuyruk boyutu okunamadı: {e}")
+        now = time.time()
+        metrics.set('feeds_disabled', sum(1 for st in self.health.state.values() if st['disabled']))
+        metrics.set('feeds_circuit_open', sum(
+            1 for st in self.health.state.values() if not st['disabled'] and st['retry_at'] > now
+        ))
+        metrics.set('last_cycle_timestamp', time.time())
 
-    def analyze_news(self, title: str, summary: str, source: str) -> str:
-        if not self.ai_client: return None
-        try:
-            system_prompt = "Sen uzman bir teknoloji analistisin. Haberi Türkçe yorumla: 1. Analiz 2. Neden Önemli? 3. Gelecek Öngörüsü."
-            user_content = f"Kaynak: {source}\nBaşlık: {title}\nÖzet: {summary}"
-            completion = self.ai_client.chat.completions.create(
-                model=self.openrouter_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content},
-                ]
+    def flush_digests(self, sender: SendQueue, force: bool = False):
+        """Penceresi dolan özetleri 4096 karakter sınırına göre paketleyip kuyruğa al"""
+        if self.digest is None:
+            return
+        for (chat_id, topic_id, _), group in self.digest.pop_due(force):
+            items = group['items']
+            header = f"🗞 <b>{html.escape(group['category'])} Özeti</b> ({len(items)} haber)"
+            blocks = [format_digest_item(news) for news in items]
+            packed = pack_blocks(header, blocks)
+            for text, indexes in packed:
+                part = [items[i] for i in indexes]
+                sender.put(
+                    chat_id,
+                    text,
+                    message_thread_id=topic_id,
+                    keys=[key for news in part for key in news_keys(news)],
+                    on_sent=lambda part=part, chat_id=chat_id: [self.on_news_delivered(news, chat_id) for news in part],
+                    parse_mode='HTML',
+                    disable_web_page_preview=True
+                )
+            logger.info(f"Özet gönderime alındı: {group['category']}, {len(items)} haber, {len(packed)} mesaj")
+
+    def on_news_delivered(self, news: Dict, chat_id=None):
+        """Bir sohbete gönderim başarılı: sohbet için işaretle; ilk teslimde arşivle,
+        tüm hedef sohbetlere ulaşınca haberi gönderildi say"""
+        news_hash = news['news_hash']
+        self.metrics.inc('deliveries_total')
+        if chat_id is not None:
+            chat_id = str(chat_id)
+            self.storage.add_chat_sent(chat_id, news_keys(news))
+            news.setdefault('pending_chats', set()).discard(chat_id)
+        if not news.get('delivered'):
+            news['delivered'] = True
+            self.metrics.inc('items_sent_total')
+            self.save_news_to_db(news, news_hash)
+            self.save_news_to_excel(news)
+            if self.neardup is not None and news.get('simhash') is not None:
+                news['neardup_entry'] = {
+                    'news_hash': news_hash, 'source': news.get('source'), 'link': news.get('link'),
+                    'title': news.get('title'), 'chats': set(),
+                }
+                self.neardup.add(news['simhash'], news['neardup_entry'])
+        if chat_id is not None and news.get('neardup_entry') is not None:
+            news['neardup_entry']['chats'].add(chat_id)
+        if news.get('pending_chats'):
+            return
+        # Teslim edilemeyen sohbet kaldıysa haber sonraki döngüde sadece ona tekrar yönlenir
+        self.mark_news_sent(news_hash, news['title'], news['link'], news.get('url_hash'))
+        # Birleştirilen yakın kopyalar da gönderilmiş sayılır
+        for alternate in news.get('alternates') or []:
+            self.mark_news_sent(
+                alternate['news_hash'], alternate['title'], alternate['link'], alternate.get('url_hash')
             )
-            return completion.choices[0].message.content
+
+    async def analyze_news(self, news_items: List[Dict]):
+        """Haberleri eşzamanlı AI analizinden geçir (sonuç news['analysis'])"""
+        if not self.analyzer or not news_items:
+            return
+        try:
+            await self.analyzer.analyze_many(news_items)
         except Exception as e:
             logger.error(f"AI hatası: {e}")
-            return None
 
 # --- Telegram Bot Handlers ---
 
-bot_logic = RSSNewsBot()
+# Havuz süreçleri (forkserver/spawn) bu modülü __mp_main__ olarak yeniden içe aktarır: bot orada kurulmaz
+bot_logic = RSSNewsBot() if __name__ != '__mp_main__' else None
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """/start komutu"""
     await update.message.reply_text(
         "👋 Merhaba! Ben RSS Haber Botu.\n\n"
         "Komutlar:\n"
-        "/sonhaberler - Son 5 haberi getir\n"
-        "/ara <kelime> - Haberlerde arama yap\n"
+        "/sonhaberler [kategori] - Son 5 haberi getir\n"
+        "/ara <kelime> - Haberlerde arama yap (--arsiv ile eski aylar da)\n"
         "/abone <url> - Yeni RSS kaynağı ekle\n"
+        "/katil, /ayril - Bu sohbete haber gönderimini aç / kapat\n"
+        "/kaynak [ekle|sil <url> | hepsi] - Bu sohbetin feedleri\n"
+        "/filtre [beyaz|kara ekle|sil <kelime> | varsayilan] - Bu sohbetin filtreleri\n"
+        "/konu [<kategori> <topic_id|sil> | varsayilan] - Bu sohbetin kategori-topic eşlemesi\n"
+        "/stats - Bot performans istatistikleri\n"
+        "/saglik - Sorunlu feedleri listele\n"
+        "/etkinlestir <url|numara> - Devre dışı feedi yeniden aç\n"
         "/topicid - Bulunduğun konunun ID'sini öğren"
     )
 
@@ -352,13 +1059,18 @@ async def get_topic_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Bu bir konu (topic) değil veya Genel sohbet.")
 
 async def latest_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """/sonhaberler komutu"""
+    """/sonhaberler [kategori] komutu"""
     try:
-        conn = sqlite3.connect(bot_logic.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT title, link, source FROM news_archive ORDER BY published_date DESC LIMIT 5")
-        rows = cursor.fetchall()
-        conn.close()
+        # Kategori: argüman olarak verilir ya da komutun yazıldığı topic'ten çıkarılır
+        category = None
+        if context.args:
+            wanted = context.args[0].lower()
+            category = next((c for c in bot_logic.topics if c.lower() == wanted), context.args[0])
+        elif update.message.message_thread_id:
+            tid = update.message.message_thread_id
+            topics = bot_logic.subscribers.topics_for(update.effective_chat.id, bot_logic.topics)
+            category = next((c for c, t in topics.items() if t == tid), None)
+        rows = bot_logic.storage.latest_news(5, category)
         
         if not rows:
             await update.message.reply_text("Henüz haber yok.")
@@ -378,16 +1090,22 @@ async def search_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Lütfen aranacak kelimeyi girin. Örn: /ara yapay zeka")
         return
     
-    query = " ".join(context.args)
+    # --arsiv / -a: canlı sonuçlar yetmezse aylık soğuk arşivlerde de ara
+    args = [arg for arg in context.args if arg not in ('--arsiv', '-a')]
+    include_cold = len(args) != len(context.args)
+    query = " ".join(args)
+    if not query:
+        await update.message.reply_text("Lütfen aranacak kelimeyi girin. Örn: /ara --arsiv yapay zeka")
+        return
     try:
-        conn = sqlite3.connect(bot_logic.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT title, link FROM news_archive WHERE title LIKE ? OR summary LIKE ? ORDER BY published_date DESC LIMIT 5", 
-            (f'%{query}%', f'%{query}%')
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        rows = bot_logic.storage.search_news(query, 5)
+        if include_cold and len(rows) < 5:
+            if bot_logic.cold_archive is None:
+                await update.message.reply_text("Soğuk arşiv etkin değil (ARCHIVE_COLD_DIR).")
+            else:
+                match = fts_match(query)
+                if match is not None:
+                    rows += await asyncio.to_thread(bot_logic.cold_archive.search, match, 5 - len(rows))
         
         if not rows:
             await update.message.reply_text(f"'{query}' ile ilgili haber bulunamadı.")
@@ -401,8 +1119,35 @@ async def search_news(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"Hata: {e}")
 
+async def require_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Yönetim komutları: sohbet izinli olmalı (CHAT_ID ya da ALLOWED_CHATS) ve gönderen sohbet yöneticisi"""
+    chat = update.effective_chat
+    chat_id = str(chat.id)
+    if chat_id != bot_logic.default_chat_id and '*' not in bot_logic.allowed_chats \
+            and chat_id not in bot_logic.allowed_chats:
+        await update.message.reply_text("Bu sohbet bot'u yönetemez (ALLOWED_CHATS).")
+        return False
+    if chat.type == constants.ChatType.PRIVATE:
+        return True
+    message = update.effective_message
+    if message is not None and message.sender_chat is not None and message.sender_chat.id == chat.id:
+        # Anonim yönetici ya da kanalın kendisi
+        return True
+    user = update.effective_user
+    try:
+        member = await context.bot.get_chat_member(chat.id, user.id) if user else None
+    except Exception as e:
+        logger.error(f"Yönetici kontrolü başarısız ({chat_id}): {e}")
+        member = None
+    if member is None or member.status not in (constants.ChatMemberStatus.ADMINISTRATOR, constants.ChatMemberStatus.OWNER):
+        await update.message.reply_text("Bu komutu sadece sohbet yöneticileri kullanabilir.")
+        return False
+    return True
+
 async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """/abone komutu"""
+    if not await require_admin(update, context):
+        return
     if not context.args:
         await update.message.reply_text("Lütfen RSS URL'si girin. Örn: /abone https://site.com/feed")
         return
@@ -416,90 +1161,491 @@ async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if url in bot_logic.rss_urls:
         await update.message.reply_text("Bu kaynak zaten ekli.")
         return
-        
-    bot_logic.rss_urls.append(url)
     
-    # Dosyaya kaydet
+    def add_feed(feeds):
+        feeds = list(feeds or [])
+        # Dosya bot'un son okumasından sonra değişmiş olabilir
+        return None if url in feeds else feeds + [url]
+    
+    # Dosyaya kaydet (kilit altında oku-değiştir-yaz, atomik yazma)
+    try:
+        update_json('feeds.json', add_feed, default=[])
+    except Exception as e:
+        await update.message.reply_text(f"Kaydetme hatası: {e}")
+        return
+    bot_logic.config.invalidate('feeds.json')
+    bot_logic.load_config()
+    await update.message.reply_text(f"✅ Başarıyla eklendi: {url}")
+
+async def join_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/katil komutu: bu sohbeti abone yap (tüm feedler, varsayılan filtre ve topicler)"""
+    chat_id = str(update.effective_chat.id)
+    if not await require_admin(update, context):
+        return
+    if bot_logic.subscribers.get(chat_id) is not None:
+        await update.message.reply_text("Bu sohbet zaten abone.")
+        return
     try:
-        with open('feeds.json', 'w', encoding='utf-8') as f:
-            json.dump(bot_logic.rss_urls, f, indent=4)
-        await update.message.reply_text(f"✅ Başarıyla eklendi: {url}")
+        bot_logic.update_subscriber(chat_id)
     except Exception as e:
         await update.message.reply_text(f"Kaydetme hatası: {e}")
+        return
+    await update.message.reply_text("✅ Bu sohbet haber almaya başladı. /kaynak, /filtre ve /konu ile ayarlayabilirsiniz.")
 
-async def check_feeds_job(context: ContextTypes.DEFAULT_TYPE):
-    """Periyodik haber kontrol işi"""
-    chat_id = context.job.chat_id
+async def leave_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/ayril komutu: bu sohbetin aboneliğini kaldır"""
+    chat_id = str(update.effective_chat.id)
+    if not await require_admin(update, context):
+        return
+    if chat_id == bot_logic.default_chat_id:
+        # CHAT_ID ayarları sıfırlanır ama ortam değişkeni olduğu sürece abone kalır
+        bot_logic.remove_subscriber(chat_id)
+        await update.message.reply_text("Bu sohbet CHAT_ID ile tanımlı; ayarları varsayılana döndü.")
+        return
+    if not bot_logic.remove_subscriber(chat_id):
+        await update.message.reply_text("Bu sohbet abone değil.")
+        return
+    await update.message.reply_text("✅ Abonelik kaldırıldı.")
+
+async def get_subscriber(update: Update):
+    """Komutun geldiği sohbetin abone kaydı; abone değilse kullanıcıya bildirir"""
+    subscriber = bot_logic.subscribers.get(update.effective_chat.id)
+    if subscriber is None:
+        await update.message.reply_text("Bu sohbet abone değil (/katil).")
+    return subscriber
+
+async def chat_feeds(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/kaynak [ekle|sil <url> | hepsi] komutu: sohbetin izlediği feed alt kümesi"""
+    subscriber = await get_subscriber(update)
+    if subscriber is None:
+        return
+    args = context.args or []
+    # Listeleme herkese açık, değişiklik yöneticiye
+    if args and not await require_admin(update, context):
+        return
+    if not args:
+        if subscriber.feeds is None:
+            await update.message.reply_text(f"Bu sohbet tüm feedleri izliyor ({len(bot_logic.rss_urls)}).")
+        else:
+            listing = "\n".join(f"{i}. {url}" for i, url in enumerate(subscriber.feeds, 1)) or "(boş)"
+            await update.message.reply_text(f"Bu sohbetin feedleri:\n{listing}"[:4096], disable_web_page_preview=True)
+        return
+    action = args[0].lower()
+    if action == 'hepsi':
+        feeds = None
+    elif action in ('ekle', 'sil') and len(args) > 1:
+        url = args[1]
+        if action == 'ekle':
+            if not url.startswith('http'):
+                await update.message.reply_text("Geçersiz URL.")
+                return
+            # Tüm feedleri izleyen sohbet ilk eklemede kendi listesine geçer
+            feeds = list(subscriber.feeds or [])
+            if url not in feeds:
+                feeds.append(url)
+        else:
+            # Tüm feedleri izleyen sohbet için "şunlar hariç hepsi"
+            feeds = [f for f in (bot_logic.rss_urls if subscriber.feeds is None else subscriber.feeds) if f != url]
+    else:
+        await update.message.reply_text("Kullanım: /kaynak [ekle <url> | sil <url> | hepsi]")
+        return
+    try:
+        subscriber = bot_logic.update_subscriber(subscriber.chat_id, feeds=feeds)
+    except Exception as e:
+        await update.message.reply_text(f"Kaydetme hatası: {e}")
+        return
+    count = "tüm feedler" if subscriber.feeds is None else f"{len(subscriber.feeds)} feed"
+    await update.message.reply_text(f"✅ Güncellendi: bu sohbet {count} izliyor.")
+
+async def chat_filters(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/filtre [beyaz|kara ekle|sil <kelime> | varsayilan] komutu: sohbetin filtreleri"""
+    subscriber = await get_subscriber(update)
+    if subscriber is None:
+        return
+    args = context.args or []
+    # Listeleme herkese açık, değişiklik yöneticiye
+    if args and not await require_admin(update, context):
+        return
+    current = subscriber.filters if subscriber.filters is not None else bot_logic.filters
+    if not args:
+        source = "varsayılan (filters.json)" if subscriber.filters is None else "bu sohbete özel"
+        await update.message.reply_text(
+            f"Filtreler ({source}):\n"
+            f"Beyaz liste: {', '.join(map(str, current.get('whitelist', []))) or '-'}\n"
+            f"Kara liste: {', '.join(map(str, current.get('blacklist', []))) or '-'}"
+        )
+        return
+    if args[0].lower() == 'varsayilan':
+        filters = None
+    elif len(args) > 2 and args[0].lower() in ('beyaz', 'kara') and args[1].lower() in ('ekle', 'sil'):
+        list_name = 'whitelist' if args[0].lower() == 'beyaz' else 'blacklist'
+        word = " ".join(args[2:])
+        # İlk değişiklikte filters.json kopyalanır, sonra sohbete özel kalır
+        filters = {
+            'whitelist': list(current.get('whitelist', [])),
+            'blacklist': list(current.get('blacklist', [])),
+        }
+        rules = filters[list_name]
+        if args[1].lower() == 'ekle':
+            if word not in rules:
+                rules.append(word)
+        else:
+            filters[list_name] = [rule for rule in rules if rule != word]
+    else:
+        await update.message.reply_text("Kullanım: /filtre [beyaz|kara ekle|sil <kelime> | varsayilan]")
+        return
+    try:
+        bot_logic.update_subscriber(subscriber.chat_id, filters=filters)
+    except Exception as e:
+        await update.message.reply_text(f"Kaydetme hatası: {e}")
+        return
+    await update.message.reply_text("✅ Filtreler güncellendi.")
+
+async def chat_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/konu [<kategori> <topic_id|sil> | varsayilan] komutu: sohbetin kategori -> topic eşlemesi"""
+    subscriber = await get_subscriber(update)
+    if subscriber is None:
+        return
+    args = context.args or []
+    # Listeleme herkese açık, değişiklik yöneticiye
+    if args and not await require_admin(update, context):
+        return
+    current = subscriber.topics if subscriber.topics is not None else bot_logic.topics
+    if not args:
+        listing = "\n".join(f"{category}: {topic_id}" for category, topic_id in current.items()) or "(boş)"
+        await update.message.reply_text(f"Kategori → topic:\n{listing}")
+        return
+    if args[0].lower() == 'varsayilan':
+        topics = None
+    else:
+        known = list(bot_logic.classifier.priority) + [bot_logic.classifier.default]
+        category = next((c for c in known if c.lower() == args[0].lower()), args[0])
+        topics = dict(current)
+        value = args[1] if len(args) > 1 else None
+        if value == 'sil':
+            topics.pop(category, None)
+        elif value is not None and value.lstrip('-').isdigit():
+            topics[category] = int(value)
+        elif value is None and update.message.message_thread_id:
+            # Komut bir topic içinde yazıldıysa o topic kullanılır
+            topics[category] = update.message.message_thread_id
+        else:
+            await update.message.reply_text("Kullanım: /konu <kategori> <topic_id|sil> (topic içinde id gerekmez)")
+            return
+    try:
+        bot_logic.update_subscriber(subscriber.chat_id, topics=topics)
+    except Exception as e:
+        await update.message.reply_text(f"Kaydetme hatası: {e}")
+        return
+    await update.message.reply_text("✅ Topic eşlemesi güncellendi.")
+
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/stats komutu: aşama süreleri, sayaçlar ve kuyruk durumu"""
+    metrics = bot_logic.metrics
+    if not metrics.enabled:
+        await update.message.reply_text("Metrikler kapalı (METRICS=0).")
+        return
+    bot_logic.update_gauges()
+    snapshot = metrics.snapshot()
+    lines = ["📊 <b>Bot İstatistikleri</b>", "", "<b>Aşamalar</b> (çağrı / ort / en uzun)"]
+    for (name, labels), (count, total, peak) in sorted(snapshot['timers'].items()):
+        label = dict(labels).get('stage', name)
+        lines.append(f"• {html.escape(label)}: {count} / {total / count * 1000:.0f} ms / {peak * 1000:.0f} ms")
+    lines += ["", "<b>Sayaçlar</b>"]
+    for (name, labels), value in sorted(snapshot['counters'].items()):
+        suffix = "".join(f" {label_value}" for _, label_value in labels)
+        lines.append(f"• {html.escape(name + suffix)}: {value:g}")
+    lines += ["", "<b>Durum</b>"]
+    for (name, labels), value in sorted(snapshot['gauges'].items()):
+        # Feed bazındaki göstergeler Prometheus uç noktası için; mesajı şişirmesin
+        if not labels and not name.endswith('_timestamp'):
+            lines.append(f"• {html.escape(name)}: {value:g}")
+    await update.message.reply_text("\n".join(lines)[:4096], parse_mode='HTML')
+
+async def feed_health(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/saglik komutu: devre dışı ve geri çekilmiş feedler"""
+    if bot_logic.role != 'all':
+        # Feedleri worker'lar çeker: güncel durum ortak veritabanında
+        bot_logic.load_feed_health()
+    rows = bot_logic.health.unhealthy()
+    if not rows:
+        await update.message.reply_text("✅ Tüm feedler sağlıklı.")
+        return
+    now = time.time()
+    lines = [f"🩺 <b>Sorunlu Feedler</b> ({len(rows)})", ""]
+    for i, row in enumerate(rows[:30], 1):
+        if row['disabled']:
+            status = "⛔ devre dışı"
+        else:
+            status = f"⏸ {max(0, row['retry_at'] - now) / 60:.0f} dk sonra denenecek"
+        last_success = (
+            datetime.fromtimestamp(row['last_success']).strftime('%d.%m %H:%M') if row['last_success'] else "hiç"
+        )
+        latency = f"{row['avg_latency']:.1f} sn" if row['avg_latency'] is not None else "-"
+        lines.append(
+            f"{i}. {status} — {html.escape(row['url'])}\n"
+            f"   {row['consecutive_failures']} art arda hata, son başarı: {last_success}, ort. gecikme: {latency}\n"
+            f"   <i>{html.escape(row['last_error'] or '')}</i>"
+        )
+    lines.append("\n/etkinlestir &lt;numara|url&gt; ile yeniden açabilirsiniz.")
+    await update.message.reply_text("\n".join(lines)[:4096], parse_mode='HTML', disable_web_page_preview=True)
+
+async def enable_feed(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/etkinlestir <url|numara> komutu"""
+    if not await require_admin(update, context):
+        return
+    if not context.args:
+        await update.message.reply_text("Kullanım: /etkinlestir <url|numara> (numara /saglik listesinden)")
+        return
+    target = context.args[0]
+    if bot_logic.role != 'all':
+        bot_logic.load_feed_health()
+    if target.isdigit():
+        rows = bot_logic.health.unhealthy()
+        index = int(target) - 1
+        if not 0 <= index < len(rows):
+            await update.message.reply_text("Geçersiz numara.")
+            return
+        target = rows[index]['url']
+    if not bot_logic.health.enable(target):
+        await update.message.reply_text("Bu URL için sağlık kaydı yok.")
+        return
+    bot_logic.save_feed_health()
+    # Bir sonraki tikte hemen yoklansın
+    if target in bot_logic.scheduler.state:
+        bot_logic.scheduler.state[target]['next_due'] = 0
+    await update.message.reply_text(f"✅ Feed yeniden etkinleştirildi: {target}")
+
+async def process_news_batch(news_items: List[Dict], sender: SendQueue):
+    """Bir parti haberi analiz et, biçimlendir ve hedef sohbetlerin kuyruğuna al.
+    Analiz ve biçimlendirme haber başına bir kez yapılır, sohbet sayısından bağımsızdır."""
+    # 2. AI Analizi (ayrı, eşzamanlı aşama; özet modunda analiz gösterilmediği için atlanır)
+    metrics = bot_logic.metrics
+    if bot_logic.digest is None:
+        with metrics.stage('ai'):
+            await bot_logic.analyze_news(news_items)
+        # Analiz uzun sürebilir: koordinatör kirası başkasına geçtiyse gönderme
+        if not bot_logic.still_coordinator():
+            return
     
+    # Düz metin ingest sırasında çıkarıldı; eksikse burada tamamlanır
+    await bot_logic.extract_texts(news_items)
+    
+    for news in news_items:
+        # 3. Mesaj Formatı
+        clean_summary = news['clean_text'][:350] + "..."
+        news['clean_summary'] = clean_summary
+    
+        msg = (
+            f"📰 <b>{news['title']}</b>\n"
+            f"ℹ️ <i>{news['source']}</i>\n"
+            f"─────────────────────\n"
+            f"{clean_summary}\n\n"
+            f"🔗 <a href='{news['link']}'>Haberi Oku</a>"
+        )
+    
+        if news.get('alternates'):
+            sources = ", ".join(
+                f"<a href='{html.escape(alt['link'], quote=True)}'>{html.escape(alt['source'])}</a>"
+                for alt in news['alternates']
+            )
+            msg += f"\n🔁 Diğer kaynaklar: {sources}"
+    
+        if news.get('analysis'):
+            msg += f"\n\n🧠 <b>AI Analizi</b>\n{news['analysis']}"
+
+        category = news.get('category', 'General')
+        targets = news.get('targets') or []
+        news['pending_chats'] = set(targets)
+        metrics.inc('items_queued_total', mode='digest' if bot_logic.digest is not None else 'single')
+        for chat_id in targets:
+            # 4. Topic (Konu) Belirleme: sohbetin kendi eşlemesi, yoksa topics.json
+            topic_id = bot_logic.subscribers.topic_for(chat_id, category, bot_logic.topics)
+
+            # 5. Özet modunda biriktir, değilse gönderim kuyruğuna al
+            #    (gönderilince işaretlenir ve arşivlenir)
+            if bot_logic.digest is not None:
+                bot_logic.digest.add(chat_id, topic_id, category, news)
+                continue
+            sender.put(
+                chat_id,
+                msg,
+                message_thread_id=topic_id,
+                keys=news_keys(news),
+                on_sent=lambda news=news, chat_id=chat_id: bot_logic.on_news_delivered(news, chat_id),
+                parse_mode='HTML'
+            )
+
+async def check_feeds_job(context: ContextTypes.DEFAULT_TYPE):
+    """Periyodik haber kontrol işi (tüm sohbetler için tek çekim)"""
     # Config'i yenile (dosya değişikliklerini al)
     bot_logic.load_config()
+    sender = bot_logic.get_sender(context.bot)
+    metrics = bot_logic.metrics
     
-    news_items = bot_logic.fetch_feeds()
+    if bot_logic.role == 'coordinator':
+        # Feedleri worker'lar çeker; koordinatör sadece kuyruğu tüketir
+        if not bot_logic.hold_coordinator():
+            await bot_logic.resign_coordinator()
+            bot_logic.update_gauges()
+            return
+        bot_logic.maintain_storage()
+        # Önceki tiklerde teslim edilenler kuyruktan silinir
+        bot_logic.settle_ingest()
+        if not bot_logic.storage.ingest_depth(claimable_by=bot_logic.shard.worker_id):
+            bot_logic.flush_digests(sender)
+            bot_logic.update_gauges()
+            return
+        source = bot_logic.stream_ingested(int(os.getenv('INGEST_CLAIM_SIZE', '1000')))
+    else:
+        bot_logic.maintain_storage()
+        # Sadece zamanı gelmiş feedleri çek
+        due = bot_logic.due_feeds()
+        if not due:
+            bot_logic.flush_digests(sender)
+            bot_logic.update_gauges()
+            return
+        metrics.set('feeds_due', len(due))
+        source = bot_logic.stream_news(due)
+    batch_size = int(os.getenv('PIPELINE_BATCH_SIZE', '20'))
+    metrics.inc('cycles_total')
     
-    for news in news_items:
-        news_hash = bot_logic.get_news_hash(news['title'], news['link'])
+    with metrics.stage('cycle'):
+        try:
+            # 1. Fetch → tarih → dedup → filtre hattından küçük partiler halinde al
+            batch = []
+            total = 0
+            async for news in source:
+                news['category'] = bot_logic.categorize_news(news)
+                batch.append(news)
+                if len(batch) >= batch_size:
+                    # Uzun döngüde koordinatör kirası her parti öncesi uzatılır; kaybedilirse durulur
+                    if not bot_logic.still_coordinator():
+                        break
+                    await process_news_batch(batch, sender)
+                    total += len(batch)
+                    batch = []
+            else:
+                if batch and bot_logic.still_coordinator():
+                    await process_news_batch(batch, sender)
+                    total += len(batch)
         
-        if not bot_logic.is_news_sent(news_hash):
-            # 1. Filtre Kontrolü
-            if not bot_logic.check_filters(news['title'], news['summary']):
-                continue
-                
-            # 2. AI Analizi
-            if bot_logic.ai_client:
-                analysis = bot_logic.analyze_news(news['title'], news['summary'], news['source'])
-                if analysis:
-                    news['analysis'] = analysis
-            
-            # 3. Mesaj Formatı
-            # HTML temizliği
-            soup = BeautifulSoup(news['summary'], "html.parser")
-            clean_summary = soup.get_text(separator=" ", strip=True)[:350] + "..."
-            
-            msg = (
-                f"📰 <b>{news['title']}</b>\n"
-                f"ℹ️ <i>{news['source']}</i>\n"
-                f"─────────────────────\n"
-                f"{clean_summary}\n\n"
-                f"🔗 <a href='{news['link']}'>Haberi Oku</a>"
-            )
-            
-            if news.get('analysis'):
-                msg += f"\n\n🧠 <b>AI Analizi</b>\n{news['analysis']}"
+            if bot_logic.still_coordinator():
+                bot_logic.flush_digests(sender)
+            if total:
+                logger.info(
+                    f"{total} haber {len(bot_logic.subscribers)} sohbet için kuyruğa alındı (kuyruk: {sender.depth()})"
+                )
+        finally:
+            # Döngünün tüm yazmaları tek transaction ile
+            bot_logic.flush_storage()
+            bot_logic.flush_daily_news()
+    if bot_logic.role == 'coordinator':
+        if bot_logic.coordinator_active:
+            bot_logic.settle_ingest()
+        else:
+            logger.warning("Koordinatör kirası döngü sırasında kaybedildi, gönderim durduruluyor")
+            await bot_logic.resign_coordinator()
+    bot_logic.update_gauges()
 
-            # 4. Topic (Konu) Belirleme
-            topic_id = None
-            category = news.get('category', 'General')
-            if category in bot_logic.topics and bot_logic.topics[category]:
-                topic_id = bot_logic.topics[category]
+async def worker_tick():
+    """Worker: kiralanan ve zamanı gelmiş feedleri çekip koordinatörün kuyruğuna yaz"""
+    bot_logic.load_config()
+    due = bot_logic.due_feeds()
+    if not due:
+        return
+    metrics = bot_logic.metrics
+    metrics.inc('cycles_total')
+    metrics.set('feeds_due', len(due))
+    with metrics.stage('cycle'):
+        try:
+            enqueued = await bot_logic.ingest_feeds(due)
+        finally:
+            bot_logic.flush_storage()
+    if enqueued:
+        logger.info(f"{enqueued} haber koordinatör kuyruğuna yazıldı ({len(due)} feed)")
 
-            # 5. Gönder
+async def run_worker():
+    """BOT_ROLE=worker: Telegram'a bağlanmadan tik döngüsü; SIGTERM/SIGINT ile kiraları bırakıp çıkar"""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    tick = float(os.getenv('POLL_TICK', '30'))
+    logger.info(f"Worker başlatıldı: {bot_logic.shard.worker_id} (tik {tick:g} sn)")
+    try:
+        while not stop.is_set():
             try:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=msg,
-                    parse_mode='HTML',
-                    message_thread_id=topic_id
-                )
-                
-                bot_logic.mark_news_sent(news_hash, news['title'], news['link'])
-                bot_logic.save_news_to_db(news, news_hash)
-                
-                # Rate limit
-                await asyncio.sleep(2)
-                
+                await worker_tick()
             except Exception as e:
-                logger.error(f"Gönderim hatası: {e}")
+                logger.error(f"Worker döngü hatası: {e}")
+            bot_logic.update_gauges()
+            try:
+                await asyncio.wait_for(stop.wait(), tick)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await shutdown(None)
+        logger.info("Worker durdu, kiralar bırakıldı")
+
+async def shutdown(application: Application):
+    """Uygulama kapanırken açık kaynakları serbest bırak"""
+    if bot_logic.sender:
+        # Bekleyen özetler gönderilsin; kuyruk sınırlı bir süre boşaltılır
+        if bot_logic.role != 'coordinator' or bot_logic.coordinator_active:
+            bot_logic.flush_digests(bot_logic.sender, force=True)
+        try:
+            await asyncio.wait_for(bot_logic.sender.join(), float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '15')))
+        except asyncio.TimeoutError:
+            logger.warning(f"Kapanışta {bot_logic.sender.depth()} mesaj gönderilemedi, sonraki çalışmada denenecek")
+        await bot_logic.sender.stop()
+    await bot_logic.fetcher.aclose()
+    if bot_logic.analyzer:
+        await bot_logic.analyzer.aclose()
+    bot_logic.flush_storage()
+    if bot_logic.role != 'worker':
+        bot_logic.flush_daily_news(force=True)
+    if bot_logic.role == 'coordinator' and bot_logic.coordinator_active:
+        # Teslim edilenler silinir, kalanlar kirayı alacak koordinatöre bırakılır
+        bot_logic.settle_ingest()
+    if bot_logic.shard is not None:
+        try:
+            bot_logic.shard.leave()
+        except Exception as e:
+            logger.error(f"Kiralar bırakılamadı: {e}")
+    bot_logic.storage.close()
+    if bot_logic.clean_pool is not None:
+        bot_logic.clean_pool.shutdown(wait=False)
+    bot_logic.metrics.stop_http_server()
 
 def main():
     token = os.getenv('TELEGRAM_TOKEN')
     chat_id = os.getenv('CHAT_ID')
     
+    if '--vacuum' in sys.argv[1:]:
+        # Çevrimdışı dönüşüm: veritabanını kullanan diğer süreçler durdurulmuşken çalıştırılır
+        sys.exit(0 if bot_logic.convert_auto_vacuum(force=True) else 1)
+    
+    metrics_port = os.getenv('METRICS_PORT')
+    if bot_logic.role == 'worker':
+        # Worker Telegram'a bağlanmaz; token gerekmez
+        if metrics_port and bot_logic.metrics.enabled:
+            bot_logic.metrics.start_http_server(int(metrics_port), os.getenv('METRICS_HOST', '127.0.0.1'))
+        asyncio.run(run_worker())
+        return
+    
     if not token:
         logger.error("Token bulunamadı!")
         return
 
+    # Tek seferlik tam VACUUM olay döngüsü başlamadan: çalışırken gönderim ve komutları durdurmasın
+    bot_logic.convert_auto_vacuum()
+
     # Application oluştur
-    application = Application.builder().token(token).build()
+    application = Application.builder().token(token).post_shutdown(shutdown).build()
 
     # Komutları ekle
     application.add_handler(CommandHandler("start", start))
@@ -507,15 +1653,30 @@ def main():
     application.add_handler(CommandHandler("ara", search_news))
     application.add_handler(CommandHandler("abone", subscribe))
     application.add_handler(CommandHandler("topicid", get_topic_id))
+    application.add_handler(CommandHandler("stats", stats))
+    application.add_handler(CommandHandler("saglik", feed_health))
+    application.add_handler(CommandHandler("etkinlestir", enable_feed))
+    application.add_handler(CommandHandler("katil", join_chat))
+    application.add_handler(CommandHandler("ayril", leave_chat))
+    application.add_handler(CommandHandler("kaynak", chat_feeds))
+    application.add_handler(CommandHandler("filtre", chat_filters))
+    application.add_handler(CommandHandler("konu", chat_topics))
+
+    # İsteğe bağlı Prometheus uç noktası
+    if metrics_port and bot_logic.metrics.enabled:
+        bot_logic.metrics.start_http_server(int(metrics_port), os.getenv('METRICS_HOST', '127.0.0.1'))
 
-    # Job Queue (Periyodik kontrol)
+    # Job Queue (Periyodik kontrol): tüm abone sohbetler için tek iş
+    job_queue = application.job_queue
+    # Zamanlayıcı her tikte sadece zamanı gelmiş feedleri yoklar
+    tick = float(os.getenv('POLL_TICK', '30'))
+    job_queue.run_repeating(check_feeds_job, interval=tick, first=10)
     if chat_id:
-        job_queue = application.job_queue
-        # İlk çalışmada hemen, sonra her 300 saniyede bir (5 dk)
-        job_queue.run_repeating(check_feeds_job, interval=300, first=10, chat_id=chat_id)
-        logger.info(f"Bot başlatıldı. Hedef Chat ID: {chat_id}")
+        logger.info(f"Bot başlatıldı. Hedef Chat ID: {chat_id}, toplam {len(bot_logic.subscribers)} sohbet")
+    elif len(bot_logic.subscribers):
+        logger.info(f"Bot başlatıldı. {len(bot_logic.subscribers)} abone sohbet")
     else:
-        logger.warning("CHAT_ID bulunamadı! Otomatik haber gönderimi çalışmayacak.")
+        logger.warning("CHAT_ID ve abone sohbet yok! Sohbetler /katil ile eklenebilir.")
 
     # Botu çalıştır
     application.run_polling(allowed_updates=Update.ALL_TYPES)
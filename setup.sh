@@ -279,6 +279,13 @@ if [ ! -f feeds_db.txt ]; then
     python3 generate_feeds_db.py
 fi
 
+# Write feeds.json atomically (temp file + rename) so the bot never reads a half-written file
+write_feeds_json() {
+    local tmp_feeds
+    tmp_feeds=$(mktemp feeds.json.XXXXXX) || return 1
+    echo "$1" > "$tmp_feeds" && chmod 644 "$tmp_feeds" && mv -f "$tmp_feeds" feeds.json
+}
+
 configure_feeds=true
 if [ -f feeds.json ]; then
     read -p "$MSG_FEEDS_RECREATE" recreate_feeds
@@ -501,11 +508,11 @@ except:
     json_content+="]"
 
     if [ $count -gt 0 ]; then
-        echo "$json_content" > feeds.json
+        write_feeds_json "$json_content"
         echo -e "${GREEN}${MSG_FEEDS_SAVED}${NC}"
     else
         echo -e "${RED}${MSG_FEEDS_NONE}${NC}"
-        echo "[]" > feeds.json
+        write_feeds_json "[]"
     fi
     rm selected_lines.txt 2>/dev/null
 
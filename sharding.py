@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Feedlerin worker süreçleri arasında paylaştırılması
+Her worker ortak veritabanına düzenli kalp atışı yazar. Canlı worker'lardan
+bir tutarlı hash halkası kurulur; her feed halkada kendisine düşen worker'a
+aittir. Sahiplik veritabanındaki süreli kiralarla (leases) kesinleşir: bir
+worker sadece kirasını tuttuğu feedleri çeker. Worker katılınca halka değişir,
+eski sahip kendisine düşmeyen kiraları bir sonraki tikte bırakır; worker
+ölürse kalp atışı ve kiraları lease_ttl sonunda düşer ve feedleri kalanlara
+geçer. Tutarlı hash sayesinde değişiklikte sadece ~1/N feed yer değiştirir.
+
+Worker'lar Telegram'a göndermez: ayrıştırılmış, tekilleştirilmiş ve düz metni
+çıkarılmış haberleri ingest_queue tablosuna yazar. Gönderim, sent_news ve
+hız sınırları tek bir koordinatörde kalır ("coordinator" kirası). Koordinatör
+kayıtları sahiplenir ama ancak haber gönderildikten ya da elendikten sonra
+siler; kirayı kaybeden ya da çöken koordinatörün yarım işi yenisine geçer.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+FEED_LEASE_PREFIX = 'feed:'
+COORDINATOR_LEASE = 'coordinator'
+
+# Kuyruğa yazılan alanlar (feedparser nesnesi değil, sadece hattın ihtiyacı)
+INGEST_FIELDS = (
+    'title', 'link', 'guid', 'summary', 'published', 'source', 'category', 'feed_url',
+    'news_hash', 'url_hash', 'clean_text',
+)
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Teslim edilemeyip tekrar tekrar denenen kayıtlar, tarih filtresi penceresi dolunca atılır
+INGEST_MAX_AGE = 24 * 3600
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def pack_ingest(news: Dict) -> str:
+    record = {field: news.get(field) for field in INGEST_FIELDS}
+    if isinstance(record['published'], datetime):
+        record['published'] = record['published'].strftime(DATE_FORMAT)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def unpack_ingest(payload: str) -> Dict:
+    news = json.loads(payload)
+    try:
+        news['published'] = datetime.strptime(news['published'], DATE_FORMAT)
+    except (TypeError, ValueError):
+        news['published'] = datetime.now()
+    return news
+
+
+class HashRing:
+    def __init__(self, members: List[str], replicas: int = 64):
+        # Her üye halkada replicas kadar sanal noktayla temsil edilir (dengeli dağılım)
+        points = sorted((_point(f"{member}#{i}"), member) for member in set(members) for i in range(replicas))
+        self._points = [point for point, _ in points]
+        self._members = [member for _, member in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._members[index]
+
+
+class ShardMember:
+    def __init__(self, storage, worker_id: Optional[str] = None, lease_ttl: float = 90, replicas: int = 64):
+        self.storage = storage
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_ttl = lease_ttl
+        self.replicas = replicas
+        self.host = socket.gethostname()
+        self.owned: List[str] = []
+        self.live: List[str] = []
+
+    def heartbeat(self, now: Optional[float] = None) -> List[str]:
+        """Kalp atışı yaz; canlı worker listesini (kendisi dahil) döndür"""
+        now = time.time() if now is None else now
+        self.storage.heartbeat_worker(self.worker_id, self.host, os.getpid(), now)
+        self.live = self.storage.live_workers(now - self.lease_ttl)
+        return self.live
+
+    def rebalance(self, urls: List[str], now: Optional[float] = None) -> List[str]:
+        """Halkaya göre bu worker'a düşen feedlerin kiralarını al; kirası tutulan feedleri döndür"""
+        now = time.time() if now is None else now
+        ring = HashRing(self.heartbeat(now), self.replicas)
+        wanted = [url for url in urls if ring.owner(url) == self.worker_id]
+        # Artık bize düşmeyenleri hemen bırak: yeni sahibi kiranın dolmasını beklemesin
+        wanted_set = set(wanted)
+        released = [url for url in self.owned if url not in wanted_set]
+        if released:
+            self.storage.release_leases(self.worker_id, [FEED_LEASE_PREFIX + url for url in released])
+        held = self.storage.acquire_leases(
+            [FEED_LEASE_PREFIX + url for url in wanted], self.worker_id, now + self.lease_ttl, now
+        )
+        self.owned = [name[len(FEED_LEASE_PREFIX):] for name in held]
+        return self.owned
+
+    def hold(self, name: str, now: Optional[float] = None) -> bool:
+        """Tekil bir kirayı (ör. koordinatör) al ya da uzat"""
+        now = time.time() if now is None else now
+        return bool(self.storage.acquire_leases([name], self.worker_id, now + self.lease_ttl, now))
+
+    def leave(self):
+        """Kayıt ve kiraları bırak (düzgün kapanış)"""
+        self.storage.remove_worker(self.worker_id)
+        self.owned = []
@@ -0,0 +1,869 @@
+#!/usr/bin/env python3
+"""
+SQLite depolama katmanı
+Tek ve kalıcı bir bağlantı (WAL modu, ayarlı pragmalar) üzerinden çalışır.
+Yazmalar tamponlanır ve döngü sonunda tek bir transaction ile işlenir;
+sabit SQL metinleri sayesinde sqlite3'ün hazır ifade önbelleği yeniden kullanılır.
+"""
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from dedup import DedupIndex
+from identity import url_hash as canonical_url_hash
+from text_utils import strip_tags, turkish_fold
+
+logger = logging.getLogger(__name__)
+
+PRAGMAS = (
+    # Yeni veritabanlarında geçerli; mevcutlar bir kez VACUUM ile dönüştürülür (ensure_incremental_vacuum)
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# /sonhaberler sonuç önbelleğinin en fazla (kategori, limit) anahtar sayısı
+LATEST_CACHE_SIZE = 32
+
+SQL_IS_SENT = "SELECT 1 FROM sent_news WHERE news_hash = ?"
+SQL_IS_SENT_URL = "SELECT 1 FROM sent_news WHERE url_hash = ?"
+SQL_INSERT_SENT = "INSERT OR IGNORE INTO sent_news (news_hash, title, link, url_hash) VALUES (?, ?, ?, ?)"
+SQL_IS_CHAT_SENT = "SELECT 1 FROM chat_sent WHERE chat_id = ? AND key = ?"
+SQL_INSERT_CHAT_SENT = "INSERT OR IGNORE INTO chat_sent (chat_id, key) VALUES (?, ?)"
+SQL_UPSERT_SUBSCRIBER = (
+    "INSERT INTO subscribers (chat_id, feeds, filters, topics) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(chat_id) DO UPDATE SET feeds = excluded.feeds, filters = excluded.filters, "
+    "topics = excluded.topics, updated_at = CURRENT_TIMESTAMP"
+)
+SQL_INSERT_ARCHIVE = '''
+    INSERT OR IGNORE INTO news_archive
+    (news_hash, source, category, title, summary, link, published_date, analysis, feed_url, simhash, clean_text)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Kira boşsa, süresi dolmuşsa ya da zaten bizdeyse alınır/uzatılır
+SQL_ACQUIRE_LEASE = (
+    "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+    "WHERE leases.owner = excluded.owner OR leases.expires_at < ?"
+)
+SQL_UPSERT_WORKER = (
+    "INSERT INTO workers (worker_id, host, pid, started_at, heartbeat) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(worker_id) DO UPDATE SET heartbeat = excluded.heartbeat"
+)
+SQL_INSERT_INGEST = (
+    "INSERT OR IGNORE INTO ingest_queue (news_hash, feed_url, payload, worker_id, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+SQL_UPSERT_FEED_CACHE = (
+    "INSERT OR REPLACE INTO feed_cache (url, etag, last_modified, updated_at) "
+    "VALUES (?, ?, ?, CURRENT_TIMESTAMP)"
+)
+SQL_DELETE_FEED_CACHE = "DELETE FROM feed_cache WHERE url = ?"
+FEED_HEALTH_COLUMNS = (
+    'consecutive_failures', 'total_failures', 'total_successes', 'last_success',
+    'last_failure', 'last_error', 'avg_latency', 'retry_at', 'disabled',
+)
+SQL_UPSERT_FEED_HEALTH = (
+    f"INSERT OR REPLACE INTO feed_health (url, {', '.join(FEED_HEALTH_COLUMNS)}, updated_at) "
+    f"VALUES (?, {', '.join('?' for _ in FEED_HEALTH_COLUMNS)}, CURRENT_TIMESTAMP)"
+)
+SQL_INSERT_FTS = "INSERT INTO news_fts (rowid, title, summary) VALUES (?, ?, ?)"
+# External content tablosunda silme, indekslenen değerlerin aynısını ister
+SQL_DELETE_FTS = "INSERT INTO news_fts (news_fts, rowid, title, summary) VALUES ('delete', ?, ?, ?)"
+SQL_SELECT_ARCHIVE_FULL = (
+    "SELECT id, news_hash, source, category, title, summary, link, published_date, analysis, "
+    "created_at, feed_url, clean_text FROM news_archive "
+    "WHERE created_at < datetime('now', ?) ORDER BY id LIMIT ?"
+)
+ARCHIVE_FULL_COLUMNS = (
+    'id', 'news_hash', 'source', 'category', 'title', 'summary', 'link', 'published_date', 'analysis',
+    'created_at', 'feed_url', 'clean_text',
+)
+
+FTS_BATCH_SIZE = 1000
+BACKFILL_BATCH_SIZE = 5000
+_QUERY_TOKEN_RE = re.compile(r'\w+')
+
+
+def fts_values(title: Optional[str], summary: Optional[str], clean_text: Optional[str]) -> Tuple[str, str]:
+    """FTS indeksine yazılan (başlık, metin) değerleri.
+    clean_text'i olmayan (eski) satırlar strip_tags ile indekslendi; silme de aynısını kullanır."""
+    text = clean_text if clean_text is not None else strip_tags(summary or '')
+    return turkish_fold(title or ''), turkish_fold(text)
+
+
+def fts_match(query: str) -> Optional[str]:
+    """Arama metnini FTS5 MATCH ifadesine çevir: her kelime önek olarak, AND ile"""
+    tokens = _QUERY_TOKEN_RE.findall(turkish_fold(query))
+    if not tokens:
+        return None
+    # "yapay zek" -> "yapay"* AND "zek"*
+    return ' AND '.join(f'"{token}"*' for token in tokens)
+
+
+def _migrate_feed_url(cursor: sqlite3.Cursor):
+    """news_archive.feed_url sütunu"""
+    # Yayın sıklığını feed bazında öğrenmek için kaynak URL
+    cursor.execute("PRAGMA table_info(news_archive)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'feed_url' not in columns:
+        cursor.execute("ALTER TABLE news_archive ADD COLUMN feed_url TEXT")
+
+
+def _migrate_fts(cursor: sqlite3.Cursor):
+    """news_fts tam metin indeksi ve meta tablosu"""
+    # İçerik news_archive'da kalır (external content), indekse Türkçe katlanmış
+    # metin yazılır; senkronu ingestion yolu yapar
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, summary,
+            content='news_archive', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+def _migrate_archive_indexes(cursor: sqlite3.Cursor):
+    """news_archive tarih / kategori / kaynak indeksleri"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_published ON news_archive (published_date)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_archive_category_published ON news_archive (category, published_date)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_source ON news_archive (source)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_feed_published ON news_archive (feed_url, published_date)")
+
+
+def _migrate_simhash(cursor: sqlite3.Cursor):
+    """news_archive.simhash sütunu (yakın-kopya tespiti)"""
+    cursor.execute("PRAGMA table_info(news_archive)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'simhash' not in columns:
+        cursor.execute("ALTER TABLE news_archive ADD COLUMN simhash INTEGER")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archive_created ON news_archive (created_at)")
+
+
+def _migrate_url_hash(cursor: sqlite3.Cursor):
+    """sent_news.url_hash sütunu (kanonik URL kimliği)"""
+    cursor.execute("PRAGMA table_info(sent_news)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'url_hash' not in columns:
+        cursor.execute("ALTER TABLE sent_news ADD COLUMN url_hash TEXT")
+    # Eski kayıtların news_hash'i başlık+link'ten üretilmişti; linkin kanonik
+    # hash'i eklenince aynı haber yeni kimlik şemasıyla da "görülmüş" sayılır
+    last_id = 0
+    while True:
+        rows = cursor.execute(
+            "SELECT id, link FROM sent_news WHERE id > ? AND url_hash IS NULL ORDER BY id LIMIT ?",
+            (last_id, BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        cursor.executemany(
+            "UPDATE sent_news SET url_hash = ? WHERE id = ?",
+            [(canonical_url_hash(link), row_id) for row_id, link in rows]
+        )
+        last_id = rows[-1][0]
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sent_url_hash ON sent_news (url_hash)")
+
+
+def _migrate_feed_health(cursor: sqlite3.Cursor):
+    """feed_health tablosu (feed bazında hata / gecikme durumu)"""
+    # Zamanlar unix saniyesi; retry_at'e kadar feed yoklanmaz
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feed_health (
+            url TEXT PRIMARY KEY,
+            consecutive_failures INTEGER NOT NULL DEFAULT 0,
+            total_failures INTEGER NOT NULL DEFAULT 0,
+            total_successes INTEGER NOT NULL DEFAULT 0,
+            last_success REAL,
+            last_failure REAL,
+            last_error TEXT,
+            avg_latency REAL,
+            retry_at REAL NOT NULL DEFAULT 0,
+            disabled INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migrate_clean_text(cursor: sqlite3.Cursor):
+    """news_archive.clean_text sütunu (ingest sırasında çıkarılan düz metin)"""
+    cursor.execute("PRAGMA table_info(news_archive)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'clean_text' not in columns:
+        cursor.execute("ALTER TABLE news_archive ADD COLUMN clean_text TEXT")
+
+
+def _migrate_subscribers(cursor: sqlite3.Cursor):
+    """subscribers ve chat_sent tabloları (çoklu sohbet teslimi)"""
+    # feeds / filters / topics JSON; NULL ise feeds.json / filters.json / topics.json kullanılır
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subscribers (
+            chat_id TEXT PRIMARY KEY,
+            feeds TEXT,
+            filters TEXT,
+            topics TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Sohbet bazında teslim edilen anahtarlar (news_hash ve url_hash)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_sent (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (chat_id, key)
+        )
+    ''')
+
+
+def _migrate_sharding(cursor: sqlite3.Cursor):
+    """workers, leases ve ingest_queue tabloları (worker süreçlerine bölme)"""
+    # Zamanlar unix saniyesi; heartbeat'i kira süresinden eski worker ölü sayılır
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            host TEXT,
+            pid INTEGER,
+            started_at REAL,
+            heartbeat REAL NOT NULL
+        )
+    ''')
+    # "feed:<url>" ve "coordinator" kiraları
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leases_owner ON leases (owner)")
+    # Worker'ların ayrıştırıp koordinatöre bıraktığı haberler (JSON)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            news_hash TEXT UNIQUE NOT NULL,
+            feed_url TEXT,
+            payload TEXT NOT NULL,
+            worker_id TEXT,
+            created_at REAL NOT NULL
+        )
+    ''')
+
+
+def _migrate_ingest_claims(cursor: sqlite3.Cursor):
+    """ingest_queue: koordinatör kayıtları silmeden sahiplenir, teslimden sonra siler"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(ingest_queue)")}
+    if 'claimed_by' not in columns:
+        cursor.execute("ALTER TABLE ingest_queue ADD COLUMN claimed_by TEXT")
+    if 'claimed_at' not in columns:
+        cursor.execute("ALTER TABLE ingest_queue ADD COLUMN claimed_at REAL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ingest_claimed ON ingest_queue (claimed_by)")
+
+
+def _migrate_legacy_url_keys(cursor: sqlite3.Cursor):
+    """Başlık+link hash'iyle kaydedilmiş eski sent_news satırlarının sınırı.
+    guid'li girdiler url_hash ile sadece bu satırlara karşı kontrol edilir."""
+    cursor.execute(
+        "INSERT OR IGNORE INTO meta (key, value) SELECT 'legacy_sent_max_id', COALESCE(MAX(id), 0) FROM sent_news"
+    )
+
+
+# (sürüm, göç) çiftleri; yeni göçler her zaman sona eklenir
+MIGRATIONS = [
+    (1, _migrate_feed_url),
+    (2, _migrate_fts),
+    (3, _migrate_archive_indexes),
+    (4, _migrate_simhash),
+    (5, _migrate_url_hash),
+    (6, _migrate_feed_health),
+    (7, _migrate_clean_text),
+    (8, _migrate_subscribers),
+    (9, _migrate_sharding),
+    (10, _migrate_ingest_claims),
+    (11, _migrate_legacy_url_keys),
+]
+
+
+class NewsStorage:
+    def __init__(self, db_path: str, flush_size: int = 50, dedup_max_entries: int = 100000):
+        self.db_path = db_path
+        self.flush_size = flush_size
+        self._lock = threading.RLock()
+        self._pending_sent: List[Tuple] = []
+        self._pending_archive: List[Tuple] = []
+        self._pending_chat_sent: List[Tuple] = []
+        # (kategori, limit) -> son haberler; arşive yeni satır yazılınca boşaltılır.
+        # Kategori kullanıcıdan gelir: en son kullanılan LATEST_CACHE_SIZE sonuç tutulur (LRU)
+        self._latest_cache: Dict[Tuple[Optional[str], int], List[Tuple]] = {}
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        self.init_schema()
+        self.legacy_sent_max_id = int(self.get_meta('legacy_sent_max_id', '0'))
+        self.sent_index = DedupIndex(dedup_max_entries)
+        self.load_sent_index()
+        # Eski şemayla yazılmış satırların url_hash'leri (guid'li girdiler sadece bunlara karşı denetlenir)
+        self.legacy_index = DedupIndex(dedup_max_entries)
+        self.load_legacy_index()
+        self.chat_sent_index = DedupIndex(dedup_max_entries)
+        self.load_chat_sent_index()
+        # Mevcut veritabanları için tek seferlik FTS doldurma (kaldığı yerden devam eder)
+        self.sync_fts()
+
+    def init_schema(self):
+        """Tabloları oluştur"""
+        with self.transaction() as cursor:
+            # Gönderilen haberlerin takibi için (Deduplication)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sent_news (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    news_hash TEXT UNIQUE NOT NULL,
+                    title TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Koşullu GET için feed doğrulayıcıları (ETag / Last-Modified)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS feed_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Tüm haberlerin detaylı arşivi için (Full History)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_archive (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    news_hash TEXT UNIQUE NOT NULL,
+                    source TEXT,
+                    category TEXT,
+                    title TEXT,
+                    summary TEXT,
+                    link TEXT,
+                    published_date TIMESTAMP,
+                    analysis TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+        self.migrate()
+
+    def migrate(self):
+        """PRAGMA user_version'a göre bekleyen şema göçlerini sırayla uygula"""
+        current = self.query("PRAGMA user_version")[0][0]
+        for version, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            with self.transaction() as cursor:
+                cursor.execute("BEGIN")
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+            logger.info(f"Veritabanı göçü uygulandı: v{version} ({migration.__doc__})")
+
+    @contextmanager
+    def transaction(self):
+        """Tek transaction içinde çalış; hata olursa geri al"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            try:
+                yield cursor
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    # --- Deduplication ---
+
+    def load_sent_index(self):
+        """En yeni sent_news kayıtlarını bellek içi indekse yükle"""
+        # Her kayıt iki anahtar taşır: news_hash ve url_hash
+        limit = max(1, self.sent_index.max_entries // 2)
+        total = self.query("SELECT COUNT(*) FROM sent_news")[0][0]
+        rows = self.query(
+            "SELECT news_hash, url_hash FROM "
+            "(SELECT id, news_hash, url_hash FROM sent_news ORDER BY id DESC LIMIT ?) ORDER BY id",
+            (limit,)
+        )
+        self.sent_index.load((key for row in rows for key in row if key), complete=total <= limit)
+        # Satır sayıları karşılaştırılır: bir satır iki anahtar taşıyabilir
+        logger.info(
+            f"Tekilleştirme indeksi yüklendi: {len(rows)}/{total} satır ({len(self.sent_index)} anahtar)"
+            + ("" if self.sent_index.complete else " (eksik, ıskalamalar SQLite'a sorulacak)")
+        )
+
+    def is_news_sent(self, news_hash: str, url_hash: Optional[str] = None) -> bool:
+        """news_hash ya da kanonik URL hash'i daha önce kaydedildiyse True"""
+        if news_hash in self.sent_index or (url_hash and url_hash in self.sent_index):
+            return True
+        if self.sent_index.complete:
+            # İndeks tam: ıskalama kesin, disk erişimi yok
+            return False
+        with self._lock:
+            if self.conn.execute(SQL_IS_SENT, (news_hash,)).fetchone() is not None:
+                return True
+            return bool(url_hash) and self.conn.execute(SQL_IS_SENT_URL, (url_hash,)).fetchone() is not None
+
+    def load_legacy_index(self):
+        """Kimlik şeması değişmeden önceki sent_news satırlarının url_hash'lerini belleğe yükle"""
+        self.legacy_index = DedupIndex(self.legacy_index.max_entries)
+        if not self.legacy_sent_max_id:
+            return
+        rows = self.query(
+            "SELECT url_hash FROM (SELECT id, url_hash FROM sent_news WHERE id <= ? AND url_hash IS NOT NULL "
+            "ORDER BY id DESC LIMIT ?) ORDER BY id",
+            (self.legacy_sent_max_id, self.legacy_index.max_entries + 1)
+        )
+        # Sınırdan fazla satır varsa en eskiler düşer ve indeks eksik sayılır
+        self.legacy_index.load((row[0] for row in rows), complete=True)
+        logger.info(f"Eski kimlik indeksi yüklendi: {len(self.legacy_index)} kayıt")
+
+    def is_legacy_sent(self, url_hash: Optional[str]) -> bool:
+        """guid'li girdi, kimlik şeması değişmeden önce (başlık+link hash'iyle) gönderilmiş mi"""
+        if not url_hash or not self.legacy_sent_max_id:
+            return False
+        if url_hash in self.legacy_index:
+            return True
+        if self.legacy_index.complete:
+            return False
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM sent_news WHERE url_hash = ? AND id <= ?", (url_hash, self.legacy_sent_max_id)
+            ).fetchone() is not None
+
+    def add_sent(self, news_hash: str, title: str, link: str, url_hash: Optional[str] = None):
+        """Gönderim kaydını tampona ve indekse ekle"""
+        with self._lock:
+            self._pending_sent.append((news_hash, title, link, url_hash))
+            self.sent_index.add(news_hash)
+            if url_hash:
+                self.sent_index.add(url_hash)
+        self._maybe_flush()
+
+    def load_chat_sent_index(self):
+        """En yeni chat_sent kayıtlarını bellek içi indekse yükle"""
+        limit = self.chat_sent_index.max_entries
+        total = self.query("SELECT COUNT(*) FROM chat_sent")[0][0]
+        rows = self.query(
+            "SELECT chat_id, key FROM (SELECT id, chat_id, key FROM chat_sent ORDER BY id DESC LIMIT ?) ORDER BY id",
+            (limit,)
+        )
+        self.chat_sent_index.load((f"{chat_id}:{key}" for chat_id, key in rows), complete=total <= limit)
+
+    def is_chat_sent(self, chat_id: str, keys: List[str]) -> bool:
+        """Anahtarlardan biri bu sohbete daha önce teslim edildiyse True"""
+        if any(f"{chat_id}:{key}" in self.chat_sent_index for key in keys):
+            return True
+        if self.chat_sent_index.complete:
+            return False
+        with self._lock:
+            return any(self.conn.execute(SQL_IS_CHAT_SENT, (chat_id, key)).fetchone() for key in keys)
+
+    def add_chat_sent(self, chat_id: str, keys: List[str]):
+        """Sohbete teslim edilen anahtarları tampona ve indekse ekle"""
+        with self._lock:
+            for key in keys:
+                self._pending_chat_sent.append((chat_id, key))
+                self.chat_sent_index.add(f"{chat_id}:{key}")
+        self._maybe_flush()
+
+    def add_archive(self, row: Tuple):
+        """Arşiv satırını tampona ekle"""
+        with self._lock:
+            self._pending_archive.append(row)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._pending_sent) + len(self._pending_archive) + len(self._pending_chat_sent) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Tamponlanmış yazmaları tek transaction ile işle"""
+        with self._lock:
+            if not self._pending_sent and not self._pending_archive and not self._pending_chat_sent:
+                return 0
+            sent, archive, chat_sent = self._pending_sent, self._pending_archive, self._pending_chat_sent
+            with self.transaction() as cursor:
+                if sent:
+                    cursor.executemany(SQL_INSERT_SENT, sent)
+                if archive:
+                    cursor.executemany(SQL_INSERT_ARCHIVE, archive)
+                if chat_sent:
+                    cursor.executemany(SQL_INSERT_CHAT_SENT, chat_sent)
+            self._pending_sent = []
+            self._pending_archive = []
+            self._pending_chat_sent = []
+            if archive:
+                self._latest_cache.clear()
+                self.sync_fts()
+            return len(sent) + len(archive) + len(chat_sent)
+
+    # --- Tam metin indeksi ---
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        rows = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def sync_fts(self) -> int:
+        """news_archive'a eklenen yeni satırları FTS indeksine işle (küçük partiler halinde)"""
+        indexed = 0
+        with self._lock:
+            last_id = int(self.get_meta('fts_last_id', '0'))
+            while True:
+                rows = self.query(
+                    "SELECT id, title, summary, clean_text FROM news_archive WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, FTS_BATCH_SIZE)
+                )
+                if not rows:
+                    break
+                with self.transaction() as cursor:
+                    cursor.executemany(SQL_INSERT_FTS, [
+                        (row_id,) + fts_values(title, summary, clean_text)
+                        for row_id, title, summary, clean_text in rows
+                    ])
+                    last_id = rows[-1][0]
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('fts_last_id', ?)", (str(last_id),)
+                    )
+                indexed += len(rows)
+                if len(rows) == FTS_BATCH_SIZE:
+                    logger.info(f"FTS indeksi dolduruluyor: {indexed} satır işlendi")
+        return indexed
+
+    # --- Feed önbelleği ---
+
+    def load_feed_cache(self) -> Dict[str, Dict[str, Optional[str]]]:
+        rows = self.query("SELECT url, etag, last_modified FROM feed_cache")
+        return {url: {'etag': etag, 'last_modified': last_modified} for url, etag, last_modified in rows}
+
+    def save_feed_cache(self, changes: Dict[str, Optional[Dict]]):
+        """Değişen doğrulayıcıları kaydet (None = sil)"""
+        with self.transaction() as cursor:
+            for url, cached in changes.items():
+                if cached:
+                    cursor.execute(SQL_UPSERT_FEED_CACHE, (url, cached.get('etag'), cached.get('last_modified')))
+                else:
+                    cursor.execute(SQL_DELETE_FEED_CACHE, (url,))
+
+    def load_feed_health(self) -> Dict[str, Dict]:
+        rows = self.query(f"SELECT url, {', '.join(FEED_HEALTH_COLUMNS)} FROM feed_health")
+        health = {}
+        for url, *values in rows:
+            state = dict(zip(FEED_HEALTH_COLUMNS, values))
+            state['disabled'] = bool(state['disabled'])
+            health[url] = state
+        return health
+
+    def save_feed_health(self, changes: Dict[str, Dict]):
+        """Değişen feed sağlık durumlarını kaydet"""
+        rows = [
+            (url,) + tuple(int(state[col]) if col == 'disabled' else state[col] for col in FEED_HEALTH_COLUMNS)
+            for url, state in changes.items()
+        ]
+        with self.transaction() as cursor:
+            cursor.executemany(SQL_UPSERT_FEED_HEALTH, rows)
+
+    # --- Aboneler ---
+
+    def load_subscribers(self) -> Dict[str, Dict]:
+        """chat_id -> {'feeds', 'filters', 'topics'} (NULL alanlar None)"""
+        subscribers = {}
+        for chat_id, feeds, filters, topics in self.query(
+            "SELECT chat_id, feeds, filters, topics FROM subscribers"
+        ):
+            subscribers[chat_id] = {
+                'feeds': json.loads(feeds) if feeds is not None else None,
+                'filters': json.loads(filters) if filters is not None else None,
+                'topics': json.loads(topics) if topics is not None else None,
+            }
+        return subscribers
+
+    def save_subscriber(self, chat_id: str, feeds: Optional[List[str]] = None,
+                        filters: Optional[Dict] = None, topics: Optional[Dict] = None):
+        def dump(value):
+            return json.dumps(value, ensure_ascii=False) if value is not None else None
+
+        with self.transaction() as cursor:
+            cursor.execute(SQL_UPSERT_SUBSCRIBER, (chat_id, dump(feeds), dump(filters), dump(topics)))
+
+    def delete_subscriber(self, chat_id: str) -> bool:
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM subscribers WHERE chat_id = ?", (chat_id,))
+            return cursor.rowcount > 0
+
+    # --- Worker'lar ve kiralar ---
+
+    def heartbeat_worker(self, worker_id: str, host: str, pid: int, now: float):
+        with self.transaction() as cursor:
+            cursor.execute(SQL_UPSERT_WORKER, (worker_id, host, pid, now, now))
+
+    def live_workers(self, since: float) -> List[str]:
+        """heartbeat'i since'den yeni worker'lar"""
+        return [row[0] for row in self.query(
+            "SELECT worker_id FROM workers WHERE heartbeat >= ? ORDER BY worker_id", (since,)
+        )]
+
+    def remove_worker(self, worker_id: str):
+        """Worker kaydını ve tüm kiralarını sil (düzgün kapanış: diğerleri hemen devralır)"""
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM leases WHERE owner = ?", (worker_id,))
+            cursor.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def acquire_leases(self, names: List[str], owner: str, expires_at: float, now: float) -> List[str]:
+        """Kiraları al ya da uzat; owner'ın elindeki (istenen) kiraları döndür"""
+        with self.transaction() as cursor:
+            cursor.executemany(SQL_ACQUIRE_LEASE, [(name, owner, expires_at, now) for name in names])
+            held = {row[0] for row in cursor.execute("SELECT name FROM leases WHERE owner = ?", (owner,))}
+        return [name for name in names if name in held]
+
+    def release_leases(self, owner: str, names: List[str]):
+        with self.transaction() as cursor:
+            cursor.executemany("DELETE FROM leases WHERE name = ? AND owner = ?", [(name, owner) for name in names])
+
+    def enqueue_ingest(self, rows: List[Tuple]) -> int:
+        """(news_hash, feed_url, payload, worker_id, created_at) satırlarını kuyruğa ekle;
+        kuyrukta zaten bekleyen haberler atlanır"""
+        with self.transaction() as cursor:
+            before = self.conn.total_changes
+            cursor.executemany(SQL_INSERT_INGEST, rows)
+            return self.conn.total_changes - before
+
+    def claim_ingest(self, owner: str, limit: int = 1000, now: Optional[float] = None) -> List[str]:
+        """Kuyruğun başından en fazla limit kaydı owner adına sahiplen (silmeden).
+        Başka bir sürecin sahiplendiği kayıtlar da alınır: kirayı tutan tek koordinatör
+        owner'dır, öncekinin yarım kalan işi ona geçer."""
+        now = time.time() if now is None else now
+        with self.transaction() as cursor:
+            rows = cursor.execute(
+                "SELECT id, payload FROM ingest_queue WHERE claimed_by IS NULL OR claimed_by != ? "
+                "ORDER BY id LIMIT ?", (owner, limit)
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE ingest_queue SET claimed_by = ?, claimed_at = ? WHERE id = ?",
+                [(owner, now, row_id) for row_id, _ in rows]
+            )
+        return [payload for _, payload in rows]
+
+    def ack_ingest(self, news_hashes: List[str]):
+        """Sonuçlanan (gönderilen ya da elenen) haberleri kuyruktan sil"""
+        with self.transaction() as cursor:
+            cursor.executemany("DELETE FROM ingest_queue WHERE news_hash = ?", [(h,) for h in news_hashes])
+
+    def release_ingest(self, owner: str, news_hashes: Optional[List[str]] = None):
+        """owner'ın sahiplendiği kayıtları (verilmezse tümünü) tekrar alınabilir yap"""
+        with self.transaction() as cursor:
+            if news_hashes is None:
+                cursor.execute("UPDATE ingest_queue SET claimed_by = NULL WHERE claimed_by = ?", (owner,))
+            else:
+                cursor.executemany(
+                    "UPDATE ingest_queue SET claimed_by = NULL WHERE news_hash = ? AND claimed_by = ?",
+                    [(h, owner) for h in news_hashes]
+                )
+
+    def expire_ingest(self, before: float) -> int:
+        """before'dan önce kuyruğa girmiş (tekrar tekrar teslim edilemeyen) kayıtları sil"""
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM ingest_queue WHERE created_at < ?", (before,))
+            return cursor.rowcount
+
+    def ingest_depth(self, claimable_by: Optional[str] = None) -> int:
+        """Kuyruktaki kayıtlar; claimable_by verilirse sadece o sürecin sahiplenebilecekleri"""
+        if claimable_by is None:
+            return self.query("SELECT COUNT(*) FROM ingest_queue")[0][0]
+        return self.query(
+            "SELECT COUNT(*) FROM ingest_queue WHERE claimed_by IS NULL OR claimed_by != ?", (claimable_by,)
+        )[0][0]
+
+    # --- Arşiv sorguları ---
+
+    def feed_publish_dates(self, since: str) -> List[Tuple]:
+        return self.query(
+            "SELECT feed_url, published_date FROM news_archive "
+            "WHERE feed_url IS NOT NULL AND published_date >= ?",
+            (since,)
+        )
+
+    def recent_simhashes(self, hours: float) -> List[Tuple]:
+        """Yakın-kopya penceresi için son arşiv kayıtlarının parmak izleri"""
+        return self.query(
+            "SELECT simhash, news_hash, source, link, title, "
+            "CAST(strftime('%s', created_at) AS INTEGER) FROM news_archive "
+            "WHERE simhash IS NOT NULL AND created_at >= datetime('now', ?) ORDER BY id",
+            (f'-{hours} hours',)
+        )
+
+    def archive_rows_for_day(self, day: str) -> List[Tuple]:
+        """Günlük Excel için bir günün (yerel saat) arşiv satırları"""
+        # created_at UTC saklanır: yerel günü UTC aralığına çevir ki idx_archive_created kullanılsın
+        start = datetime.strptime(day, '%Y-%m-%d')
+        bounds = [
+            (start + timedelta(days=offset)).astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            for offset in (0, 1)
+        ]
+        return self.query(
+            "SELECT date(created_at, 'localtime'), time(created_at, 'localtime'), "
+            "COALESCE(source, 'Unknown'), category, title, COALESCE(clean_text, summary), link "
+            "FROM news_archive WHERE created_at >= ? AND created_at < ? ORDER BY id",
+            tuple(bounds)
+        )
+
+    def get_analyses(self, hashes: List[str]) -> Dict[str, str]:
+        """Arşivde kayıtlı AI analizleri (news_hash -> analiz)"""
+        result = {}
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.query(
+                f"SELECT news_hash, analysis FROM news_archive WHERE news_hash IN ({placeholders}) "
+                "AND analysis IS NOT NULL AND analysis != ''",
+                tuple(chunk)
+            )
+            result.update(rows)
+        return result
+
+    def latest_news(self, limit: int = 5, category: Optional[str] = None) -> List[Tuple]:
+        """Son haberler (kategori bazında); sonuçlar yeni arşiv yazımına kadar bellekte tutulur"""
+        key = (category, limit)
+        rows = self._latest_cache.pop(key, None)
+        if rows is None:
+            if category:
+                rows = self.query(
+                    "SELECT title, link, source FROM news_archive WHERE category = ? "
+                    "ORDER BY published_date DESC LIMIT ?",
+                    (category, limit)
+                )
+            else:
+                rows = self.query(
+                    "SELECT title, link, source FROM news_archive ORDER BY published_date DESC LIMIT ?",
+                    (limit,)
+                )
+            if len(self._latest_cache) >= LATEST_CACHE_SIZE:
+                # dict ekleme sırasını korur: ilk anahtar en uzun süredir kullanılmayandır
+                del self._latest_cache[next(iter(self._latest_cache))]
+        self._latest_cache[key] = rows
+        return rows
+
+    def search_news(self, query: str, limit: int = 5) -> List[Tuple]:
+        """FTS5 ile ara; sonuçlar bm25'e göre sıralanır (başlık eşleşmesi daha ağır)"""
+        match = fts_match(query)
+        if match is None:
+            return []
+        return self.query(
+            "SELECT a.title, a.link FROM news_fts JOIN news_archive a ON a.id = news_fts.rowid "
+            "WHERE news_fts MATCH ? ORDER BY bm25(news_fts, 10.0, 1.0), a.published_date DESC LIMIT ?",
+            (match, limit)
+        )
+
+    # --- Saklama ve sıkıştırma ---
+
+    def ensure_incremental_vacuum(self) -> bool:
+        """auto_vacuum=INCREMENTAL değilse bir kez VACUUM ile dönüştür.
+        VACUUM tüm veritabanını kilitler: veritabanını paylaşan süreçlerden sadece biri çağırmalı.
+        Başka bir süreç veritabanını kullanıyorsa dönüşüm ertelenir (False)."""
+        if self.query("PRAGMA auto_vacuum")[0][0] == 2:
+            return True
+        logger.info("Veritabanı auto_vacuum=INCREMENTAL moduna dönüştürülüyor (tek seferlik VACUUM)")
+        try:
+            with self._lock:
+                self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self.conn.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"auto_vacuum dönüşümü ertelendi: {e}")
+            return False
+        return True
+
+    def prune_sent(self, retention_days: float, batch_size: int = 500) -> int:
+        """Saklama süresini aşan en eski sent_news satırlarından bir parti sil"""
+        with self.transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM sent_news WHERE id IN ("
+                "SELECT id FROM sent_news WHERE sent_at < datetime('now', ?) ORDER BY id LIMIT ?)",
+                (f'-{retention_days} days', batch_size)
+            )
+            deleted = cursor.rowcount
+            if deleted and self.legacy_sent_max_id:
+                oldest = cursor.execute("SELECT MIN(id) FROM sent_news").fetchone()[0]
+                if oldest is None or oldest > self.legacy_sent_max_id:
+                    # Eski şemayla yazılmış satırların hepsi silindi: eski kimlik denetimi artık gereksiz
+                    cursor.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_sent_max_id', '0')")
+                    self.legacy_sent_max_id = 0
+                    self.legacy_index = DedupIndex(self.legacy_index.max_entries)
+            return deleted
+
+    def prune_chat_sent(self, retention_days: float, batch_size: int = 500) -> int:
+        """Saklama süresini aşan en eski chat_sent satırlarından bir parti sil"""
+        with self.transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM chat_sent WHERE id IN ("
+                "SELECT id FROM chat_sent WHERE sent_at < datetime('now', ?) ORDER BY id LIMIT ?)",
+                (f'-{retention_days} days', batch_size)
+            )
+            return cursor.rowcount
+
+    def prune_archive(self, retention_days: float, batch_size: int = 500, cold=None) -> int:
+        """Saklama süresini aşan en eski news_archive satırlarından bir parti sil;
+        cold verilirse satırlar önce aylık soğuk arşive taşınır"""
+        with self._lock:
+            rows = [
+                dict(zip(ARCHIVE_FULL_COLUMNS, row))
+                for row in self.query(SQL_SELECT_ARCHIVE_FULL, (f'-{retention_days} days', batch_size))
+            ]
+            if not rows:
+                return 0
+            for row in rows:
+                row['search_text'] = row['clean_text'] if row['clean_text'] is not None else strip_tags(row['summary'] or '')
+            if cold is not None:
+                # Önce soğuk arşive yaz: arada kesilirse tekrar taşıma zararsız
+                cold.store(rows)
+            fts_last_id = int(self.get_meta('fts_last_id', '0'))
+            with self.transaction() as cursor:
+                cursor.executemany(SQL_DELETE_FTS, [
+                    (row['id'],) + fts_values(row['title'], row['summary'], row['clean_text'])
+                    for row in rows if row['id'] <= fts_last_id
+                ])
+                cursor.executemany("DELETE FROM news_archive WHERE id = ?", [(row['id'],) for row in rows])
+            self._latest_cache.clear()
+            return len(rows)
+
+    def incremental_vacuum(self, pages: int = 1000) -> int:
+        """Boş sayfalardan en fazla pages kadarını dosyaya geri ver"""
+        with self._lock:
+            free_before = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free_before:
+                return 0
+            self.conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return free_before - self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def close(self):
+        """Bekleyen yazmaları işle ve bağlantıyı kapat"""
+        with self._lock:
+            self.flush()
+            self.conn.close()
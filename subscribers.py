@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Çoklu sohbet (abone) yönlendirmesi
+Feedler bir kez çekilir, ayrıştırılır, temizlenir ve analiz edilir; her haber
+ancak bundan sonra ilgilenen sohbetlere dağıtılır. Her abone kendi feed alt
+kümesini, filtrelerini ve kategori -> topic eşlemesini taşıyabilir; taşımıyorsa
+feeds.json, filters.json ve topics.json geçerlidir. Aynı filtre yapılandırmasını
+paylaşan abonelerde filtre haber başına bir kez çalışır, yani bir haberin
+maliyeti sohbet sayısıyla büyümez (sadece kuyruğa alma ve gönderim büyür).
+"""
+
+import json
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from matchers import FilterSet
+
+
+class Subscriber:
+    def __init__(self, chat_id: str, feeds: Optional[List[str]] = None,
+                 filters: Optional[Dict] = None, topics: Optional[Dict] = None):
+        self.chat_id = str(chat_id)
+        # None: varsayılan yapılandırma dosyası geçerli
+        self.feeds = list(feeds) if feeds is not None else None
+        self.filters = filters
+        self.topics = topics
+        self.filter_set: Optional[FilterSet] = None
+
+
+class SubscriberRegistry:
+    def __init__(self):
+        self.subscribers: Dict[str, Subscriber] = {}
+        self.default_feeds: List[str] = []
+        self.default_filter_set = FilterSet()
+        # feed URL -> o feedi izleyen aboneler
+        self._by_feed: Dict[str, List[Subscriber]] = {}
+        # Aynı filtre yapılandırması bir kez derlenir (JSON -> FilterSet)
+        self._filter_sets: Dict[str, FilterSet] = {}
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
+
+    def __iter__(self) -> Iterator[Subscriber]:
+        return iter(self.subscribers.values())
+
+    def get(self, chat_id) -> Optional[Subscriber]:
+        return self.subscribers.get(str(chat_id))
+
+    def load(self, rows: Dict[str, Dict], default_chat: Optional[str] = None):
+        """Kayıtlı aboneleri yükle; default_chat (CHAT_ID) kaydı yoksa varsayılanlarla eklenir"""
+        subscribers = {}
+        if default_chat:
+            subscribers[str(default_chat)] = Subscriber(default_chat)
+        for chat_id, row in rows.items():
+            subscribers[str(chat_id)] = Subscriber(chat_id, row.get('feeds'), row.get('filters'), row.get('topics'))
+        compiled = {}
+        for subscriber in subscribers.values():
+            if subscriber.filters is None:
+                continue
+            key = json.dumps(subscriber.filters, sort_keys=True, ensure_ascii=False)
+            if key not in compiled:
+                compiled[key] = self._filter_sets.get(key) or FilterSet(subscriber.filters)
+            subscriber.filter_set = compiled[key]
+        self._filter_sets = compiled
+        self.subscribers = subscribers
+        self._rebuild()
+
+    def set_default_feeds(self, urls: List[str]):
+        self.default_feeds = list(urls)
+        self._rebuild()
+
+    def _rebuild(self):
+        by_feed: Dict[str, List[Subscriber]] = {}
+        for subscriber in self.subscribers.values():
+            urls = self.default_feeds if subscriber.feeds is None else subscriber.feeds
+            for url in dict.fromkeys(urls):
+                by_feed.setdefault(url, []).append(subscriber)
+        self._by_feed = by_feed
+
+    def feeds(self) -> List[str]:
+        """En az bir abonenin izlediği feedler (her biri bir kez çekilir)"""
+        return list(self._by_feed)
+
+    def route(self, news: Dict, already_sent: Callable[[str], bool]) -> Tuple[List[str], bool, Optional[str]]:
+        """Haberi isteyen sohbetler: feed alt kümesi, filtre ve sohbet bazında tekilleştirme.
+        İkinci değer, haberi isteyip zaten almış bir sohbet olup olmadığıdır; üçüncüsü,
+        haberi reddeden filtre kuralıdır (varsa, loglama için)."""
+        verdicts: Dict[int, Tuple[bool, Optional[str]]] = {}
+        targets = []
+        delivered = False
+        rejected_by = None
+        for subscriber in self._by_feed.get(news.get('feed_url'), ()):
+            filter_set = subscriber.filter_set or self.default_filter_set
+            verdict = verdicts.get(id(filter_set))
+            if verdict is None:
+                verdict = verdicts[id(filter_set)] = filter_set.check(news['title'], news['clean_text'])
+            allowed, rule = verdict
+            if not allowed:
+                rejected_by = rejected_by or rule
+                continue
+            if already_sent(subscriber.chat_id):
+                delivered = True
+            else:
+                targets.append(subscriber.chat_id)
+        return targets, delivered, rejected_by
+
+    def topics_for(self, chat_id, default_topics: Dict) -> Dict:
+        subscriber = self.get(chat_id)
+        if subscriber is None or subscriber.topics is None:
+            return default_topics
+        return subscriber.topics
+
+    def topic_for(self, chat_id, category: str, default_topics: Dict) -> Optional[int]:
+        return self.topics_for(chat_id, default_topics).get(category) or None
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Telegram gönderim kuyruğu
+Mesajlar haber çekme döngüsünden bağımsız bir kuyruktan gönderilir.
+Telegram'ın belgelenmiş sınırlarına token bucket ile uyulur:
+  - global: saniyede ~30 mesaj
+  - sohbet başına: saniyede 1 mesaj
+  - grup başına: dakikada 20 mesaj
+RetryAfter yanıtında istenen süre kadar beklenip aynı mesaj tekrar denenir;
+her (sohbet, topic) için ayrı bir şerit olduğundan topic içi sıra korunur.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from telegram.error import NetworkError, RetryAfter, TimedOut
+
+logger = logging.getLogger(__name__)
+
+LaneKey = Tuple[Union[int, str], Optional[int]]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Bir token al; yoksa dolana kadar bekle"""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SendQueue:
+    def __init__(self, bot, global_rate: float = 30.0, chat_rate: float = 1.0,
+                 group_per_minute: float = 20.0, max_retries: int = 5,
+                 on_drained: Optional[Callable[[], None]] = None, metrics=None):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_per_minute = group_per_minute
+        self.max_retries = max_retries
+        self.on_drained = on_drained
+        self.metrics = metrics
+        self._chat_buckets: Dict[Union[int, str], Tuple[TokenBucket, ...]] = {}
+        self._lanes: Dict[LaneKey, asyncio.Queue] = {}
+        self._workers: Dict[LaneKey, asyncio.Task] = {}
+        # anahtar -> bekleyen mesaj sayısı (aynı haber birden çok sohbete gidebilir)
+        self._pending_keys: Dict[str, int] = {}
+        self.stats = {'sent': 0, 'failed': 0, 'retry_after': 0}
+
+    def _buckets_for(self, chat_id: Union[int, str]) -> Tuple[TokenBucket, ...]:
+        buckets = self._chat_buckets.get(chat_id)
+        if buckets is None:
+            buckets = (TokenBucket(self.chat_rate, 1),)
+            if str(chat_id).startswith(('-', '@')):
+                # Gruplar/kanallar (negatif ID ya da @kanaladi): dakikada 20 mesaj
+                buckets += (TokenBucket(self.group_per_minute / 60, self.group_per_minute),)
+            self._chat_buckets[chat_id] = buckets
+        return buckets
+
+    def depth(self) -> int:
+        """Kuyrukta bekleyen toplam mesaj"""
+        return sum(q.qsize() for q in self._lanes.values())
+
+    def is_pending(self, key: str) -> bool:
+        """Bu anahtarla kuyruğa alınmış ama henüz gönderilmemiş mesaj var mı"""
+        return key in self._pending_keys
+
+    def put(self, chat_id: Union[int, str], text: str, message_thread_id: Optional[int] = None, keys: Iterable[str] = (),
+            on_sent: Optional[Callable[[], Optional[Awaitable]]] = None, **kwargs):
+        """Mesajı ilgili şeride ekle (bloklamaz); keys mesajın taşıdığı haber hash'leri"""
+        lane_key = (chat_id, message_thread_id)
+        queue = self._lanes.get(lane_key)
+        if queue is None:
+            queue = self._lanes[lane_key] = asyncio.Queue()
+        keys = list(keys)
+        for key in keys:
+            self._pending_keys[key] = self._pending_keys.get(key, 0) + 1
+        queue.put_nowait({
+            'chat_id': chat_id, 'text': text, 'message_thread_id': message_thread_id,
+            'keys': keys, 'on_sent': on_sent, 'kwargs': kwargs,
+        })
+        worker = self._workers.get(lane_key)
+        if worker is None or worker.done():
+            self._workers[lane_key] = asyncio.create_task(self._run_lane(lane_key, queue))
+
+    def _release_keys(self, keys: List[str]):
+        for key in keys:
+            count = self._pending_keys.get(key, 0) - 1
+            if count > 0:
+                self._pending_keys[key] = count
+            else:
+                self._pending_keys.pop(key, None)
+
+    async def _run_lane(self, lane_key: LaneKey, queue: asyncio.Queue):
+        buckets = self._buckets_for(lane_key[0])
+        while not queue.empty():
+            item = queue.get_nowait()
+            try:
+                await self._deliver(item, buckets)
+            finally:
+                self._release_keys(item['keys'])
+                queue.task_done()
+        if self.on_drained and self.depth() == 0:
+            try:
+                self.on_drained()
+            except Exception as e:
+                logger.error(f"Kuyruk boşalma işleyici hatası: {e}")
+
+    async def _deliver(self, item: Dict, buckets: Tuple[TokenBucket, ...]):
+        attempt = 0
+        while True:
+            for bucket in buckets:
+                await bucket.acquire()
+            await self.global_bucket.acquire()
+            started = time.monotonic()
+            try:
+                await self.bot.send_message(
+                    chat_id=item['chat_id'],
+                    text=item['text'],
+                    message_thread_id=item['message_thread_id'],
+                    **item['kwargs']
+                )
+            except RetryAfter as e:
+                self.stats['retry_after'] += 1
+                if self.metrics:
+                    self.metrics.inc('telegram_retry_after_total')
+                wait = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else float(e.retry_after)
+                logger.warning(f"Telegram RetryAfter: {wait:.0f} sn bekleniyor")
+                await asyncio.sleep(wait)
+                continue
+            except (TimedOut, NetworkError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self.stats['failed'] += 1
+                    logger.error(f"Gönderim hatası ({attempt} deneme): {e}")
+                    return
+                await asyncio.sleep(min(60, 2 ** attempt))
+                continue
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Gönderim hatası: {e}")
+                return
+            self.stats['sent'] += 1
+            if self.metrics:
+                self.metrics.observe('telegram_send_seconds', time.monotonic() - started)
+            if item['on_sent']:
+                try:
+                    result = item['on_sent']()
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"Gönderim sonrası işleyici hatası: {e}")
+            return
+
+    async def join(self):
+        """Tüm şeritler boşalana kadar bekle"""
+        while any(not task.done() for task in self._workers.values()):
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def stop(self):
+        """Şerit görevlerini durdur. Gönderilmemiş mesajların feed doğrulayıcıları ilerletilmediği
+        için haberler sonraki çalışmada yeniden çekilip tekrar denenir."""
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Modüller depo kökünde (paket değil): testler oradan içe aktarır
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    from storage import NewsStorage
+    store = NewsStorage(str(tmp_path / 'news_bot.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture(scope='session')
+def bot_module(tmp_path_factory):
+    """rss_telegram_bot içe aktarılırken bot_logic kurulur (log, veritabanı, Excel): geçici dizinde yapılır"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('bot'))
+    try:
+        import rss_telegram_bot
+    finally:
+        os.chdir(cwd)
+    return rss_telegram_bot
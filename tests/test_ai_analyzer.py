@@ -0,0 +1,74 @@
+import asyncio
+
+from ai_analyzer import NewsAnalyzer
+
+
+def make_analyzer(**kwargs):
+    analyzer = NewsAnalyzer(api_key='test', model='stub', base_url='http://127.0.0.1:9/v1', **kwargs)
+    calls = []
+    state = {'active': 0, 'peak': 0}
+
+    async def fake_call(title, summary, source):
+        calls.append(title)
+        state['active'] += 1
+        state['peak'] = max(state['peak'], state['active'])
+        await asyncio.sleep(0.01)
+        state['active'] -= 1
+        return None if title.startswith('fail') else f"analiz: {title}"
+
+    analyzer._call = fake_call
+    return analyzer, calls, state
+
+
+def items(*titles):
+    return [{'news_hash': f"h-{title}", 'title': title, 'summary': '', 'source': 's'} for title in titles]
+
+
+def test_cache_miss_then_hit():
+    analyzer, calls, _ = make_analyzer()
+    first = items('a', 'b')
+    asyncio.run(analyzer.analyze_many(first))
+    assert [item['analysis'] for item in first] == ['analiz: a', 'analiz: b']
+    assert sorted(calls) == ['a', 'b']
+
+    again = items('a', 'b')
+    asyncio.run(analyzer.analyze_many(again))
+    assert [item['analysis'] for item in again] == ['analiz: a', 'analiz: b']
+    assert len(calls) == 2
+    assert analyzer.stats['cache_hits'] == 2
+
+
+def test_failures_are_not_cached():
+    analyzer, calls, _ = make_analyzer()
+    asyncio.run(analyzer.analyze_many(items('fail')))
+    asyncio.run(analyzer.analyze_many(items('fail')))
+    assert calls == ['fail', 'fail']
+    assert analyzer.stats['failures'] == 2
+
+
+def test_persistent_lookup_skips_call():
+    lookups = []
+
+    def lookup(hashes):
+        lookups.append(list(hashes))
+        return {'h-a': 'arşivden'}
+
+    analyzer, calls, _ = make_analyzer(persistent_lookup=lookup)
+    batch = items('a', 'b')
+    asyncio.run(analyzer.analyze_many(batch))
+    assert batch[0]['analysis'] == 'arşivden'
+    assert calls == ['b']
+    assert lookups == [['h-a', 'h-b']]
+
+
+def test_cache_is_bounded():
+    analyzer, _, _ = make_analyzer(cache_size=2)
+    asyncio.run(analyzer.analyze_many(items('a', 'b', 'c')))
+    assert len(analyzer.cache) == 2
+
+
+def test_concurrency_limit():
+    analyzer, calls, state = make_analyzer(concurrency=3)
+    asyncio.run(analyzer.analyze_many(items(*(str(i) for i in range(10)))))
+    assert len(calls) == 10
+    assert state['peak'] == 3
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+from metrics import Metrics
+from neardup import NearDupIndex, simhash
+
+TITLE = 'Merkez Bankası faiz kararını açıkladı'
+TEXT = 'Merkez Bankası politika faizini yüzde 50 seviyesinde sabit tuttu ve piyasalar kararı bekliyordu'
+
+
+def news(news_hash, targets, title=TITLE, text=TEXT):
+    return {'news_hash': news_hash, 'title': title, 'clean_text': text, 'targets': list(targets),
+            'link': f"https://{news_hash}.example/haber", 'source': news_hash}
+
+
+def test_similar_texts_are_close_and_distinct_are_far():
+    index = NearDupIndex(max_distance=4)
+    index.add(simhash(TITLE, TEXT), {'news_hash': 'a'})
+    assert index.find(simhash(TITLE + '!', TEXT))['news_hash'] == 'a'
+    assert index.find(simhash('Deprem', 'Ege açıklarında 4.5 büyüklüğünde deprem oldu')) is None
+
+
+def test_window_expiry():
+    index = NearDupIndex(window_hours=1)
+    index.add(simhash(TITLE, TEXT), {'news_hash': 'a'}, added_at=0)
+    index.expire(now=7200)
+    assert len(index) == 0
+
+
+def collapser(bot_module, chat_sent=()):
+    marked = []
+    fake = SimpleNamespace(
+        neardup=NearDupIndex(),
+        storage=SimpleNamespace(is_chat_sent=lambda chat_id, keys: any((chat_id, key) in chat_sent for key in keys)),
+        metrics=Metrics(),
+        mark_news_sent=lambda news_hash, *args: marked.append(news_hash),
+    )
+
+    def collapse(items, cycle_index=None):
+        if cycle_index is None:
+            cycle_index = NearDupIndex()
+        return list(bot_module.RSSNewsBot.collapse_near_duplicates(fake, items, cycle_index))
+
+    return fake, collapse, marked
+
+
+def test_copies_in_one_cycle_collapse_into_one_delivery(bot_module):
+    _, collapse, marked = collapser(bot_module)
+    out = collapse([news('a', ['c1']), news('b', ['c2'])])
+    assert [item['news_hash'] for item in out] == ['a']
+    assert out[0]['targets'] == ['c1', 'c2']
+    assert [alt['news_hash'] for alt in out[0]['alternates']] == ['b']
+    assert marked == []
+
+
+def test_archived_original_only_skips_chats_that_got_it(bot_module):
+    fake, collapse, marked = collapser(bot_module, chat_sent={('c1', 'orig')})
+    fake.neardup.add(simhash(TITLE, TEXT), {'news_hash': 'orig', 'source': 'x', 'link': 'l', 'title': TITLE})
+    out = collapse([news('copy', ['c1', 'c2'])])
+    assert [(item['news_hash'], item['targets']) for item in out] == [('copy', ['c2'])]
+    assert marked == []
+
+    out = collapse([news('copy2', ['c1'])])
+    assert out == []
+    assert marked == ['copy2']
+
+
+def test_late_copy_goes_only_to_new_chats(bot_module):
+    _, collapse, _ = collapser(bot_module)
+    cycle_index = NearDupIndex()
+    primary, = collapse([news('a', ['c1'])], cycle_index)
+    primary['pending_chats'] = {'c1'}
+    out = collapse([news('b', ['c1', 'c2']), news('c', ['c1'])], cycle_index)
+    assert [(item['news_hash'], item['targets']) for item in out] == [('b', ['c2'])]
+    assert [alt['news_hash'] for alt in primary['alternates']] == ['c']
@@ -0,0 +1,52 @@
+from sharding import COORDINATOR_LEASE, ShardMember
+
+
+def test_coordinator_lease_expiry_and_takeover(storage):
+    a = ShardMember(storage, worker_id='a', lease_ttl=10)
+    b = ShardMember(storage, worker_id='b', lease_ttl=10)
+    assert a.hold(COORDINATOR_LEASE, now=100)
+    assert not b.hold(COORDINATOR_LEASE, now=105)
+    # a yeniler: süre uzar
+    assert a.hold(COORDINATOR_LEASE, now=108)
+    assert not b.hold(COORDINATOR_LEASE, now=115)
+    # a susar: kira dolunca b devralır, a geri alamaz
+    assert b.hold(COORDINATOR_LEASE, now=119)
+    assert not a.hold(COORDINATOR_LEASE, now=120)
+
+
+def test_feeds_split_between_workers_and_move_on_leave(storage):
+    urls = [f"https://feed{i}.example/rss" for i in range(40)]
+    a = ShardMember(storage, worker_id='a', lease_ttl=10)
+    b = ShardMember(storage, worker_id='b', lease_ttl=10)
+    a.heartbeat(now=100)
+    b.heartbeat(now=100)
+    owned_a = set(a.rebalance(urls, now=100))
+    owned_b = set(b.rebalance(urls, now=100))
+    assert owned_a and owned_b
+    assert not owned_a & owned_b
+    assert owned_a | owned_b == set(urls)
+
+    a.leave()
+    assert set(b.rebalance(urls, now=101)) == set(urls)
+
+
+def test_dead_worker_feeds_taken_after_ttl(storage):
+    urls = [f"https://feed{i}.example/rss" for i in range(20)]
+    a = ShardMember(storage, worker_id='a', lease_ttl=10)
+    b = ShardMember(storage, worker_id='b', lease_ttl=10)
+    a.heartbeat(now=100)
+    b.heartbeat(now=100)
+    a.rebalance(urls, now=100)
+    b.rebalance(urls, now=100)
+    # a çöktü (kalp atışı yok): kiraları dolana kadar b onları alamaz
+    assert len(b.rebalance(urls, now=105)) < len(urls)
+    assert set(b.rebalance(urls, now=111)) == set(urls)
+
+
+def test_claimed_ingest_rows_survive_until_ack(storage):
+    storage.enqueue_ingest([(f"h{i}", 'f', '{}', 'w', 100.0) for i in range(3)])
+    assert len(storage.claim_ingest('c1', 10, now=100)) == 3
+    # Çöken koordinatörün sahiplendikleri yenisine geçer
+    assert len(storage.claim_ingest('c2', 10, now=101)) == 3
+    storage.ack_ingest(['h0'])
+    assert storage.ingest_depth() == 2
@@ -0,0 +1,101 @@
+import sqlite3
+
+from identity import url_hash
+from storage import MIGRATIONS, NewsStorage
+
+# Şema göçlerinden önceki (ilk sürüm) tablolar
+BASELINE_SCHEMA = (
+    '''
+    CREATE TABLE sent_news (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        news_hash TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL,
+        link TEXT NOT NULL,
+        sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE news_archive (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        news_hash TEXT UNIQUE NOT NULL,
+        source TEXT,
+        category TEXT,
+        title TEXT,
+        summary TEXT,
+        link TEXT,
+        published_date TIMESTAMP,
+        analysis TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+)
+
+
+def make_baseline(path):
+    conn = sqlite3.connect(path)
+    for statement in BASELINE_SCHEMA:
+        conn.execute(statement)
+    conn.execute(
+        "INSERT INTO sent_news (news_hash, title, link) VALUES (?, ?, ?)",
+        ('eski-hash', 'Eski haber', 'https://www.example.com/haber/1?utm_source=x'),
+    )
+    conn.execute(
+        "INSERT INTO news_archive (news_hash, source, category, title, summary, link, published_date, analysis) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        ('eski-hash', 'Kaynak', 'Teknoloji', 'İstanbul yapay zeka zirvesi', '<p>Zirve <b>başladı</b></p>',
+         'https://www.example.com/haber/1', '2024-01-01 10:00:00', 'analiz'),
+    )
+    conn.commit()
+    conn.close()
+
+
+def columns(store, table):
+    return {row[1] for row in store.query(f"PRAGMA table_info({table})")}
+
+
+def test_baseline_database_migrates_to_latest(tmp_path):
+    path = str(tmp_path / 'news_bot.db')
+    make_baseline(path)
+    store = NewsStorage(path)
+    try:
+        assert store.query("PRAGMA user_version")[0][0] == MIGRATIONS[-1][0] == 11
+        assert {'url_hash'} <= columns(store, 'sent_news')
+        assert {'feed_url', 'simhash', 'clean_text'} <= columns(store, 'news_archive')
+        assert {'claimed_by', 'claimed_at'} <= columns(store, 'ingest_queue')
+
+        # Eski satırlar korunur ve yeni kimlik şemasıyla da görülmüş sayılır
+        assert store.is_news_sent('eski-hash')
+        assert store.get_meta('legacy_sent_max_id') == '1'
+        assert store.is_legacy_sent(url_hash('https://example.com/haber/1'))
+
+        # FTS eski arşiv için doldurulur, Türkçe katlama ile aranır
+        assert store.get_meta('fts_last_id') == '1'
+        assert store.search_news('istanbul') == [('İstanbul yapay zeka zirvesi', 'https://www.example.com/haber/1')]
+    finally:
+        store.close()
+
+
+def test_migrations_are_idempotent(tmp_path):
+    path = str(tmp_path / 'news_bot.db')
+    make_baseline(path)
+    NewsStorage(path).close()
+    store = NewsStorage(path)
+    try:
+        assert store.query("PRAGMA user_version")[0][0] == 11
+        assert store.query("SELECT COUNT(*) FROM sent_news")[0][0] == 1
+        # Göç sonrası yazılan satırlar eski sayılmaz
+        assert store.get_meta('legacy_sent_max_id') == '1'
+    finally:
+        store.close()
+
+
+def test_auto_vacuum_conversion(tmp_path):
+    path = str(tmp_path / 'news_bot.db')
+    make_baseline(path)
+    store = NewsStorage(path)
+    try:
+        assert store.query("PRAGMA auto_vacuum")[0][0] == 0
+        assert store.ensure_incremental_vacuum()
+        assert store.query("PRAGMA auto_vacuum")[0][0] == 2
+    finally:
+        store.close()
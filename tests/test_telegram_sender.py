@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import telegram_sender
+from telegram_sender import SendQueue, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.monotonic ve asyncio.sleep yerine elle ilerleyen saat"""
+    state = {'now': 1000.0, 'sleeps': []}
+
+    async def fake_sleep(delay):
+        state['sleeps'].append(delay)
+        state['now'] += delay
+
+    monkeypatch.setattr(telegram_sender.time, 'monotonic', lambda: state['now'])
+    monkeypatch.setattr(telegram_sender.asyncio, 'sleep', fake_sleep)
+    return state
+
+
+def test_bucket_burst_then_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(take(2))
+    assert clock['sleeps'] == []
+    asyncio.run(take(1))
+    assert clock['sleeps'] == [pytest.approx(0.5)]
+
+
+def test_bucket_refill_is_capped(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    asyncio.run(bucket.acquire())
+    clock['now'] += 3600
+    bucket._refill()
+    assert bucket.tokens == 3
+
+
+def test_group_and_channel_chats_get_group_limit():
+    queue = SendQueue(bot=None)
+    assert len(queue._buckets_for(12345)) == 1
+    assert len(queue._buckets_for('-1001234')) == 2
+    assert len(queue._buckets_for('@kanal')) == 2
+
+
+def test_channel_username_lane():
+    sent = []
+
+    class Bot:
+        async def send_message(self, **kwargs):
+            sent.append(kwargs['chat_id'])
+
+    async def run():
+        queue = SendQueue(Bot(), global_rate=1000, chat_rate=1000, group_per_minute=60000)
+        queue.put('@kanal', 'x', keys=['k'])
+        assert queue.is_pending('k')
+        await queue.join()
+        assert not queue.is_pending('k')
+        await queue.stop()
+
+    asyncio.run(run())
+    assert sent == ['@kanal']
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Metin yardımcıları
+Türkçe'ye duyarlı büyük/küçük harf ve aksan katlama, HTML'den düz metin çıkarma.
+"""
+
+import html
+import re
+import unicodedata
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# Türkçe'de I/ı ve İ/i çiftleri str.lower() ile doğru eşleşmez;
+# arama ve filtrelerde hepsini düz "i"ye indiriyoruz
+_TURKISH_I = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def turkish_fold(text: str) -> str:
+    """Türkçe'ye duyarlı katlama: küçük harf, I/İ/ı -> i, aksanlar kaldırılır (ş -> s, ğ -> g ...)"""
+    if not text:
+        return ''
+    text = text.translate(_TURKISH_I).lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def strip_tags(text: str) -> str:
+    """HTML etiketlerini ve varlıklarını kabaca temizle"""
+    if not text:
+        return ''
+    return _SPACE_RE.sub(' ', html.unescape(_TAG_RE.sub(' ', text))).strip()
+
+
+# İçeriği metne dahil edilmeyen etiketler
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'iframe', 'svg', 'head', 'title'}
+# Metinde kelime sınırı oluşturan etiketler
+_BLOCK_TAGS = {
+    'p', 'br', 'div', 'li', 'ul', 'ol', 'tr', 'td', 'th', 'table', 'blockquote', 'section',
+    'article', 'header', 'footer', 'figure', 'figcaption', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'img',
+}
+_FEED_CHUNK = 2048
+
+
+class _TextExtractor(HTMLParser):
+    """Akan HTML'den düz metin toplar; limit dolunca done bayrağını kaldırır"""
+
+    def __init__(self, limit: Optional[int]):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts: List[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if self.skip_depth or self.done:
+            return
+        data = _SPACE_RE.sub(' ', data)
+        self.parts.append(data)
+        self.length += len(data)
+        # Boşluk birleştirmesi metni biraz kısaltabilir: küçük bir pay bırak
+        if self.limit and self.length >= self.limit + 16:
+            self.done = True
+
+
+def html_to_text(markup: str, limit: Optional[int] = None) -> str:
+    """HTML'den düz metin: akış halinde ayrıştırılır, limit dolunca durulur.
+    Ayrıştırıcı hata verirse BeautifulSoup'a düşülür."""
+    if not markup:
+        return ''
+    if '<' not in markup and '&' not in markup:
+        # Düz metin: ayrıştırmaya gerek yok
+        text = _SPACE_RE.sub(' ', markup).strip()
+        return text[:limit] if limit else text
+    parser = _TextExtractor(limit)
+    try:
+        for start in range(0, len(markup), _FEED_CHUNK):
+            parser.feed(markup[start:start + _FEED_CHUNK])
+            if parser.done:
+                break
+        else:
+            parser.close()
+        text = ''.join(parser.parts)
+    except Exception:
+        from bs4 import BeautifulSoup
+        text = BeautifulSoup(markup, 'html.parser').get_text(separator=' ', strip=True)
+    text = _SPACE_RE.sub(' ', text).strip()
+    return text[:limit] if limit else text
+
+
+def html_to_text_many(markups: List[str], limit: Optional[int] = None) -> List[str]:
+    """Toplu çıkarma (işçi havuzunda çalıştırılabilir)"""
+    return [html_to_text(markup, limit) for markup in markups]
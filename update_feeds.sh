@@ -231,15 +231,19 @@ while true; do
                 done < selected_lines.txt
             fi
             json_content+="]"
-            echo "$json_content" > feeds.json
+            # Write atomically (temp file + rename) so the bot never reads a half-written file
+            tmp_feeds=$(mktemp feeds.json.XXXXXX)
+            echo "$json_content" > "$tmp_feeds" && chmod 644 "$tmp_feeds" && mv -f "$tmp_feeds" feeds.json
             echo -e "${GREEN}Feeds saved to feeds.json ($count feeds)${NC}"
             
             # Restart Docker
             echo -e "${BLUE}Restarting bot to apply changes...${NC}"
+            # feeds.json is bind-mounted as a single file: after the rename the
+            # container must be recreated to see the new inode
             if docker compose version &> /dev/null; then
-                docker compose up -d --build
+                docker compose up -d --build --force-recreate
             else
-                docker-compose up -d --build
+                docker-compose up -d --build --force-recreate
             fi
             echo -e "${GREEN}Done! Bot is updated.${NC}"
             rm selected_lines.txt 2>/dev/null